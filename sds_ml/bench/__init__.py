@@ -0,0 +1,2 @@
+import sds_ml.bench.benchmarks as benchmarks
+import sds_ml.bench.bench as bench
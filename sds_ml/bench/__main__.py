@@ -0,0 +1,13 @@
+import logging
+import sds_ml.bench.bench
+
+if __name__ == "__main__":
+
+    logging.basicConfig(
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        format="%(asctime)s %(levelname)-4s %(name)s %(message)s",
+        style="%",
+    )
+
+    sds_ml.bench.bench.main()
@@ -0,0 +1,228 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import argparse
+import statistics
+import time
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds_ml.bench.benchmarks as benchmarks
+import sds_ml.seeding
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+
+def autorange(call, min_seconds):
+    """
+    Returns how many calls take at least min_seconds, trying 1, 2, 5, 10, 20,
+    50... calls in turn, as timeit does.
+    """
+
+    for exponent in itertools.count():
+
+        for multiplier in (1, 2, 5):
+
+            number = multiplier * 10 ** exponent
+
+            start = time.perf_counter()
+
+            for call_num in range(number):
+
+                call()
+
+            if time.perf_counter() - start >= min_seconds:
+
+                return number
+
+
+def time_benchmark(benchmark, seed, repeat, min_seconds):
+    """
+    Sets up and times a single benchmark, returning a dict of its results.
+
+    Each benchmark gets its own rng seeded from seed and the benchmark's name,
+    so adding or removing benchmarks leaves the others' inputs unchanged.
+    Code that still draws from the module level random functions is covered
+    by reseeding those as well.
+    """
+
+    benchmark_seed = f"{seed}:{benchmark.name}"
+
+    random.seed(benchmark_seed)
+
+    rng = random.Random(benchmark_seed)
+
+    call, work = benchmark.setup(rng)
+
+    number = autorange(call, min_seconds)
+
+    seconds = []
+
+    for repeat_num in range(repeat):
+
+        start = time.perf_counter()
+
+        for call_num in range(number):
+
+            call()
+
+        seconds.append((time.perf_counter() - start) / number)
+
+    best = min(seconds)
+
+    return dict(
+        group=benchmark.group,
+        unit=benchmark.unit,
+        work_per_call=work,
+        number=number,
+        repeat=repeat,
+        seconds_per_call=seconds,
+        best_seconds_per_call=best,
+        median_seconds_per_call=statistics.median(seconds),
+        best_rate=work / best if best > 0 else None,
+    )
+
+
+def run(pattern=None, seed=0, repeat=5, min_seconds=0.2):
+    """
+    Runs every registered benchmark whose name matches the regular expression
+    pattern, returning the results along with details of the machine.
+
+    Keyword arguments:
+    pattern -- a regular expression searched for in each benchmark name (optional)
+    seed -- seeds every benchmark
+    repeat -- the number of timed repeats of each benchmark
+    min_seconds -- the minimum duration of each repeat
+    """
+
+    results = dict(
+        created=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        seed=seed,
+        machine=sds_ml.seeding.machine_info(),
+        benchmarks={},
+        skipped={},
+    )
+
+    # Benchmarks time the code, not the logging inside it.
+    quiet_log = logging.getLogger("sds_ml")
+
+    previous_levels = (quiet_log.level, log.level)
+
+    quiet_log.setLevel(WARNING)
+
+    log.setLevel(logging.getLogger().getEffectiveLevel())
+
+    try:
+
+        for name, benchmark in benchmarks.name2benchmark.items():
+
+            if pattern is not None and not re.search(pattern, name):
+
+                continue
+
+            try:
+
+                result = time_benchmark(benchmark, seed=seed, repeat=repeat, min_seconds=min_seconds)
+
+            except benchmarks.Skip as e:
+
+                log.warning("skipping %s: %s", name, e)
+
+                results["skipped"][name] = str(e)
+
+                continue
+
+            log.info(
+                "%-50s %12.3g s/call %12.4g %s/s",
+                name,
+                result["best_seconds_per_call"],
+                result["best_rate"] or 0,
+                result["unit"],
+            )
+
+            results["benchmarks"][name] = result
+
+    finally:
+
+        quiet_log.setLevel(previous_levels[0])
+
+        log.setLevel(previous_levels[1])
+
+    return results
+
+
+def compare(baseline, results):
+    """
+    Returns (name, baseline seconds, seconds, ratio) for each benchmark in both
+    results, where a ratio above 1 means the benchmark has got slower.
+    """
+
+    return [
+        (
+            name,
+            baseline["benchmarks"][name]["best_seconds_per_call"],
+            result["best_seconds_per_call"],
+            result["best_seconds_per_call"] / baseline["benchmarks"][name]["best_seconds_per_call"],
+        )
+        for name, result in results["benchmarks"].items()
+        if name in baseline["benchmarks"]
+    ]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark sds_ml")
+
+    parser.add_argument("pattern", nargs="?", default=None, help="Only run benchmarks whose names match this regular expression")
+
+    parser.add_argument("--seed", type=int, default=0, help="Seed for every benchmark")
+
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats of each benchmark")
+
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Minimum duration of each repeat")
+
+    parser.add_argument("--output", type=pathlib.Path, default=None, help="Write the results to this JSON file")
+
+    parser.add_argument("--compare", type=pathlib.Path, default=None, help="Compare the results with an earlier JSON file")
+
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+
+    args = parser.parse_args()
+
+    if args.list:
+
+        for name, benchmark in benchmarks.name2benchmark.items():
+
+            print(name)
+
+        return
+
+    results = run(pattern=args.pattern, seed=args.seed, repeat=args.repeat, min_seconds=args.min_seconds)
+
+    if args.output is not None:
+
+        args.output.write_text(json.dumps(results, indent=2))
+
+        log.info("wrote %s", args.output)
+
+    if args.compare is not None:
+
+        baseline = json.loads(args.compare.read_text())
+
+        log.info("compared with %s (%s)", args.compare, baseline["machine"]["commit"])
+
+        for name, baseline_seconds, seconds, ratio in compare(baseline, results):
+
+            log.info("%-50s %12.3g %12.3g %6.2fx", name, baseline_seconds, seconds, ratio)
+
+
+if __name__ == "__main__":
+
+    logging.basicConfig(
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        format="%(asctime)s %(levelname)-4s %(name)s %(message)s",
+        style="%",
+    )
+
+    main()
@@ -0,0 +1,636 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import tempfile
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds
+import sds_ml.clustering.clustering
+import sds_ml.clustering.problem
+import sds_ml.clustering.spatial
+import sds_ml.parallel
+import sds_ml.pima
+import sds_ml.pima.dataset
+import sds_ml.pima.evaluation
+import sds_ml.pima.pima
+import sds_ml.random_pool
+import sds_ml.swarm
+import sds_ml.tree_sds
+import sds_ml.tree_search
+import sds_ml.variants
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+Benchmark = collections.namedtuple("Benchmark", ("name", "group", "setup", "unit"))
+
+name2benchmark = {}
+
+
+class Skip(Exception):
+    """
+    Raised by a benchmark's setup when it cannot run on this machine.
+    """
+
+
+def benchmark(group, unit="call", name=None):
+    """
+    Registers a benchmark. The decorated function takes an instance of
+    random.Random and returns (call, work), where call takes no arguments and
+    is what gets timed, and work is the number of units it processes per call.
+
+    The benchmark is named after its group and the function, or name if given.
+    """
+
+    benchmark_name = name
+
+    def register(setup):
+
+        name = f"{group}.{benchmark_name or setup.__name__}"
+
+        name2benchmark[name] = Benchmark(name=name, group=group, setup=setup, unit=unit)
+
+        return setup
+
+    return register
+
+
+def make_points(rng, point_count=100, dimensions=3, cluster_count=4):
+
+    points, point_clusters, centroids = sds_ml.clustering.problem.make_a_problem_space(
+        lower=0,
+        upper=1,
+        sigma=0.05,
+        dimensions=dimensions,
+        point_count=point_count,
+        cluster_count=cluster_count,
+        rng=rng,
+    )
+
+    return points
+
+
+def synthetic_pima(rng, row_count=768):
+    """
+    Returns a dataset with the shape and column types of PIMA but random
+    values, so benchmarks of the classification code run without the csv.
+    """
+
+    numpy_rng = np.random.default_rng(rng.getrandbits(64))
+
+    columns = np.empty((len(sds_ml.pima.Pima._fields), row_count), dtype=float)
+
+    for field_num, transform in enumerate(sds_ml.pima.dataset.schema[:-1]):
+
+        if transform is int:
+
+            columns[field_num] = numpy_rng.integers(0, 200, size=row_count)
+
+        else:
+
+            columns[field_num] = numpy_rng.uniform(0, 60, size=row_count).round(1)
+
+    columns[-1] = numpy_rng.integers(0, 2, size=row_count)
+
+    return sds_ml.pima.Rows(columns)
+
+
+def pima_dataset():
+    """
+    Returns the PIMA dataset, skipping the benchmark if it is not installed.
+    """
+
+    if not sds_ml.pima.dataset.dataset_path.exists():
+
+        raise Skip(f"{sds_ml.pima.dataset.dataset_path} not found")
+
+    return sds_ml.pima.load()
+
+
+def fill_swarm(swarm, DH, rng, activity=0.5):
+
+    for agent in swarm:
+
+        agent.hyp = DH()
+
+        agent.active = rng.random() < activity
+
+
+def build_split_hyp(tree, rng, split_count, split_num):
+
+    hyp = sds_ml.tree_sds.Hyp.first_split(rng=rng, tree=tree, split_num=split_num)
+
+    for split_count in range(split_count):
+
+        if hyp.count_splittable_leaf_nodes() == 0:
+
+            break
+
+        hyp = hyp.random_split(tree=tree, rng=rng, split_num=split_num)
+
+    return hyp
+
+
+@benchmark("clustering")
+def euclid_squared(rng):
+
+    a, b = make_points(rng, point_count=2, cluster_count=2)
+
+    return functools.partial(sds_ml.clustering.clustering.euclid_squared, a, b), 1
+
+
+@benchmark("clustering", unit="microtest")
+def microtest(rng):
+
+    points = make_points(rng)
+
+    DH = sds_ml.clustering.clustering.make_DH(points=points, dimension_count=3, max_k=8, rng=rng)
+
+    TM = sds_ml.clustering.clustering.make_boolean_TM(
+        points=points,
+        dimension_count=3,
+        distance_metric=sds_ml.clustering.clustering.euclid_squared,
+        threshold=0.1,
+        rng=rng,
+    )
+
+    hyps = [DH() for hyp_num in range(100)]
+
+    def call():
+
+        for hyp in hyps:
+
+            TM()(hyp)
+
+    return call, len(hyps)
+
+
+@benchmark("clustering", unit="point")
+def get_bounds(rng):
+
+    points = make_points(rng, point_count=10000)
+
+    return functools.partial(sds_ml.clustering.clustering.get_bounds, points), len(points)
+
+
+@benchmark("clustering", unit="point")
+def coverage(rng, point_count=100000):
+
+    points = make_points(rng, point_count=point_count)
+
+    index = sds_ml.clustering.spatial.KDTree(points)
+
+    DH = sds_ml.clustering.clustering.make_DH(points=points, dimension_count=3, max_k=8, rng=rng)
+
+    hyps = [DH() for hyp_num in range(10)]
+
+    def call():
+
+        for hyp in hyps:
+
+            index.coverage(hyp, 0.01)
+
+    return call, len(hyps) * len(points)
+
+
+def with_random_pool(setup):
+    """
+    Returns a benchmark setup which passes setup a RandomPool seeded from the
+    benchmark's rng in place of the rng.
+    """
+
+    def pool_setup(rng):
+
+        return setup(sds_ml.random_pool.RandomPool(rng.getrandbits(64)))
+
+    return pool_setup
+
+
+@benchmark("clustering", unit="point")
+def make_a_problem_space(rng, point_count=10000):
+
+    return functools.partial(make_points, rng, point_count=point_count), point_count
+
+
+benchmark("clustering", unit="point", name="make_a_problem_space_pool")(with_random_pool(make_a_problem_space))
+
+
+@benchmark("clustering", unit="point")
+def make_a_large_problem_space(rng, point_count=10 ** 6):
+
+    directory = tempfile.TemporaryDirectory()
+
+    def call():
+
+        sds_ml.clustering.problem.make_a_large_problem_space(
+            directory.name,
+            lower=0,
+            upper=1,
+            sigma=0.05,
+            dimensions=3,
+            point_count=point_count,
+            cluster_count=4,
+            seed=rng.getrandbits(32),
+        )
+
+    # The directory is removed along with the call.
+    call.directory = directory
+
+    return call, point_count
+
+
+@benchmark("clustering", unit="hyp")
+def make_DH(rng, hyp_count=100):
+
+    DH = sds_ml.clustering.clustering.make_DH(points=make_points(rng), dimension_count=3, max_k=8, rng=rng)
+
+    def call():
+
+        for hyp_num in range(hyp_count):
+
+            DH()
+
+    return call, hyp_count
+
+
+def hyp_generator(DH_factory, hyp_count=100):
+
+    def setup(rng):
+
+        DH = DH_factory(dataset=synthetic_pima(rng), rng=rng)
+
+        def call():
+
+            for hyp_num in range(hyp_count):
+
+                DH()
+
+        return call, hyp_count
+
+    return setup
+
+
+def plane_microtest(DH_factory, TM_factory, microtest_count=100):
+
+    def setup(rng):
+
+        dataset = synthetic_pima(rng)
+
+        DH = DH_factory(dataset=dataset, rng=rng)
+
+        TM, microtest = TM_factory(dataset=dataset, rng=rng)
+
+        hyps = [DH() for hyp_num in range(microtest_count)]
+
+        def call():
+
+            for hyp in hyps:
+
+                TM()(hyp)
+
+        return call, microtest_count
+
+    return setup
+
+
+for DH_factory in (sds_ml.variants.DH_plane, sds_ml.variants.DH_plane_union):
+
+    benchmark("variants", unit="hyp", name=DH_factory.__name__)(hyp_generator(DH_factory))
+
+for DH_factory, TM_factory in (
+    (sds_ml.variants.DH_plane, sds_ml.variants.TM_plane),
+    (sds_ml.variants.DH_plane_union, sds_ml.variants.TM_plane_union),
+    (sds_ml.variants.DH_plane_union, sds_ml.variants.TM_plane_intersection),
+):
+
+    benchmark("variants", unit="microtest", name=TM_factory.__name__)(
+        plane_microtest(DH_factory, TM_factory)
+    )
+
+
+@benchmark("variants", unit="hyp")
+def DH_data_driven(rng, hyp_count=100):
+
+    dataset = synthetic_pima(rng)
+
+    swarm = sds_ml.swarm.ArraySwarm(agent_count=1000)
+
+    DH = sds_ml.variants.DH_data_driven(dataset=dataset, swarm=swarm, rng=rng)
+
+    fill_swarm(swarm, DH, rng)
+
+    def call():
+
+        for hyp_num in range(hyp_count):
+
+            DH()
+
+    return call, hyp_count
+
+
+@benchmark("swarm")
+def most_common(rng, agent_count=10000):
+
+    swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
+
+    DH = sds.DH_uniform(hypotheses=range(1000), rng=rng)
+
+    fill_swarm(swarm, DH, rng)
+
+    return functools.partial(swarm.clusters.most_common, 3), 1
+
+
+@benchmark("pima", unit="row")
+def load(rng):
+
+    dataset = pima_dataset()
+
+    def call():
+
+        rows = sds_ml.pima.load()
+
+        for row in rows:
+
+            pass
+
+    return call, len(dataset)
+
+
+def precision_and_recall(DH_factory, precision_and_recall_f, hyp_count=100):
+    """
+    Returns the setup of a benchmark scoring hyp_count fresh hypotheses per
+    call. The evaluator's hypothesis caches are emptied each call so repeats
+    measure scoring rather than cache hits, its threshold index is kept.
+    """
+
+    def setup(rng):
+
+        dataset = synthetic_pima(rng)
+
+        if DH_factory is sds_ml.variants.DH_data_driven:
+
+            swarm = sds_ml.swarm.ArraySwarm(agent_count=100)
+
+            DH = DH_factory(dataset=dataset, swarm=swarm, rng=rng)
+
+            fill_swarm(swarm, DH, rng)
+
+        else:
+
+            DH = DH_factory(dataset=dataset, rng=rng)
+
+        hyps = [DH() for hyp_num in range(hyp_count)]
+
+        evaluator = sds_ml.pima.evaluation.evaluator(dataset)
+
+        def call():
+
+            evaluator.id2rows.clear()
+
+            evaluator.groups2rows.clear()
+
+            for hyp in hyps:
+
+                precision_and_recall_f(hyp, dataset)
+
+        return call, hyp_count
+
+    return setup
+
+
+for DH_factory, precision_and_recall_f in (
+    (sds_ml.variants.DH_plane, sds_ml.pima.pima.plane_precision_and_recall),
+    (sds_ml.variants.DH_plane_union, sds_ml.pima.pima.plane_union_precision_and_recall),
+    (sds_ml.variants.DH_plane_union, sds_ml.pima.pima.plane_intersection_precision_and_recall),
+    (sds_ml.variants.DH_data_driven, sds_ml.pima.pima.data_driven_precision_and_recall),
+):
+
+    benchmark("pima", unit="hyp", name=precision_and_recall_f.__name__)(
+        precision_and_recall(DH_factory, precision_and_recall_f)
+    )
+
+
+@benchmark("tree_search", unit="subtree")
+def get_subtrees(rng):
+
+    tree = sds_ml.tree_search.build_tree(depth=3, branch_count=4)
+
+    subtree_count = sum(1 for subtree in sds_ml.tree_search.get_subtrees(tree, split_num=3))
+
+    def call():
+
+        for subtree in sds_ml.tree_search.get_subtrees(tree, split_num=3):
+
+            pass
+
+    return call, subtree_count
+
+
+@benchmark("tree_search", unit="subtree")
+def sample_subtree(rng, sample_count=100):
+
+    tree = sds_ml.tree_search.build_tree(depth=5, branch_count=6)
+
+    space = sds_ml.tree_search.SubtreeSpace(split_num=3)
+
+    def call():
+
+        for sample_num in range(sample_count):
+
+            space.sample(tree, rng=rng)
+
+    return call, sample_count
+
+
+@benchmark("tree_search", unit="node")
+def best_subtree(rng):
+
+    tree = sds_ml.tree_search.build_tree(depth=5, branch_count=10, data_f=lambda node: rng.random())
+
+    solver = sds_ml.tree_search.SubtreeSolver(root=tree, split_num=3)
+
+    return solver.best_mean, len(solver.values)
+
+
+@benchmark("tree_search", unit="node")
+def best_flat_subtree(rng):
+
+    tree = sds_ml.tree_search.build_flat_tree(depth=6, branch_count=10, data_f=lambda node: rng.random())
+
+    solver = sds_ml.tree_search.SubtreeSolver(root=tree, split_num=3)
+
+    return solver.best_mean, len(solver.values)
+
+
+def split_benchmark(f):
+    """
+    Wraps a function taking (hyp, rng) and returning the call to time so it
+    is set up against a hypothesis that has been split 20 times.
+    """
+
+    @functools.wraps(f)
+    def setup(rng):
+
+        tree = sds_ml.tree_search.build_tree(depth=5, branch_count=6)
+
+        hyp = build_split_hyp(tree=tree, rng=rng, split_count=20, split_num=3)
+
+        return f(hyp, rng), 1
+
+    return setup
+
+
+def mutable_split_benchmark(f):
+    """
+    As split_benchmark, but with the hypothesis held as a mutable Split.
+    """
+
+    @functools.wraps(f)
+    def setup(rng):
+
+        tree = sds_ml.tree_search.build_tree(depth=5, branch_count=6)
+
+        hyp = build_split_hyp(tree=tree, rng=rng, split_count=20, split_num=3)
+
+        return f(sds_ml.tree_sds.Hyp(root_split=hyp.root_split.to_split()), rng), 1
+
+    return setup
+
+
+@benchmark("tree_sds")
+@mutable_split_benchmark
+def deep_clone(hyp, rng):
+
+    return hyp.root_split.deep_clone
+
+
+@benchmark("tree_sds")
+@mutable_split_benchmark
+def split_node(hyp, rng):
+
+    node_count = hyp.count_splittable_leaf_nodes()
+
+    def call():
+
+        hyp.root_split.deep_clone().split_node(
+            node_num=rng.randrange(node_count), split_num=3, rng=rng
+        )
+
+    return call
+
+
+@benchmark("tree_sds")
+@mutable_split_benchmark
+def prune_leaf(hyp, rng):
+
+    leaf_split_count = hyp.count_leaf_splits()
+
+    def call():
+
+        hyp.root_split.deep_clone().prune_leaf(leaf_num=rng.randrange(leaf_split_count))
+
+    return call
+
+
+@benchmark("tree_sds")
+@split_benchmark
+def random_split(hyp, rng):
+
+    tree = sds_ml.tree_search.build_tree(depth=5, branch_count=6)
+
+    return functools.partial(hyp.random_split, tree=tree, rng=rng, split_num=3)
+
+
+@benchmark("tree_sds")
+@split_benchmark
+def random_prune(hyp, rng):
+
+    return functools.partial(hyp.random_prune, rng=rng)
+
+
+@benchmark("tree_sds", unit="agent-iteration")
+def iteration(rng, agent_count=1000):
+
+    tree = sds_ml.tree_search.build_tree(depth=5, branch_count=6, data_f=lambda node: rng.random())
+
+    swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
+
+    I = sds_ml.tree_sds.example(tree=tree, swarm=swarm, split_num=3, rng=rng)
+
+    for iteration in range(50):
+
+        I()
+
+    return I, agent_count
+
+
+@benchmark("tree_sds", unit="agent-iteration")
+def game_tree(rng, agent_count=1000):
+
+    tree = sds_ml.tree_search.ImplicitTree(depth=8, branch_count=10, seed=rng.random())
+
+    swarm = sds_ml.tree_sds.GameTreeSwarm(root=tree.root, agent_count=agent_count, rng=rng)
+
+    for iteration in range(10):
+
+        swarm()
+
+    return swarm, agent_count
+
+
+def example(name, agent_count=1000):
+    """
+    Returns the setup of a benchmark timing one iteration of an example over
+    a swarm that has already run for a few iterations.
+    """
+
+    def setup(rng):
+
+        if name != "basic":
+
+            pima_dataset()
+
+        data = sds_ml.parallel.load_data(name, rng)
+
+        swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
+
+        I = sds_ml.parallel.name2builder[name](data=data, swarm=swarm, polling=swarm, rng=rng)
+
+        for iteration in range(10):
+
+            I()
+
+        return I, agent_count
+
+    return setup
+
+
+for example_name in sds_ml.parallel.name2builder:
+
+    benchmark("examples", unit="agent-iteration", name=example_name)(example(example_name))
+
+
+@benchmark("examples", unit="agent-iteration")
+def basic_sds(rng, agent_count=1000):
+
+    points = make_points(rng)
+
+    swarm = sds.Swarm(agent_count=agent_count)
+
+    DH = sds_ml.clustering.clustering.make_DH(points=points, dimension_count=3, max_k=8, rng=rng)
+
+    TM = sds_ml.clustering.clustering.make_boolean_TM(
+        points=points,
+        dimension_count=3,
+        distance_metric=sds_ml.clustering.clustering.euclid_squared,
+        threshold=0.1,
+        rng=rng,
+    )
+
+    I = sds.I_sync(sds.D_passive(DH, swarm, rng), sds.T_boolean(TM), swarm)
+
+    for iteration in range(10):
+
+        I()
+
+    return I, agent_count
@@ -0,0 +1,70 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import unittest
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds_ml.bench.bench as bench
+import sds_ml.bench.benchmarks as benchmarks
+
+log = logging.getLogger(__name__)
+
+class TestBench(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    def test_setups_are_seeded(self):
+
+        for name in ("clustering.microtest", "variants.DH_plane_union", "tree_sds.split_node"):
+
+            benchmark = benchmarks.name2benchmark[name]
+
+            def run_once():
+
+                rng = random.Random(f"0:{name}")
+
+                call, work = benchmark.setup(rng)
+
+                call()
+
+                return rng.random()
+
+            self.assertEqual(run_once(), run_once())
+
+    def test_run(self):
+
+        results = bench.run(pattern=r"^(clustering\.euclid|pima\.load$|tree_search\.get_subtrees)", repeat=2, min_seconds=0.001)
+
+        self.log.info("results: %s", results)
+
+        results = json.loads(json.dumps(results))
+
+        self.assertEqual(set(results["machine"]), {"commit", "platform", "machine", "processor", "cpu_count", "python", "implementation", "numpy", "sds"})
+
+        self.assertIn("clustering.euclid_squared", results["benchmarks"])
+
+        self.assertIn("tree_search.get_subtrees", results["benchmarks"])
+
+        self.assertEqual(
+            results["benchmarks"]["tree_search.get_subtrees"]["work_per_call"],
+            501,
+        )
+
+        self.assertEqual(
+            set(results["benchmarks"]) | set(results["skipped"]),
+            {"clustering.euclid_squared", "tree_search.get_subtrees", "pima.load"},
+        )
+
+        for name, result in results["benchmarks"].items():
+
+            self.assertEqual(len(result["seconds_per_call"]), 2)
+
+            self.assertGreater(result["best_rate"], 0)
+
+        for name, baseline_seconds, seconds, ratio in bench.compare(results, results):
+
+            self.assertEqual(ratio, 1)
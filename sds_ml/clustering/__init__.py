@@ -1,3 +1,6 @@
 import sds_ml.clustering.problem as problem
 import sds_ml.clustering.clustering as clustering
 import sds_ml.clustering.output as output
+import sds_ml.clustering.spatial as spatial
+import sds_ml.clustering.stream as stream
+import sds_ml.clustering.vectorised as vectorised
@@ -2,21 +2,37 @@ import collections, datetime, functools, itertools
 import json, logging, pathlib, random, re
 import argparse, sds
 from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
 import sds_ml.clustering
+import sds_ml.clustering.spatial
+import sds_ml.clustering.stream
+import sds_ml.clustering.vectorised
+import sds_ml.seeding
+import sds_ml.swarm
 
 SILENT = 0
 
 log = logging.getLogger(__name__)
 
+bounds_chunk_size = 2 ** 20
+
 
 def get_bounds(points):
     """
     Given a list of n-dimensional points, returns a list of length n where each
     element is a tuple holding (min, max) for that dimension.
 
+    An array of points, such as a memory mapped array from
+    problem.make_a_large_problem_space, is scanned a chunk at a time with
+    NumPy.
+
     points -- list of n-dimensional points
     """
 
+    if isinstance(points, np.ndarray):
+
+        return get_array_bounds(points)
+
     bounds = [[None, None] for dimension_num in range(len(points[0]))]
 
     for point in points:
@@ -36,21 +52,42 @@ def get_bounds(points):
     return bounds
 
 
-def make_DH(points, dimension_count, max_k, rng=random):
+def get_array_bounds(points):
+
+    lower = np.full(points.shape[1], np.inf)
+
+    upper = np.full(points.shape[1], -np.inf)
+
+    for start in range(0, len(points), bounds_chunk_size):
+
+        chunk = points[start : start + bounds_chunk_size]
+
+        np.minimum(lower, chunk.min(axis=0), out=lower)
+
+        np.maximum(upper, chunk.max(axis=0), out=upper)
+
+    return [[float(a), float(b)] for a, b in zip(lower, upper)]
+
+
+def make_DH(points, dimension_count, max_k, rng=random, bounds=None):
     """
     Returns a function which has no arguments and returns a random hypothesis
     within the search space defined by the passed parameters.
 
     Positional arguments:
-    points -- list of n-dimensional points
+    points -- list of n-dimensional points, unused if bounds are given
     dimension_count -- number of dimensions for each point
     max_k -- the maximum number of centroids to hypothesise
 
     Keyword arguments:
     rng -- an instance of random.Random (optional)
+    bounds -- the (min, max) of each dimension, as returned by get_bounds or
+              kept up to date by a stream.OnlineBounds (optional)
     """
 
-    bounds = get_bounds(points)
+    if bounds is None:
+
+        bounds = get_bounds(points)
 
     def DH():
         """
@@ -61,12 +98,17 @@ def make_DH(points, dimension_count, max_k, rng=random):
 
         k = rng.randint(1, max_k)
 
+        # Scaled below, these match calling rng.uniform per feature.
+        draws = [rng.random() for draw_num in range(k * dimension_count)]
+
+        features = [
+            lower + (upper - lower) * draw
+            for (lower, upper), draw in zip(itertools.cycle(bounds[:dimension_count]), draws)
+        ]
+
         centroids = tuple(
-            tuple(
-                rng.uniform(*bounds[dimension_num])
-                for dimension_num in range(dimension_count)
-            )
-            for centroid_num in range(k)
+            tuple(features[start : start + dimension_count])
+            for start in range(0, len(features), dimension_count)
         )
 
         return centroids
@@ -137,7 +179,7 @@ def euclid_squared(vector_a, vector_b):
     return sum(abs(a - b) ** 2 for a, b in zip(vector_a, vector_b))
 
 
-def example_basic():
+def example_basic(vectorised=False, seed=None):
 
     # problem definition
     lower = 0
@@ -146,7 +188,7 @@ def example_basic():
     dimensions = 3
     point_count = 100
     cluster_count = 4
-    rng = random.Random()
+    rng = random.Random(seed)
 
     # solution definition
     max_iterations = 10 ** 3
@@ -174,7 +216,13 @@ def example_basic():
         sds_ml.clustering.output.hyp_report(centroids),
     )
 
-    swarm = sds.Swarm(agent_count=agent_count)
+    if vectorised:
+
+        swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
+
+    else:
+
+        swarm = sds.Swarm(agent_count=agent_count)
 
     H = sds.H_fixed(max_iterations)
 
@@ -182,27 +230,164 @@ def example_basic():
         "Running SDS for for %s iterations with %s agents.", max_iterations, agent_count
     )
 
-    TM = make_boolean_TM(
-        points=points,
-        dimension_count=dimensions,
-        distance_metric=euclid_squared,
+    DH = make_DH(points=points, dimension_count=dimensions, max_k=max_k, rng=rng)
+
+    if vectorised:
+
+        D = sds_ml.swarm.D_passive(DH, swarm, rng)
+
+        T = sds_ml.clustering.vectorised.make_vectorised_T(
+            points=points,
+            dimension_count=dimensions,
+            max_k=max_k,
+            threshold=threshold,
+            swarm=swarm,
+            rng=rng,
+        )
+
+        I = sds_ml.swarm.I_sync(D, T, swarm)
+
+    else:
+
+        D = sds.D_passive(DH, swarm, rng)
+
+        TM = make_boolean_TM(
+            points=points,
+            dimension_count=dimensions,
+            distance_metric=euclid_squared,
+            threshold=threshold,
+            rng=rng,
+        )
+
+        T = sds.T_boolean(TM)
+
+        I = sds.I_sync(D, T, swarm)
+
+    sds.SDS(I=I, H=H)
+
+    report = sds_ml.clustering.output.cluster_report(
+        swarm,
+        min_cluster_proportion=0.01,
+        index=sds_ml.clustering.spatial.KDTree(points),
         threshold=threshold,
+    )
+
+    log.info(report)
+
+    return dict(clusters=swarm.clusters.most_common(5))
+
+
+
+def example_stream(vectorised=False, seed=None):
+
+    # problem definition
+    lower = 0
+    upper = 1
+    sigma = 0.05
+    dimensions = 3
+    cluster_count = 4
+    drift = 0.0005
+    rng = random.Random(seed)
+
+    # solution definition
+    max_iterations = 10 ** 3
+    report_every = 250
+    agent_count = 1000
+    max_k = cluster_count * 2
+    threshold = 0.1
+    capacity = 200
+    points_per_iteration = 10
+
+    points, centroids = sds_ml.clustering.problem.make_a_stream(
+        lower=lower,
+        upper=upper,
+        sigma=sigma,
+        dimensions=dimensions,
+        cluster_count=cluster_count,
+        drift=drift,
         rng=rng,
     )
 
-    T = sds.T_boolean(TM)
+    # A biased reservoir forgets old points so the swarm can follow the drift.
+    source = sds_ml.clustering.stream.StreamSource(
+        points, dimension_count=dimensions, capacity=capacity, rng=rng, biased=True
+    )
 
-    DH = make_DH(points=points, dimension_count=dimensions, max_k=max_k, rng=rng)
+    source.advance(capacity)
 
-    D = sds.D_passive(DH, swarm, rng)
+    if vectorised:
 
-    I = sds.I_sync(D, T, swarm)
+        swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
 
-    sds.SDS(I=I, H=H)
+    else:
 
-    report = sds_ml.clustering.output.cluster_report(swarm, min_cluster_proportion=0.01)
+        swarm = sds.Swarm(agent_count=agent_count)
 
-    log.info(report)
+    DH = make_DH(
+        points=None, dimension_count=dimensions, max_k=max_k, rng=rng, bounds=source.bounds
+    )
+
+    if vectorised:
+
+        D = sds_ml.swarm.D_passive(DH, swarm, rng)
+
+        T = sds_ml.clustering.vectorised.make_vectorised_T(
+            points=source.reservoir,
+            dimension_count=dimensions,
+            max_k=max_k,
+            threshold=threshold,
+            swarm=swarm,
+            rng=rng,
+        )
+
+        I = sds_ml.swarm.I_sync(D, T, swarm)
+
+    else:
+
+        D = sds.D_passive(DH, swarm, rng)
+
+        TM = make_boolean_TM(
+            points=source.reservoir,
+            dimension_count=dimensions,
+            distance_metric=euclid_squared,
+            threshold=threshold,
+            rng=rng,
+        )
+
+        I = sds.I_sync(D, sds.T_boolean(TM), swarm)
+
+    I = sds_ml.clustering.stream.make_I_stream(I, source, points_per_iteration)
+
+    log.info(
+        "Running SDS on a stream for %s iterations with %s agents, reading %s points per iteration.",
+        max_iterations,
+        agent_count,
+        points_per_iteration,
+    )
+
+    for iteration in range(1, max_iterations + 1):
+
+        I()
+
+        if iteration % report_every == 0:
+
+            log.info(
+                "After %s points the centroids are:\n%s",
+                source.reservoir.seen,
+                sds_ml.clustering.output.hyp_report(centroids),
+            )
+
+            log.info(
+                sds_ml.clustering.output.cluster_report(
+                    swarm,
+                    min_cluster_proportion=0.01,
+                    max_clusters=1,
+                    index=sds_ml.clustering.spatial.KDTree(source.reservoir.array),
+                    threshold=threshold,
+                )
+            )
+
+    return dict(centroids=centroids, clusters=swarm.clusters.most_common(5))
 
 
 def main():
@@ -212,13 +397,38 @@ def main():
         "name", type=str, default="basic", help="Name of the example to run"
     )
 
+    parser.add_argument(
+        "--vectorised",
+        action="store_true",
+        help="Test the whole swarm in one batch with NumPy",
+    )
+
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the problem and the swarm")
+
+    parser.add_argument(
+        "--manifest",
+        type=pathlib.Path,
+        default=None,
+        help="Write the seed, parameters and result of the run to this JSON file",
+    )
+
     args = parser.parse_args()
 
-    name2example = {"basic": example_basic}
+    name2example = {"basic": example_basic, "stream": example_stream}
 
     example = name2example[args.name]
 
-    example()
+    seed = sds_ml.seeding.make_seed(args.seed)
+
+    log.info("seed %s", seed)
+
+    result = example(vectorised=args.vectorised, seed=seed)
+
+    if args.manifest is not None:
+
+        sds_ml.seeding.write_manifest(
+            args.manifest, seed, example=args.name, vectorised=args.vectorised, result=result
+        )
 
 
 if __name__ == "__main__":
@@ -21,11 +21,31 @@ def hyp_report(hyp):
 
     return "\n".join(lines)
 
-def cluster_report(swarm, min_cluster_proportion=0.2, max_clusters=5):
+def cluster_report(swarm, min_cluster_proportion=0.2, max_clusters=5, index=None, threshold=None):
+    """
+    Returns a report of the largest clusters of hypotheses in a swarm.
+
+    Keyword arguments:
+    min_cluster_proportion -- smaller clusters are left out
+    max_clusters -- the most clusters to report
+    index -- a spatial.KDTree over the points, to report the coverage of each
+             hypothesis and the support of each centroid (optional)
+    threshold -- maximum acceptable distance, required with index
+    """
+
+    def coverage_report(hyp):
+
+        if index is None:
+
+            return ""
+
+        support = ", ".join(str(count) for count in index.support(hyp, threshold))
+
+        return f"\ncoverage: {index.coverage(hyp, threshold):.3f}, support: [{support}]"
 
     return "\n".join(
         [
-            f"Hypothesis #{hyp_num} has {len(hyp)} centroids.\n{hyp_report(hyp)}: {count}"
+            f"Hypothesis #{hyp_num} has {len(hyp)} centroids.\n{hyp_report(hyp)}: {count}{coverage_report(hyp)}"
             for hyp_num, (hyp, count) in enumerate(
                 swarm.clusters.most_common(max_clusters), start=1
             )
@@ -1,6 +1,7 @@
 import collections, datetime, functools, itertools
 import json, logging, pathlib, random, re
 from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
 
 SILENT = 0
 
@@ -8,7 +9,7 @@ log = logging.getLogger(__name__)
 
 
 def make_a_problem_space(
-    lower, upper, sigma, dimensions, point_count, cluster_count, rng=random.Random()
+    lower, upper, sigma, dimensions, point_count, cluster_count, rng=None, seed=None
 ):
     """
     Make a problem space for clustering and the ground truth 'answers'.
@@ -22,8 +23,13 @@ def make_a_problem_space(
 
     Keyword arguments:
     rng -- an instance of random.Random (optional)
+    seed -- seeds a new random.Random if no rng is given (optional)
     """
 
+    if rng is None:
+
+        rng = random.Random(seed)
+
     points = []
 
     def assign_clusters():
@@ -63,3 +69,145 @@ def make_a_problem_space(
     ]
 
     return points, point_clusters, centroids
+
+
+
+def make_a_large_problem_space(
+    path, lower, upper, sigma, dimensions, point_count, cluster_count, seed=0, chunk_size=2 ** 20
+):
+    """
+    Make a problem space like make_a_problem_space, too large to hold in
+    memory, by writing it to float32 .npy files under the directory path a
+    chunk at a time.
+
+    Returns a tuple (points, point_clusters, centroids) of read only memory
+    mapped arrays, which can be passed as the points of clustering.make_DH
+    and clustering.make_boolean_TM without reading them all into memory. The
+    problem is determined by the seed and the chunk size.
+
+    Positional arguments:
+    path -- directory to write points.npy, point_clusters.npy and centroids.npy
+    lower -- lower bound for a value in any dimension
+    upper -- upper bound for a value in any dimension
+    dimensions -- the number of dimensions in each point
+    point_count -- the total number of points to generate
+    cluster_count -- the number of distinct clusters to generate
+
+    Keyword arguments:
+    seed -- seeds the centroids, cluster sizes and every chunk of points
+    chunk_size -- the number of points generated at once
+    """
+
+    path = pathlib.Path(path)
+
+    path.mkdir(parents=True, exist_ok=True)
+
+    seed_sequence = np.random.SeedSequence(seed)
+
+    problem_seed, chunk_seed = seed_sequence.spawn(2)
+
+    problem_rng = np.random.default_rng(problem_seed)
+
+    # As in make_a_problem_space, each cluster is a contiguous run of points.
+    distributions = np.sort(
+        problem_rng.choice(point_count, size=cluster_count - 1, replace=False)
+    )
+
+    centroids = problem_rng.uniform(lower, upper, size=(cluster_count, dimensions)).astype(
+        np.float32
+    )
+
+    np.save(path / "centroids.npy", centroids)
+
+    points = np.lib.format.open_memmap(
+        path / "points.npy", mode="w+", dtype=np.float32, shape=(point_count, dimensions)
+    )
+
+    point_clusters = np.lib.format.open_memmap(
+        path / "point_clusters.npy", mode="w+", dtype=np.int32, shape=(point_count,)
+    )
+
+    chunk_count = -(-point_count // chunk_size)
+
+    for chunk_num, chunk_rng_seed in enumerate(chunk_seed.spawn(chunk_count)):
+
+        chunk_rng = np.random.default_rng(chunk_rng_seed)
+
+        start = chunk_num * chunk_size
+
+        stop = min(start + chunk_size, point_count)
+
+        chunk_clusters = np.searchsorted(distributions, np.arange(start, stop), side="right")
+
+        point_clusters[start:stop] = chunk_clusters
+
+        points[start:stop] = chunk_rng.normal(centroids[chunk_clusters], sigma)
+
+        log.log(DEBUG, "wrote points %s to %s of %s", start, stop, point_count)
+
+    points.flush()
+
+    point_clusters.flush()
+
+    del points, point_clusters
+
+    return load_a_problem_space(path)
+
+
+def load_a_problem_space(path):
+    """
+    Returns the (points, point_clusters, centroids) written to the directory
+    path by make_a_large_problem_space, as read only memory mapped arrays.
+    """
+
+    path = pathlib.Path(path)
+
+    return tuple(
+        np.load(path / f"{name}.npy", mmap_mode="r")
+        for name in ("points", "point_clusters", "centroids")
+    )
+
+def make_a_stream(lower, upper, sigma, dimensions, cluster_count, drift=0, rng=None, seed=None):
+    """
+    Make an endless stream of points for clustering, around centroids which
+    may drift as the stream goes on.
+
+    Returns a tuple (points, centroids) where points is an iterator and
+    centroids is the list of current centroids, which is updated in place.
+
+    Positional arguments:
+    lower -- lower bound for a starting centroid value in any dimension
+    upper -- upper bound for a starting centroid value in any dimension
+    dimensions -- the number of dimensions in each point
+    cluster_count -- the number of distinct clusters to generate
+
+    Keyword arguments:
+    drift -- sigma of the random walk of every centroid after each point
+    rng -- an instance of random.Random (optional)
+    seed -- seeds a new random.Random if no rng is given (optional)
+    """
+
+    if rng is None:
+
+        rng = random.Random(seed)
+
+    centroids = [
+        [rng.uniform(lower, upper) for d in range(dimensions)]
+        for cluster_num in range(cluster_count)
+    ]
+
+    def points():
+
+        while True:
+
+            centroid = rng.choice(centroids)
+
+            yield tuple(rng.gauss(x, sigma) for x in centroid)
+
+            if drift:
+
+                for centroid in centroids:
+
+                    centroid[:] = [rng.gauss(x, drift) for x in centroid]
+
+    return points(), centroids
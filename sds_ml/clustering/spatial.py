@@ -0,0 +1,228 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+
+class KDTree:
+    """
+    A k-d tree over a fixed set of points, for finding the points within a
+    threshold of a centroid without comparing the centroid to every point.
+
+    Distances are squared euclidean and a point is within the threshold if
+    its distance is strictly less, as in clustering.microtest with
+    clustering.euclid_squared.
+
+    The points are reordered so that every node of the tree covers a
+    contiguous range of them. A node whose bounding box is wholly within the
+    threshold is counted without visiting its points, and one wholly outside
+    is skipped, so a query only scans the points of leaves the threshold
+    boundary passes through.
+
+    points -- the points, reordered so each node covers a contiguous range
+    order -- the index of each reordered point in the original points
+    starts, stops -- the range of points covered by each node
+    lefts, rights -- the children of each node, -1 for a leaf
+    lower, upper -- the bounding box of each node's points
+    """
+
+    def __init__(self, points, leaf_size=32):
+
+        points = np.asarray(points, dtype=float)
+
+        self.order = np.arange(len(points))
+
+        self.starts = []
+        self.stops = []
+        self.lefts = []
+        self.rights = []
+        self.lower = []
+        self.upper = []
+
+        if len(points):
+
+            self.build(points, leaf_size)
+
+        self.points = points[self.order]
+
+        dimension_count = points.shape[1] if points.ndim == 2 else 0
+
+        self.lower = np.array(self.lower).reshape(len(self.starts), dimension_count)
+
+        self.upper = np.array(self.upper).reshape(len(self.starts), dimension_count)
+
+    def __len__(self):
+
+        return len(self.order)
+
+    def build(self, points, leaf_size):
+
+        stack = [(self.add_node(points, 0, len(points)), 0, len(points))]
+
+        while stack:
+
+            node_num, start, stop = stack.pop()
+
+            if stop - start <= leaf_size:
+
+                continue
+
+            # Split the widest dimension at its median.
+            dimension = int(np.argmax(self.upper[node_num] - self.lower[node_num]))
+
+            middle = (start + stop) // 2
+
+            indices = self.order[start:stop]
+
+            partition = np.argpartition(points[indices, dimension], middle - start)
+
+            self.order[start:stop] = indices[partition]
+
+            self.lefts[node_num] = self.add_node(points, start, middle)
+
+            self.rights[node_num] = self.add_node(points, middle, stop)
+
+            stack.append((self.lefts[node_num], start, middle))
+
+            stack.append((self.rights[node_num], middle, stop))
+
+    def add_node(self, points, start, stop):
+
+        node_points = points[self.order[start:stop]]
+
+        self.starts.append(start)
+        self.stops.append(stop)
+        self.lefts.append(-1)
+        self.rights.append(-1)
+        self.lower.append(node_points.min(axis=0))
+        self.upper.append(node_points.max(axis=0))
+
+        return len(self.starts) - 1
+
+    def nodes_within(self, centroid, threshold):
+        """
+        Yields (start, stop, inside) for ranges of points which may be within
+        threshold of centroid, where inside is true if every point of the
+        range is.
+        """
+
+        if not len(self):
+
+            return
+
+        centroid = np.asarray(centroid, dtype=float)
+
+        stack = [0]
+
+        while stack:
+
+            node_num = stack.pop()
+
+            lower = self.lower[node_num]
+
+            upper = self.upper[node_num]
+
+            nearest = np.maximum(lower - centroid, 0) + np.maximum(centroid - upper, 0)
+
+            if (nearest ** 2).sum() >= threshold:
+
+                continue
+
+            furthest = np.maximum(np.abs(centroid - lower), np.abs(upper - centroid))
+
+            if (furthest ** 2).sum() < threshold:
+
+                yield self.starts[node_num], self.stops[node_num], True
+
+            elif self.lefts[node_num] == -1:
+
+                yield self.starts[node_num], self.stops[node_num], False
+
+            else:
+
+                stack.append(self.rights[node_num])
+
+                stack.append(self.lefts[node_num])
+
+    def query(self, centroid, threshold):
+        """
+        Returns the indices, into the original points, of every point within
+        threshold of centroid.
+        """
+
+        found = []
+
+        for start, stop, inside in self.nodes_within(centroid, threshold):
+
+            if inside:
+
+                found.append(self.order[start:stop])
+
+            else:
+
+                distances = ((self.points[start:stop] - centroid) ** 2).sum(axis=1)
+
+                found.append(self.order[start:stop][distances < threshold])
+
+        if not found:
+
+            return np.zeros(0, dtype=int)
+
+        return np.concatenate(found)
+
+    def count(self, centroid, threshold):
+        """
+        Returns the number of points within threshold of centroid.
+        """
+
+        count = 0
+
+        for start, stop, inside in self.nodes_within(centroid, threshold):
+
+            if inside:
+
+                count += stop - start
+
+            else:
+
+                distances = ((self.points[start:stop] - centroid) ** 2).sum(axis=1)
+
+                count += int(np.count_nonzero(distances < threshold))
+
+        return count
+
+    def covered(self, hyp, threshold):
+        """
+        Returns the sorted indices of every point within threshold of any
+        centroid of a hypothesis, the points on which its microtest passes.
+        """
+
+        if not len(hyp):
+
+            return np.zeros(0, dtype=int)
+
+        return np.unique(np.concatenate([self.query(centroid, threshold) for centroid in hyp]))
+
+    def coverage(self, hyp, threshold):
+        """
+        Returns the proportion of points on which the microtest of a
+        hypothesis passes, its score.
+        """
+
+        if not len(self):
+
+            return 0
+
+        return len(self.covered(hyp, threshold)) / len(self)
+
+    def support(self, hyp, threshold):
+        """
+        Returns the number of points within threshold of each centroid of a
+        hypothesis.
+        """
+
+        return [self.count(centroid, threshold) for centroid in hyp]
@@ -0,0 +1,199 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import collections.abc
+import csv
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+
+class Reservoir(collections.abc.Sequence):
+    """
+    A fixed size random sample of a stream of points, from which test phase
+    points are chosen. Memory use is bounded by the capacity however many
+    points pass through.
+
+    An unbiased reservoir is a uniform sample of every point seen so far
+    (Vitter's algorithm R), which suits a stationary stream but follows drift
+    ever more slowly as the stream grows. A biased reservoir, once full,
+    replaces a random member with every new point, so the age of its members
+    is geometrically distributed with a mean of capacity points and the
+    sample follows clusters as they drift.
+
+    Being a Sequence, a reservoir can be passed as the points of
+    clustering.make_boolean_TM, where rng.choice picks from its current
+    contents, or of vectorised.make_vectorised_T.
+
+    Positional arguments:
+    capacity -- the most points to hold
+    dimension_count -- number of dimensions for each point
+
+    Keyword arguments:
+    rng -- an instance of random.Random (optional)
+    biased -- favour recent points to track drift (optional)
+    """
+
+    def __init__(self, capacity, dimension_count, rng=random, biased=False):
+
+        self.capacity = capacity
+
+        self.rng = rng
+
+        self.biased = biased
+
+        self.points = np.zeros((capacity, dimension_count))
+
+        self.size = 0
+
+        self.seen = 0
+
+    def __len__(self):
+
+        return self.size
+
+    def __getitem__(self, point_num):
+
+        if not -self.size <= point_num < self.size:
+
+            raise IndexError(point_num)
+
+        return tuple(self.points[point_num % self.size].tolist())
+
+    @property
+    def array(self):
+        """
+        The points currently held, as an array which is updated in place.
+        """
+
+        return self.points[: self.size]
+
+    def add(self, point):
+
+        self.seen += 1
+
+        if self.size < self.capacity:
+
+            point_num = self.size
+
+            self.size += 1
+
+        elif self.biased:
+
+            point_num = self.rng.randrange(self.capacity)
+
+        else:
+
+            point_num = self.rng.randrange(self.seen)
+
+            if point_num >= self.capacity:
+
+                return
+
+        self.points[point_num] = point
+
+
+class OnlineBounds(list):
+    """
+    The (min, max) of each dimension of every point seen so far, in the form
+    returned by clustering.get_bounds. Each bound is updated in place, so a DH
+    made with make_DH(bounds=...) always draws from the current bounds.
+    """
+
+    def __init__(self, dimension_count):
+
+        super().__init__([None, None] for dimension_num in range(dimension_count))
+
+    def add(self, point):
+
+        for feature, bound in zip(point, self):
+
+            lower, upper = bound
+
+            if lower is None or feature < lower:
+
+                bound[0] = feature
+
+            if upper is None or feature > upper:
+
+                bound[1] = feature
+
+
+class StreamSource:
+    """
+    Draws points from a possibly infinite iterator into a reservoir and
+    online bounds, a few at a time, so SDS can run while the data arrives.
+
+    Positional arguments:
+    points -- an iterator of n-dimensional points
+    dimension_count -- number of dimensions for each point
+
+    Keyword arguments:
+    capacity -- the size of the reservoir
+    rng -- an instance of random.Random (optional)
+    biased -- favour recent points to track drift (optional)
+    """
+
+    def __init__(self, points, dimension_count, capacity=1000, rng=random, biased=False):
+
+        self.iterator = iter(points)
+
+        self.reservoir = Reservoir(capacity, dimension_count, rng=rng, biased=biased)
+
+        self.bounds = OnlineBounds(dimension_count)
+
+        self.exhausted = False
+
+    def advance(self, point_count):
+        """
+        Reads up to point_count points from the stream, returning the number
+        read, which is less only once the stream is exhausted.
+        """
+
+        read_count = 0
+
+        for point in itertools.islice(self.iterator, point_count):
+
+            self.reservoir.add(point)
+
+            self.bounds.add(point)
+
+            read_count += 1
+
+        if read_count < point_count:
+
+            self.exhausted = True
+
+        return read_count
+
+
+def read_points(path):
+    """
+    Yields each row of a CSV file of numbers as a tuple of floats, reading the
+    file lazily.
+    """
+
+    with open(path, newline="") as point_file:
+
+        for row in csv.reader(point_file):
+
+            if row:
+
+                yield tuple(float(feature) for feature in row)
+
+
+def make_I_stream(I, source, points_per_iteration):
+    """
+    Returns a mode of iteration which reads points_per_iteration points from
+    the source before each iteration of I.
+    """
+
+    def I_stream():
+
+        source.advance(points_per_iteration)
+
+        I()
+
+    return I_stream
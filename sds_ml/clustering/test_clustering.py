@@ -1,7 +1,9 @@
 import collections, datetime, functools, itertools
 import json, logging, pathlib, random, re
 from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import tempfile
 import unittest
+import numpy as np
 import sds_ml.clustering as clustering
 import sds
 
@@ -89,6 +91,63 @@ class TestClustering(unittest.TestCase):
                     ", ".join([format(x, ".2f") for x in point]),
                 )
 
+    def test_make_large_problem_space(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+
+            params = dict(
+                lower=0,
+                upper=1,
+                sigma=0.01,
+                dimensions=3,
+                point_count=1000,
+                cluster_count=4,
+                seed=7,
+                chunk_size=300,
+            )
+
+            points, point_clusters, centroids = clustering.problem.make_a_large_problem_space(
+                pathlib.Path(directory) / "a", **params
+            )
+
+            self.assertEqual(points.shape, (1000, 3))
+
+            self.assertEqual(points.dtype, np.float32)
+
+            self.assertIsInstance(points, np.memmap)
+
+            # Each cluster is a contiguous run of points around its centroid.
+            self.assertTrue((np.diff(point_clusters) >= 0).all())
+
+            self.assertLess(np.abs(points - centroids[point_clusters]).max(), 0.1)
+
+            again = clustering.problem.make_a_large_problem_space(pathlib.Path(directory) / "b", **params)
+
+            for array, other in zip((points, point_clusters, centroids), again):
+
+                self.assertTrue(np.array_equal(array, other))
+
+            self.assertEqual(
+                clustering.clustering.get_bounds(points),
+                clustering.clustering.get_bounds(points.tolist()),
+            )
+
+            DH = clustering.clustering.make_DH(points=points, dimension_count=3, max_k=4, rng=self.rng)
+
+            TM = clustering.clustering.make_boolean_TM(
+                points=points,
+                dimension_count=3,
+                distance_metric=clustering.clustering.euclid_squared,
+                threshold=0.1,
+                rng=self.rng,
+            )
+
+            self.assertTrue(TM()(tuple(map(tuple, centroids.tolist()))))
+
+            log.info("large problem hyp %s", DH())
+
+            del points, point_clusters, centroids, again
+
     def test_get_bounds(self):
 
         points = [[-1, 0, 1], [0, 1, 0.5], [-0.5, 0.5, -1]]
@@ -157,3 +216,91 @@ class TestClustering(unittest.TestCase):
                 "testing %s and %s %s. Result: %0.3f", point, hyp_name, hyp, results
             )
 
+
+    def test_vectorised_T(self):
+
+        point = [1, 0, 0]
+
+        test_hyps = (
+            ("bad", ((0.5, 0.5, 0), (0.2, 1, 0))),
+            ("good", ((1, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0))),
+        )
+
+        for hyp_name, hyp in test_hyps:
+
+            swarm = sds.Swarm(swarm=[sds.Agent(hyp=hyp) for num in range(100)])
+
+            T = clustering.vectorised.make_vectorised_T(
+                points=[point],
+                dimension_count=len(point),
+                max_k=4,
+                threshold=0.1,
+                swarm=swarm,
+                rng=self.rng,
+            )
+
+            activity = T()
+
+            expected = clustering.clustering.microtest(
+                hyp=hyp,
+                point=point,
+                dimension_count=len(point),
+                distance_metric=clustering.clustering.euclid_squared,
+                threshold=0.1,
+                rng=self.rng,
+            )
+
+            self.assertEqual(len(activity), len(swarm))
+
+            self.assertTrue(all(agent.active == expected for agent in swarm))
+
+            log.info("testing %s and %s %s. Result: %s", point, hyp_name, hyp, expected)
+
+    def test_vectorised_activity(self):
+
+        points, point_clusters, centroids = clustering.problem.make_a_problem_space(
+            lower=0,
+            upper=1,
+            sigma=0.05,
+            dimensions=3,
+            point_count=100,
+            cluster_count=4,
+            rng=self.rng,
+        )
+
+        hyp = tuple(tuple(centroid) for centroid in centroids[:2])
+
+        repeats = 20000
+
+        swarm = sds.Swarm(swarm=[sds.Agent(hyp=hyp) for num in range(repeats)])
+
+        T = clustering.vectorised.make_vectorised_T(
+            points=points,
+            dimension_count=3,
+            max_k=8,
+            threshold=0.01,
+            swarm=swarm,
+            rng=self.rng,
+        )
+
+        vectorised_activity = T().mean()
+
+        expected_activity = sum(
+            clustering.clustering.microtest(
+                hyp=hyp,
+                point=point,
+                dimension_count=3,
+                distance_metric=clustering.clustering.euclid_squared,
+                threshold=0.01,
+                rng=self.rng,
+            )
+            for point in points
+        ) / len(points)
+
+        log.info(
+            "vectorised activity %.3f, expected activity %.3f",
+            vectorised_activity,
+            expected_activity,
+        )
+
+        self.assertAlmostEqual(vectorised_activity, expected_activity, delta=0.03)
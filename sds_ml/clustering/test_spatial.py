@@ -0,0 +1,95 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import unittest
+import numpy as np
+import sds_ml.clustering as clustering
+
+log = logging.getLogger(__name__)
+
+
+class TestSpatial(unittest.TestCase):
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    @classmethod
+    def setUpClass(cls):
+
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+
+        pass
+
+    def test_kd_tree(self):
+
+        for dimensions, point_count, leaf_size in ((3, 1000, 32), (2, 500, 1), (6, 300, 8), (3, 10, 32)):
+
+            points, point_clusters, centroids = clustering.problem.make_a_problem_space(
+                lower=0,
+                upper=1,
+                sigma=0.05,
+                dimensions=dimensions,
+                point_count=point_count,
+                cluster_count=4,
+                rng=self.rng,
+            )
+
+            index = clustering.spatial.KDTree(points, leaf_size=leaf_size)
+
+            self.assertEqual(len(index), point_count)
+
+            DH = clustering.clustering.make_DH(
+                points=points, dimension_count=dimensions, max_k=6, rng=self.rng
+            )
+
+            for threshold in (0.001, 0.01, 0.1, 10):
+
+                hyp = DH()
+
+                # Brute force with the microtest the index stands in for.
+                expected = [
+                    point_num
+                    for point_num, point in enumerate(points)
+                    if clustering.clustering.microtest(
+                        hyp=hyp,
+                        point=point,
+                        dimension_count=dimensions,
+                        distance_metric=clustering.clustering.euclid_squared,
+                        threshold=threshold,
+                    )
+                ]
+
+                self.assertEqual(index.covered(hyp, threshold).tolist(), expected)
+
+                self.assertAlmostEqual(index.coverage(hyp, threshold), len(expected) / point_count)
+
+                support = [
+                    sum(clustering.clustering.euclid_squared(centroid, point) < threshold for point in points)
+                    for centroid in hyp
+                ]
+
+                self.assertEqual(index.support(hyp, threshold), support)
+
+                self.assertEqual(
+                    sorted(index.query(hyp[0], threshold).tolist()),
+                    [
+                        point_num
+                        for point_num, point in enumerate(points)
+                        if clustering.clustering.euclid_squared(hyp[0], point) < threshold
+                    ],
+                )
+
+                log.info("threshold %s: coverage %.3f, support %s", threshold, len(expected) / point_count, support)
+
+        empty = clustering.spatial.KDTree([])
+
+        self.assertEqual(empty.coverage(((0.5, 0.5),), 0.1), 0)
+
+        self.assertEqual(empty.support(((0.5, 0.5),), 0.1), [0])
@@ -0,0 +1,157 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import tempfile
+import unittest
+import numpy as np
+import sds
+import sds_ml.clustering as clustering
+
+log = logging.getLogger(__name__)
+
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    @classmethod
+    def setUpClass(cls):
+
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+
+        pass
+
+    def test_reservoir(self):
+
+        point_count = 20000
+
+        capacity = 500
+
+        for biased in (False, True):
+
+            reservoir = clustering.stream.Reservoir(capacity, 1, rng=self.rng, biased=biased)
+
+            for point_num in range(point_count):
+
+                reservoir.add((point_num,))
+
+            self.assertEqual(len(reservoir), capacity)
+
+            self.assertEqual(reservoir.seen, point_count)
+
+            self.assertEqual(reservoir.points.shape, (capacity, 1))
+
+            mean_age = point_count - reservoir.array.mean()
+
+            log.info("biased %s: mean age %.0f", biased, mean_age)
+
+            if biased:
+
+                # Geometric ages with a mean of the capacity.
+                self.assertLess(mean_age, capacity * 1.5)
+
+            else:
+
+                # A uniform sample of everything seen.
+                self.assertAlmostEqual(mean_age / point_count, 0.5, delta=0.05)
+
+        self.assertEqual(reservoir[-1], reservoir[capacity - 1])
+
+        self.assertIsInstance(self.rng.choice(reservoir), tuple)
+
+        with self.assertRaises(IndexError):
+
+            reservoir[capacity]
+
+    def test_stream_source(self):
+
+        points, point_clusters, centroids = clustering.problem.make_a_problem_space(
+            lower=0,
+            upper=1,
+            sigma=0.05,
+            dimensions=3,
+            point_count=300,
+            cluster_count=4,
+            rng=self.rng,
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+
+            path = pathlib.Path(directory) / "points.csv"
+
+            path.write_text("\n".join(",".join(repr(x) for x in point) for point in points) + "\n")
+
+            source = clustering.stream.StreamSource(
+                clustering.stream.read_points(path), dimension_count=3, capacity=100, rng=self.rng
+            )
+
+            self.assertEqual(source.advance(250), 250)
+
+            self.assertFalse(source.exhausted)
+
+            self.assertEqual(source.advance(250), 50)
+
+            self.assertTrue(source.exhausted)
+
+        self.assertEqual(source.bounds, clustering.clustering.get_bounds(points))
+
+        self.assertEqual(len(source.reservoir), 100)
+
+        self.assertTrue(set(source.reservoir) <= set(points))
+
+        DH = clustering.clustering.make_DH(
+            points=None, dimension_count=3, max_k=4, rng=self.rng, bounds=source.bounds
+        )
+
+        for hyp in (DH() for hyp_num in range(100)):
+
+            for centroid in hyp:
+
+                for x, (lower, upper) in zip(centroid, source.bounds):
+
+                    self.assertTrue(lower <= x <= upper)
+
+    def test_streaming_tests(self):
+
+        source = clustering.stream.StreamSource(
+            itertools.repeat((0.0, 0.0)), dimension_count=2, capacity=10, rng=self.rng, biased=True
+        )
+
+        TM = clustering.clustering.make_boolean_TM(
+            points=source.reservoir,
+            dimension_count=2,
+            distance_metric=clustering.clustering.euclid_squared,
+            threshold=0.1,
+            rng=self.rng,
+        )
+
+        hyp = ((0.0, 0.0),)
+
+        swarm = sds.Swarm(swarm=[sds.Agent(hyp=hyp) for num in range(10)])
+
+        T = clustering.vectorised.make_vectorised_T(
+            points=source.reservoir, dimension_count=2, max_k=1, threshold=0.1, swarm=swarm, rng=self.rng
+        )
+
+        source.advance(5)
+
+        self.assertTrue(TM()(hyp))
+
+        self.assertTrue(T().all())
+
+        # The tests follow the stream as it moves away from the hypothesis.
+        source.iterator = itertools.repeat((1.0, 1.0))
+
+        source.advance(1000)
+
+        self.assertFalse(TM()(hyp))
+
+        self.assertFalse(T().any())
@@ -0,0 +1,169 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds_ml.clustering.stream
+import sds_ml.swarm
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+
+def pack_hyps(hyps, dimension_count, max_k):
+    """
+    Packs a sequence of hypotheses into a padded array of centroids.
+
+    Returns a tuple (centroids, k_mask) where centroids has the shape
+    (len(hyps), max_k, dimension_count) and k_mask is a boolean array of shape
+    (len(hyps), max_k) which is true for each centroid which is part of the
+    hypothesis rather than padding.
+
+    Positional arguments:
+    hyps -- a sequence of hypotheses, as returned by make_DH
+    dimension_count -- number of dimensions for each point
+    max_k -- the maximum number of centroids in a hypothesis
+    """
+
+    centroids = np.zeros((len(hyps), max_k, dimension_count))
+
+    k_mask = np.zeros((len(hyps), max_k), dtype=bool)
+
+    for hyp_num, hyp in enumerate(hyps):
+
+        k = len(hyp)
+
+        centroids[hyp_num, :k] = hyp
+
+        k_mask[hyp_num, :k] = True
+
+    return centroids, k_mask
+
+
+def batch_microtest(centroids, k_mask, points, threshold):
+    """
+    Returns a boolean activity vector, one element per hypothesis, which is
+    true if the hypothesis has any centroid within the threshold squared
+    euclidean distance of its point. This is the batched equivalent of calling
+    clustering.microtest with clustering.euclid_squared once per hypothesis.
+
+    Positional arguments:
+    centroids -- array of shape (agent_count, max_k, dimension_count)
+    k_mask -- boolean array of shape (agent_count, max_k)
+    points -- array of shape (agent_count, dimension_count)
+    threshold -- maximum acceptable distance
+    """
+
+    distances = ((centroids - points[:, np.newaxis, :]) ** 2).sum(axis=2)
+
+    return ((distances < threshold) & k_mask).any(axis=1)
+
+
+def make_vectorised_T(points, dimension_count, max_k, threshold, swarm, rng=random):
+    """
+    Returns a function which has no arguments and tests every agent in the
+    swarm in one batch. Each agent is tested against its own uniformly chosen
+    point, exactly as with make_boolean_TM and sds.T_boolean. The activity of
+    each agent is updated and the activity vector is returned.
+
+    Only the squared euclidean distance metric is supported.
+
+    Positional arguments:
+    points -- all points in the dataset, or a stream.Reservoir whose current
+              contents are tested against
+    dimension_count -- number of dimensions for each point
+    max_k -- the maximum number of centroids in a hypothesis
+    threshold -- maximum acceptable distance
+    swarm -- the swarm to test, either an sds.Swarm or an
+    sds_ml.swarm.ArraySwarm
+
+    Keyword arguments:
+    rng -- an instance of random.Random (optional), used to seed the batch
+    random number generator
+    """
+
+    streaming = isinstance(points, sds_ml.clustering.stream.Reservoir)
+
+    # An array, perhaps memory mapped, is used as it is rather than copied.
+    if streaming:
+
+        point_array = None
+
+    elif isinstance(points, np.ndarray):
+
+        point_array = points
+
+    else:
+
+        point_array = np.asarray(points, dtype=float)
+
+    batch_rng = np.random.default_rng(rng.getrandbits(64))
+
+    def T():
+        """
+        Tests all agents and returns the resulting activity vector.
+        """
+
+        # Pack each distinct hypothesis once, then gather a row per agent.
+        if isinstance(swarm, sds_ml.swarm.ArraySwarm):
+
+            table_nums, hyp_nums = np.unique(swarm.hyp_nums, return_inverse=True)
+
+            distinct_hyps = [swarm.hyps[table_num] for table_num in table_nums.tolist()]
+
+        else:
+
+            hyp2num = {}
+
+            hyp_nums = np.fromiter(
+                (hyp2num.setdefault(agent.hyp, len(hyp2num)) for agent in swarm),
+                dtype=np.intp,
+                count=len(swarm),
+            )
+
+            distinct_hyps = tuple(hyp2num)
+
+        centroids, k_mask = pack_hyps(distinct_hyps, dimension_count, max_k)
+
+        test_points = points.array if streaming else point_array
+
+        point_nums = batch_rng.integers(len(test_points), size=len(swarm))
+
+        activity = batch_microtest(
+            centroids=centroids[hyp_nums],
+            k_mask=k_mask[hyp_nums],
+            points=test_points[point_nums],
+            threshold=threshold,
+        )
+
+        if isinstance(swarm, sds_ml.swarm.ArraySwarm):
+
+            swarm.update(slice(None), active=activity)
+
+        else:
+
+            for agent, active in zip(swarm, activity.tolist()):
+
+                agent.active = active
+
+        return activity
+
+    return T
+
+
+def I_vectorised(D, T, swarm):
+    """
+    Synchronous iteration where diffusion is performed agent by agent and
+    testing is performed for the whole swarm at once by a T as returned by
+    make_vectorised_T.
+    """
+
+    def I():
+
+        for agent in swarm:
+
+            D(agent)
+
+        T()
+
+    return I
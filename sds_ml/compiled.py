@@ -0,0 +1,224 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import operator
+import numpy as np
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+operator2sign = {
+    operator.lt: -1,
+    operator.gt: 1,
+}
+
+sign2symbol = {
+    -1: "<",
+    1: ">",
+}
+
+max_cached_hyps = 2 ** 16
+
+
+def is_plane(item):
+
+    return hasattr(item, "dimension") and hasattr(item, "threshold")
+
+
+def hyp_groups(hyp, set_type="union"):
+    """
+    Returns a hypothesis as a union of intersections, a tuple of tuples of
+    (dimension, sign, threshold) tuples where sign is 1 for operator.gt and -1
+    for operator.lt. Both the planes and the intersections are sorted, so
+    structurally equal hypotheses give equal results.
+
+    A hypothesis may be a single DimensionThreshold or Plane, a set of them
+    (as returned by DH_plane_union) which is treated as a union or an
+    intersection according to set_type, or a set of sets of them (as returned
+    by DH_data_driven) which is always a union of intersections.
+    """
+
+    def plane_key(plane):
+
+        return (plane.dimension, operator2sign[plane.operator], plane.threshold)
+
+    if is_plane(hyp):
+
+        return ((plane_key(hyp),),)
+
+    members = tuple(hyp)
+
+    if all(is_plane(member) for member in members):
+
+        planes = sorted(plane_key(plane) for plane in members)
+
+        if set_type == "union":
+
+            return tuple((plane,) for plane in planes)
+
+        elif set_type == "intersection":
+
+            return (tuple(planes),)
+
+        else:
+
+            raise ValueError(f"Unknown set type {set_type!r}")
+
+    return tuple(
+        sorted(
+            tuple(sorted(plane_key(plane) for plane in intersection))
+            for intersection in members
+        )
+    )
+
+
+class CompiledHyp:
+    """
+    A union of intersections of planes flattened into arrays.
+
+    columns -- the dataset column tested by each plane
+    thresholds -- the threshold of each plane
+    signs -- 1 where a plane tests greater than, -1 where it tests less than
+    offsets -- the index of the first plane of each intersection
+
+    Calling a CompiledHyp with a row evaluates it with a generated function
+    holding one inline comparison per plane, evaluate_columns evaluates it
+    against a whole column-major dataset at once.
+    """
+
+    __slots__ = ("groups", "columns", "thresholds", "signs", "offsets", "row_test")
+
+    def __init__(self, groups):
+
+        self.groups = groups
+
+        planes = [plane for group in groups for plane in group]
+
+        self.columns = np.array([plane[0] for plane in planes], dtype=np.intp)
+
+        self.signs = np.array([plane[1] for plane in planes], dtype=np.int8)
+
+        self.thresholds = np.array([plane[2] for plane in planes], dtype=float)
+
+        self.offsets = np.cumsum([0] + [len(group) for group in groups[:-1]], dtype=np.intp)
+
+        self.row_test = self.make_row_test(groups)
+
+    @staticmethod
+    def make_row_test(groups):
+
+        if any(len(group) == 0 for group in groups):
+
+            return lambda row: True
+
+        threshold_num = itertools.count()
+
+        intersections = [
+            " and ".join(
+                f"row[{dimension}] {sign2symbol[sign]} t[{next(threshold_num)}]"
+                for dimension, sign, threshold in group
+            )
+            for group in groups
+        ]
+
+        source = " or ".join(f"({intersection})" for intersection in intersections)
+
+        test = eval(f"lambda row, t: bool({source or 'False'})")
+
+        thresholds = tuple(plane[2] for group in groups for plane in group)
+
+        return functools.partial(test, t=thresholds)
+
+    def __call__(self, row):
+
+        return self.row_test(row)
+
+    def evaluate_columns(self, columns):
+        """
+        Returns a boolean array with one element per row of the dataset.
+
+        columns -- a column-major dataset, a 2-D array with one row per column
+        """
+
+        columns = np.asarray(columns)
+
+        row_count = columns.shape[1]
+
+        if not self.groups:
+
+            return np.zeros(row_count, dtype=bool)
+
+        if any(len(group) == 0 for group in self.groups):
+
+            return np.ones(row_count, dtype=bool)
+
+        values = columns[self.columns]
+
+        thresholds = self.thresholds[:, np.newaxis]
+
+        tests = np.where(
+            self.signs[:, np.newaxis] > 0, values > thresholds, values < thresholds
+        )
+
+        return np.logical_and.reduceat(tests, self.offsets, axis=0).any(axis=0)
+
+    def evaluate_rows(self, rows):
+        """
+        Returns a boolean array with one element per row.
+        """
+
+        return self.evaluate_columns(np.asarray(rows, dtype=float).T)
+
+    def __str__(self):
+
+        return " OR ".join(
+            "("
+            + " AND ".join(
+                f"X[{dimension}] {sign2symbol[sign]} {threshold:g}"
+                for dimension, sign, threshold in group
+            )
+            + ")"
+            for group in self.groups
+        )
+
+
+@functools.lru_cache(maxsize=max_cached_hyps)
+def compile_groups(groups):
+
+    return CompiledHyp(groups)
+
+
+# Maps id(hyp) to (hyp, set_type, compiled). Holding the hypothesis keeps its id
+# from being reused while it is cached.
+id2compiled = {}
+
+
+def compile_hyp(hyp, set_type="union"):
+    """
+    Returns the CompiledHyp for a hypothesis. Compiled forms are memoised both
+    by hypothesis object, so agents sharing a hypothesis share one lookup, and
+    by structure, so equal hypotheses built separately share one compilation.
+    """
+
+    try:
+
+        cached_hyp, cached_set_type, compiled = id2compiled[id(hyp)]
+
+        if cached_hyp is hyp and cached_set_type == set_type:
+
+            return compiled
+
+    except KeyError:
+
+        pass
+
+    compiled = compile_groups(hyp_groups(hyp, set_type=set_type))
+
+    if len(id2compiled) >= max_cached_hyps:
+
+        id2compiled.clear()
+
+    id2compiled[id(hyp)] = (hyp, set_type, compiled)
+
+    return compiled
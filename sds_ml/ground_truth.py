@@ -0,0 +1,322 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import argparse
+import csv
+import io
+import multiprocessing
+import time
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds_ml.tree_search as tree_search
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+Row = collections.namedtuple("Row", ("depth", "branch_count", "split", "count", "best_score", "seconds", "cpu_seconds"))
+
+chunk_size = 2 ** 20
+
+
+@functools.lru_cache(maxsize=4)
+def build_tree(depth, branch_count, seed):
+    """
+    Returns the tree for a configuration. The data depends only on the seed
+    and the shape, so every worker builds the same tree.
+    """
+
+    rng = random.Random(f"{seed}:{depth}:{branch_count}")
+
+    return tree_search.build_tree(depth=depth, branch_count=branch_count, data_f=lambda node: rng.random())
+
+
+def subtree_stats(node, split_num):
+    """
+    Returns arrays of the leaf value sum and leaf count of every subtree of
+    node, in the order of get_subtrees.
+    """
+
+    sums = [np.array([node.data])]
+
+    counts = [np.array([1])]
+
+    for child_combination in itertools.combinations(node.children, split_num):
+
+        child_sums, child_counts = fold([subtree_stats(child, split_num) for child in child_combination])
+
+        sums.append(child_sums)
+
+        counts.append(child_counts)
+
+    return np.concatenate(sums), np.concatenate(counts)
+
+
+def fold(stats):
+    """
+    Returns the sums and counts of every combination of one subtree from each
+    of stats, in the order of itertools.product.
+    """
+
+    sums, counts = stats[0]
+
+    for other_sums, other_counts in stats[1:]:
+
+        sums = (sums[:, None] + other_sums[None, :]).ravel()
+
+        counts = (counts[:, None] + other_counts[None, :]).ravel()
+
+    return sums, counts
+
+
+def product_best(stats):
+    """
+    Returns (count, best mean) over every combination of one subtree from each
+    of stats, without holding many more than chunk_size combinations at once.
+
+    The trailing stats are folded into one block of at most chunk_size, or the
+    last alone if it is larger, which is scored at once for each combination
+    of the leading stats in turn.
+    """
+
+    split = len(stats) - 1
+
+    block_size = len(stats[-1][0])
+
+    while split > 0 and block_size * len(stats[split - 1][0]) <= chunk_size:
+
+        split -= 1
+
+        block_size *= len(stats[split][0])
+
+    block_sums, block_counts = fold(stats[split:])
+
+    count = 0
+
+    best = -np.inf
+
+    for prefix in itertools.product(*(zip(*stat) for stat in stats[:split])):
+
+        prefix_sum = sum(subtree_sum for subtree_sum, subtree_count in prefix)
+
+        prefix_count = sum(subtree_count for subtree_sum, subtree_count in prefix)
+
+        scores = (prefix_sum + block_sums) / (prefix_count + block_counts)
+
+        count += len(scores)
+
+        best = max(best, float(scores.max()))
+
+    return count, best
+
+
+def evaluate_combination(task):
+    """
+    Scores every subtree which splits the root into one combination of its
+    children, returning (task, count, best mean, started, seconds), where
+    started is the time.time the task began. Runs in a worker process.
+    """
+
+    started = time.time()
+
+    start = time.perf_counter()
+
+    depth, branch_count, split_num, seed, combination = task
+
+    tree = build_tree(depth, branch_count, seed)
+
+    stats = [subtree_stats(tree.children[child_num], split_num) for child_num in combination]
+
+    count, best = product_best(stats)
+
+    return task, count, best, started, time.perf_counter() - start
+
+
+def table(configurations, seed=0, processes=None, max_subtrees=None):
+    """
+    Yields a Row for each (depth, branch count, split) configuration, found by
+    scoring every subtree of a tree with random data.
+
+    The subtrees of each configuration are partitioned by the combination of
+    the root's children they split into, one task per combination, and the
+    tasks of every configuration share a process pool. Each task streams
+    through its subtrees keeping only the count and best score. The seconds
+    of a Row are the wall time from when its first task started to when its
+    last result arrived, its cpu_seconds the total time its tasks took across
+    every worker.
+
+    Keyword arguments:
+    seed -- seeds the data of every tree
+    processes -- the number of worker processes, all cores if None, no pool if 1
+    max_subtrees -- configurations with more subtrees are skipped (optional)
+    """
+
+    tasks = []
+
+    remaining = {}
+
+    for depth, branch_count, split_num in configurations:
+
+        tree = build_tree(depth, branch_count, seed)
+
+        subtree_count = tree_search.count_subtrees(tree, split_num=split_num)
+
+        if max_subtrees is not None and subtree_count > max_subtrees:
+
+            log.warning("skipping depth %s, branch count %s, split %s: %s subtrees", depth, branch_count, split_num, subtree_count)
+
+            continue
+
+        combinations = list(itertools.combinations(range(len(tree.children)), split_num))
+
+        remaining[(depth, branch_count, split_num)] = dict(
+            tasks=len(combinations),
+            count=1,
+            best_score=tree.data,
+            started=None,
+            cpu_seconds=0.0,
+        )
+
+        tasks.extend((depth, branch_count, split_num, seed, combination) for combination in combinations)
+
+    for configuration, state in list(remaining.items()):
+
+        if not state["tasks"]:
+
+            del remaining[configuration]
+
+            yield Row(*configuration, count=state["count"], best_score=state["best_score"], seconds=0.0, cpu_seconds=0.0)
+
+    if processes == 1:
+
+        results = map(evaluate_combination, tasks)
+
+        pool = None
+
+    else:
+
+        pool = multiprocessing.Pool(processes)
+
+        results = pool.imap_unordered(evaluate_combination, tasks)
+
+    try:
+
+        for task, count, best, started, seconds in results:
+
+            configuration = task[:3]
+
+            state = remaining[configuration]
+
+            state["tasks"] -= 1
+
+            state["count"] += count
+
+            state["best_score"] = max(state["best_score"], best)
+
+            state["started"] = started if state["started"] is None else min(state["started"], started)
+
+            state["cpu_seconds"] += seconds
+
+            if not state["tasks"]:
+
+                del remaining[configuration]
+
+                yield Row(
+                    *configuration,
+                    count=state["count"],
+                    best_score=state["best_score"],
+                    seconds=time.time() - state["started"],
+                    cpu_seconds=state["cpu_seconds"],
+                )
+
+    finally:
+
+        if pool is not None:
+
+            pool.terminate()
+
+
+def write_table(rows, output, format):
+
+    if format == "json":
+
+        output.write(json.dumps([row._asdict() for row in rows], indent=2))
+
+        output.write("\n")
+
+    else:
+
+        writer = csv.writer(output)
+
+        writer.writerow(Row._fields)
+
+        writer.writerows(rows)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Score every subtree of random trees to tabulate subtree counts and best scores")
+
+    parser.add_argument("--depths", type=int, nargs="+", default=[3, 4], help="Tree depths")
+
+    parser.add_argument("--branch-counts", type=int, nargs="+", default=[2, 3, 4, 5], help="Branch counts")
+
+    parser.add_argument("--splits", type=int, nargs="+", default=None, help="Splits, every split up to the branch count if not given")
+
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the tree data")
+
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes")
+
+    parser.add_argument("--max-subtrees", type=int, default=10 ** 10, help="Skip configurations with more subtrees")
+
+    parser.add_argument("--format", choices=("csv", "json"), default=None, help="Output format, from the output suffix if not given")
+
+    parser.add_argument("--output", type=pathlib.Path, default=None, help="Write the table to this file instead of stdout")
+
+    args = parser.parse_args()
+
+    configurations = [
+        (depth, branch_count, split_num)
+        for depth, branch_count in itertools.product(args.depths, args.branch_counts)
+        for split_num in (args.splits or range(1, branch_count + 1))
+        if split_num <= branch_count
+    ]
+
+    format = args.format or ("json" if args.output is not None and args.output.suffix == ".json" else "csv")
+
+    rows = []
+
+    for row in table(configurations, seed=args.seed, processes=args.processes, max_subtrees=args.max_subtrees):
+
+        log.info("%s", ", ".join(f"{name}: {value}" for name, value in row._asdict().items()))
+
+        rows.append(row)
+
+    rows.sort()
+
+    if args.output is None:
+
+        output = io.StringIO()
+
+        write_table(rows, output, format)
+
+        print(output.getvalue(), end="")
+
+    else:
+
+        with args.output.open("w", newline="") as output:
+
+            write_table(rows, output, format)
+
+        log.info("wrote %s", args.output)
+
+
+if __name__ == "__main__":
+
+    logging.basicConfig(
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        format="%(asctime)s %(levelname)-4s %(name)s %(message)s",
+        style="%",
+    )
+
+    main()
@@ -0,0 +1,518 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import argparse
+import gc
+import multiprocessing
+import multiprocessing.shared_memory
+import time
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds
+import sds.variants
+import sds_ml.clustering.clustering
+import sds_ml.clustering.problem
+import sds_ml.clustering.vectorised
+import sds_ml.pima
+import sds_ml.pima.evaluation
+import sds_ml.pima.pima
+import sds_ml.seeding
+import sds_ml.swarm
+import sds_ml.variants
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+ShardReport = collections.namedtuple(
+    "ShardReport",
+    ("shard_num", "clusters", "sample", "agent_iterations", "seconds"),
+)
+
+
+class PollingSwarm:
+    """
+    What a shard's diffusion polls. Most polls land on an agent of the local
+    swarm, but with probability cross_shard_rate a poll lands on an agent
+    sampled from the other shards at the start of the epoch.
+    """
+
+    def __init__(self, swarm, cross_shard_rate, rng):
+
+        self.swarm = swarm
+        self.cross_shard_rate = cross_shard_rate
+        self.rng = rng
+        self.foreign = []
+
+    def __len__(self):
+
+        return len(self.swarm)
+
+    def __getitem__(self, num):
+
+        if self.foreign and self.rng.random() < self.cross_shard_rate:
+
+            return self.rng.choice(self.foreign)
+
+        return self.swarm[num]
+
+
+def build_basic(data, swarm, polling, rng, max_k=8, threshold=0.1):
+
+    dimension_count = data.shape[1]
+
+    DH = sds_ml.clustering.clustering.make_DH(
+        points=data.tolist(), dimension_count=dimension_count, max_k=max_k, rng=rng
+    )
+
+    D = sds.D_passive(DH, polling, rng)
+
+    T = sds_ml.clustering.vectorised.make_vectorised_T(
+        points=data,
+        dimension_count=dimension_count,
+        max_k=max_k,
+        threshold=threshold,
+        swarm=swarm,
+        rng=rng,
+    )
+
+    return sds_ml.clustering.vectorised.I_vectorised(D, T, swarm)
+
+
+def build_threshold(data, swarm, polling, rng):
+
+    dataset = sds_ml.pima.Rows(data)
+
+    evaluator = sds_ml.pima.evaluation.Evaluator(data)
+
+    DH = sds_ml.variants.DH_plane(dataset=dataset, rng=rng, index=evaluator.index)
+
+    D = sds.D_passive(DH=DH, swarm=polling, rng=rng)
+
+    T = sds.T_boolean(TM=evaluator.TM(rng=rng))
+
+    return sds.I_sync(D=D, T=T, swarm=swarm)
+
+
+def build_plane_set(data, swarm, polling, rng, set_type):
+
+    dataset = sds_ml.pima.Rows(data)
+
+    evaluator = sds_ml.pima.evaluation.Evaluator(data)
+
+    DH = sds_ml.variants.DH_plane_union(dataset=dataset, rng=rng, index=evaluator.index)
+
+    D = sds_ml.pima.pima.D_dimension_operator_sensitive(DH=DH, swarm=polling, rng=rng)
+
+    TM = evaluator.TM(rng=rng, set_type=set_type)
+
+    T = sds.T_boolean(TM=TM)
+
+    return sds.I_sync(D=D, T=T, swarm=swarm)
+
+
+def build_data_driven(data, swarm, polling, rng):
+
+    dataset = sds_ml.pima.Rows(data)
+
+    evaluator = sds_ml.pima.evaluation.Evaluator(data)
+
+    DH = sds_ml.variants.DH_data_driven(dataset=dataset, swarm=polling, rng=rng, index=evaluator.index)
+
+    D = sds.variants.D_context_sensitive(DH=DH, swarm=polling, rng=rng)
+
+    T = sds.T_boolean(TM=evaluator.TM(rng=rng))
+
+    return sds.I_sync(D=D, T=T, swarm=swarm)
+
+
+name2builder = {
+    "basic": build_basic,
+    "threshold": build_threshold,
+    "union": functools.partial(build_plane_set, set_type="union"),
+    "intersection": functools.partial(build_plane_set, set_type="intersection"),
+    "data_driven": build_data_driven,
+}
+
+
+def load_data(name, rng):
+    """
+    Returns the dataset for an example as a NumPy array. The clustering
+    example gets points with one row per point, the PIMA examples get the
+    column-major dataset.
+    """
+
+    if name == "basic":
+
+        points, point_clusters, centroids = sds_ml.clustering.problem.make_a_problem_space(
+            lower=0,
+            upper=1,
+            sigma=0.05,
+            dimensions=3,
+            point_count=100,
+            cluster_count=4,
+            rng=rng,
+        )
+
+        return np.array(points)
+
+    else:
+
+        return np.array(sds_ml.pima.load_columns())
+
+
+def run_shard(connection, name, data, agent_count, cross_shard_rate, report_clusters, sample_size, seed):
+
+    rng = random.Random(seed)
+
+    swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
+
+    polling = PollingSwarm(swarm=swarm, cross_shard_rate=cross_shard_rate, rng=rng)
+
+    I = name2builder[name](data=data, swarm=swarm, polling=polling, rng=rng)
+
+    while True:
+
+        message = connection.recv()
+
+        if message[0] == "stop":
+
+            return
+
+        command, iterations, foreign = message
+
+        # Hypotheses arrive as copies, interning makes them the local objects.
+        polling.foreign = [
+            sds.Agent(
+                active=active,
+                hyp=sds_ml.variants.hyp_table.intern(hyp) if isinstance(hyp, sds_ml.variants.IndexSet) else hyp,
+            )
+            for active, hyp in foreign
+        ]
+
+        start = time.perf_counter()
+
+        for iteration in range(iterations):
+
+            I()
+
+        seconds = time.perf_counter() - start
+
+        sample = [
+            (swarm[agent_num].active, swarm[agent_num].hyp)
+            for agent_num in rng.sample(range(len(swarm)), min(sample_size, len(swarm)))
+        ]
+
+        connection.send(
+            ShardReport(
+                shard_num=None,
+                clusters=swarm.clusters.most_common(report_clusters),
+                sample=sample,
+                agent_iterations=iterations * len(swarm),
+                seconds=seconds,
+            )
+        )
+
+
+def shard_worker(connection, shm_name, shape, dtype, **kwargs):
+    """
+    Runs one shard in its own process against the dataset in shared memory.
+    The shard is driven by ("run", iterations, foreign) messages until it is
+    sent ("stop",).
+    """
+
+    shm = multiprocessing.shared_memory.SharedMemory(name=shm_name)
+
+    try:
+
+        run_shard(
+            connection=connection,
+            data=np.ndarray(shape, dtype=dtype, buffer=shm.buf),
+            **kwargs,
+        )
+
+    finally:
+
+        # Everything built on the shared array must be gone before closing.
+        gc.collect()
+
+        shm.close()
+
+
+def run(name, shard_count, agent_count, epochs, iterations_per_epoch, cross_shard_rate=0.05, report_clusters=5, sample_size=100, seed=None, report=None):
+    """
+    Runs an example with its swarm split into shards, one process per shard.
+
+    Each epoch every shard runs iterations_per_epoch iterations on its own,
+    then reports its largest clusters and a sample of its agents. The samples
+    of the other shards are what a shard polls across shards in the next
+    epoch, with probability cross_shard_rate per poll.
+
+    Returns the merged clusters of the final epoch, the agent-iterations per
+    second achieved by each worker across the run and the seed, which is
+    drawn afresh if none is given so the run can be repeated.
+
+    Positional arguments:
+    name -- one of name2builder
+    shard_count -- the number of worker processes
+    agent_count -- the total number of agents, split evenly across shards
+    epochs -- the number of times to synchronise shards
+    iterations_per_epoch -- iterations each shard runs between synchronising
+
+    Keyword arguments:
+    cross_shard_rate -- the probability that a poll goes to another shard
+    report_clusters -- the number of clusters each shard reports
+    sample_size -- the number of agents each shard shares with the others
+    seed -- seeds the dataset, and each shard with its own independent stream
+            derived from it (optional)
+    report -- called with (epoch, clusters, shard_reports) after each epoch
+
+    Raises RuntimeError if a shard's worker exits before the run is over.
+    """
+
+    seed = sds_ml.seeding.make_seed(seed)
+
+    rng = random.Random(seed)
+
+    shard_seeds = sds_ml.seeding.spawn_seeds(seed, shard_count)
+
+    data = np.ascontiguousarray(load_data(name, rng))
+
+    shm = multiprocessing.shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+
+    processes = []
+
+    connections = []
+
+    try:
+
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[...] = data
+
+        shard_agent_counts = [
+            agent_count // shard_count + (shard_num < agent_count % shard_count)
+            for shard_num in range(shard_count)
+        ]
+
+        for shard_num, shard_agent_count in enumerate(shard_agent_counts):
+
+            parent_connection, child_connection = multiprocessing.Pipe()
+
+            process = multiprocessing.Process(
+                target=shard_worker,
+                kwargs=dict(
+                    connection=child_connection,
+                    name=name,
+                    shm_name=shm.name,
+                    shape=data.shape,
+                    dtype=data.dtype,
+                    agent_count=shard_agent_count,
+                    cross_shard_rate=cross_shard_rate,
+                    report_clusters=report_clusters,
+                    sample_size=sample_size,
+                    seed=shard_seeds[shard_num],
+                ),
+                daemon=True,
+            )
+
+            process.start()
+
+            # Only the worker may hold the child end, so the pipe reaches EOF
+            # if the worker dies.
+            child_connection.close()
+
+            processes.append(process)
+
+            connections.append(parent_connection)
+
+        def failed(shard_num):
+
+            processes[shard_num].join(timeout=1)
+
+            return RuntimeError(f"shard {shard_num} of {name} exited with code {processes[shard_num].exitcode}")
+
+        def send(shard_num, message):
+
+            try:
+
+                connections[shard_num].send(message)
+
+            except (BrokenPipeError, ConnectionResetError) as error:
+
+                raise failed(shard_num) from error
+
+        def recv(shard_num):
+
+            try:
+
+                return connections[shard_num].recv()
+
+            except (EOFError, ConnectionResetError) as error:
+
+                raise failed(shard_num) from error
+
+        samples = [[] for shard_num in range(shard_count)]
+
+        agent_iterations = [0] * shard_count
+
+        seconds = [0.0] * shard_count
+
+        clusters = collections.Counter()
+
+        for epoch in range(1, epochs + 1):
+
+            for shard_num, connection in enumerate(connections):
+
+                foreign = [
+                    agent
+                    for other_num, sample in enumerate(samples)
+                    if other_num != shard_num
+                    for agent in sample
+                ]
+
+                send(shard_num, ("run", iterations_per_epoch, foreign))
+
+            shard_reports = [
+                recv(shard_num)._replace(shard_num=shard_num)
+                for shard_num in range(shard_count)
+            ]
+
+            clusters = collections.Counter()
+
+            for shard_report in shard_reports:
+
+                for hyp, size in shard_report.clusters:
+
+                    clusters[hyp] += size
+
+                samples[shard_report.shard_num] = shard_report.sample
+
+                agent_iterations[shard_report.shard_num] += shard_report.agent_iterations
+
+                seconds[shard_report.shard_num] += shard_report.seconds
+
+            if report is not None:
+
+                report(epoch, clusters, shard_reports)
+
+        for shard_num in range(shard_count):
+
+            send(shard_num, ("stop",))
+
+        for process in processes:
+
+            process.join()
+
+    finally:
+
+        for process in processes:
+
+            if process.is_alive():
+
+                process.terminate()
+
+            process.join()
+
+        for connection in connections:
+
+            connection.close()
+
+        shm.close()
+
+        shm.unlink()
+
+    return dict(
+        clusters=clusters,
+        agent_iterations_per_second=[
+            shard_agent_iterations / max(shard_seconds, 1e-9)
+            for shard_agent_iterations, shard_seconds in zip(agent_iterations, seconds)
+        ],
+        seed=seed,
+    )
+
+
+def log_report(epoch, clusters, shard_reports):
+
+    log.info(
+        "epoch %4s: %s",
+        epoch,
+        ", ".join(f"{size}" for hyp, size in clusters.most_common(3)),
+    )
+
+    for shard_report in shard_reports:
+
+        log.info(
+            "  shard %2s: %9.0f agent-iterations/s",
+            shard_report.shard_num,
+            shard_report.agent_iterations / max(shard_report.seconds, 1e-9),
+        )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Run an SDS example sharded across processes")
+
+    parser.add_argument("name", choices=sorted(name2builder), help="Name of the example to run")
+
+    parser.add_argument("--shards", type=int, default=multiprocessing.cpu_count(), help="Number of worker processes")
+
+    parser.add_argument("--agents", type=int, default=10000, help="Total number of agents")
+
+    parser.add_argument("--epochs", type=int, default=20, help="Number of times shards synchronise")
+
+    parser.add_argument("--iterations", type=int, default=50, help="Iterations per shard per epoch")
+
+    parser.add_argument("--cross-shard-rate", type=float, default=0.05, help="Probability that a poll goes to another shard")
+
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the dataset and shards")
+
+    parser.add_argument("--manifest", type=pathlib.Path, default=None, help="Write the seed, parameters and result of the run to this JSON file")
+
+    args = parser.parse_args()
+
+    result = run(
+        name=args.name,
+        shard_count=args.shards,
+        agent_count=args.agents,
+        epochs=args.epochs,
+        iterations_per_epoch=args.iterations,
+        cross_shard_rate=args.cross_shard_rate,
+        seed=args.seed,
+        report=log_report,
+    )
+
+    for hyp, size in result["clusters"].most_common(3):
+
+        log.info("%s: %s", size, hyp)
+
+    log.info(
+        "agent-iterations/s per worker: %s",
+        ", ".join(f"{rate:.0f}" for rate in result["agent_iterations_per_second"]),
+    )
+
+    log.info("seed %s", result["seed"])
+
+    if args.manifest is not None:
+
+        sds_ml.seeding.write_manifest(
+            args.manifest,
+            result["seed"],
+            example=args.name,
+            shards=args.shards,
+            agents=args.agents,
+            epochs=args.epochs,
+            iterations=args.iterations,
+            cross_shard_rate=args.cross_shard_rate,
+            clusters=result["clusters"].most_common(3),
+            agent_iterations_per_second=result["agent_iterations_per_second"],
+        )
+
+
+if __name__ == "__main__":
+
+    logging.basicConfig(
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        format="%(asctime)s %(levelname)-4s %(name)s %(message)s",
+        style="%",
+    )
+
+    main()
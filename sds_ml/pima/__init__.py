@@ -0,0 +1,2 @@
+import sds_ml.pima.dataset as dataset
+from sds_ml.pima.dataset import Pima, Rows, load, load_columns, open_dataset
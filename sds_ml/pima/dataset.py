@@ -0,0 +1,212 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import collections.abc
+import csv
+import hashlib
+import os
+import tempfile
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+dataset_path = pathlib.Path(__file__).resolve().parent.parent / "datasets" / "pima-indians-diabetes.csv"
+
+# The user's cache directory, rather than the installed package.
+cache_dir = pathlib.Path(os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache") / "sds_ml"
+
+def boolean(s):
+
+    return bool(int(s))
+
+schema = (
+    int,
+    int,
+    int,
+    int,
+    int,
+    float,
+    float,
+    int,
+    boolean,
+)
+
+Pima = collections.namedtuple("Pima", [
+    "pregnancy_count", # Number of times pregnant.
+    "glucose_concentration", # Plasma glucose concentration a 2 hours in an oral glucose tolerance test.
+    "blood_pressure", # Diastolic blood pressure (mm Hg).
+    "triceps_skinfold_thickness", # Triceps skinfold thickness (mm).
+    "insulin", # 2-Hour serum insulin (mu U/ml).
+    "bmi", #Body mass index (weight in kg/(height in m)^2).
+    "dpf", # Diabetes pedigree function.
+    "age", # Age (years).
+    "signs_of_diabetes", # Class variable (0 or 1).
+])
+
+def read_csv(path):
+
+    with pathlib.Path(path).open() as f:
+
+        reader = csv.reader(f, delimiter=",")
+
+        yield from reader
+
+def read_csv_to_tuples(schema, NamedTuple, path):
+
+    yield from (
+        NamedTuple(*(transform(value) for transform, value in zip(schema,row)))
+        for row
+        in read_csv(path)
+    )
+
+class Rows(collections.abc.Sequence):
+    """
+    A lazy, read-only sequence of namedtuple rows over a column-major dataset.
+
+    Rows are built from the columns the first time they are accessed and kept,
+    so code written against a tuple of namedtuples works unchanged.
+
+    columns -- a 2-D array with one row per field, the label field last
+    """
+
+    def __init__(self, columns, NamedTuple=Pima, schema=schema):
+
+        self.columns = columns
+        self.NamedTuple = NamedTuple
+        self.schema = schema
+        self.rows = [None] * columns.shape[1]
+
+    @property
+    def fields(self):
+
+        return self.NamedTuple._fields
+
+    @property
+    def features(self):
+
+        return self.columns[:-1]
+
+    @property
+    def labels(self):
+
+        return self.columns[-1] != 0
+
+    def __len__(self):
+
+        return len(self.rows)
+
+    def __getitem__(self, row_num):
+
+        if isinstance(row_num, slice):
+
+            return [self[num] for num in range(len(self))[row_num]]
+
+        row = self.rows[row_num]
+
+        if row is None:
+
+            row = self.NamedTuple(
+                *(
+                    transform(value)
+                    for transform, value
+                    in zip(self.schema, self.columns[:, row_num].tolist())
+                )
+            )
+
+            self.rows[row_num] = row
+
+        return row
+
+def cache_path(path, cache_dir=cache_dir):
+    """
+    Returns the path of the binary cache for a csv file, named
+    <stem>-<path key>-<version key>.npy, the path key from its resolved path
+    and the version key from its modification time and size.
+    """
+
+    path = pathlib.Path(path).resolve()
+
+    stat = path.stat()
+
+    path_key = hashlib.sha1(str(path).encode()).hexdigest()[:16]
+
+    version_key = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()[:16]
+
+    return pathlib.Path(cache_dir) / f"{path.stem}-{path_key}-{version_key}.npy"
+
+def remove_stale(cached):
+    """
+    Removes the caches of earlier versions of the csv cached at cached.
+    """
+
+    prefix = cached.name.rsplit("-", 1)[0]
+
+    for stale in cached.parent.glob(f"{prefix}-*.npy"):
+
+        if stale != cached:
+
+            log.info("removing stale cache %s", stale)
+
+            try:
+
+                stale.unlink()
+
+            except OSError as error:
+
+                log.warning("could not remove %s: %s", stale, error)
+
+def load_columns(path=dataset_path, cache_dir=cache_dir):
+    """
+    Returns the dataset as a read-only memory-mapped float array with one row
+    per field, the label field last.
+
+    The csv is only parsed when it has no binary cache or has changed since
+    the cache was written.
+    """
+
+    cached = cache_path(path, cache_dir=cache_dir)
+
+    if not cached.exists():
+
+        log.info("caching %s as %s", path, cached)
+
+        columns = np.array(list(read_csv(path)), dtype=float).T
+
+        cached.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename, so a concurrent reader never sees half a file.
+        with tempfile.NamedTemporaryFile(dir=cached.parent, suffix=".npy", delete=False) as f:
+
+            np.save(f, np.ascontiguousarray(columns))
+
+        os.replace(f.name, cached)
+
+        remove_stale(cached)
+
+    return np.load(cached, mmap_mode="r")
+
+def load(path=dataset_path, cache_dir=cache_dir):
+
+    return Rows(load_columns(path=path, cache_dir=cache_dir))
+
+def open_dataset(path=dataset_path):
+
+    yield from read_csv_to_tuples(schema=schema, NamedTuple=Pima, path=path)
+
+def main():
+
+    pass
+
+
+
+if __name__ == "__main__":
+
+    logging.basicConfig(
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+        format="%(asctime)s %(levelname)-4s %(name)s %(message)s",
+        style="%",
+    )
+
+    main()
@@ -0,0 +1,212 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds_ml.compiled
+import sds_ml.pima.threshold_index
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+max_cached_hyps = 2 ** 16
+
+max_cached_evaluators = 8
+
+def to_bitset(mask):
+    """
+    Packs a boolean array into an int where bit n is set if mask[n] is true.
+    """
+
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+class Evaluator:
+    """
+    Scores hypotheses against a whole dataset using packed bitsets.
+
+    The set of rows satisfying each (dimension, operator, threshold) plane is
+    an int bitset looked up in a ThresholdIndex, so an intersection is a
+    bitwise AND, a union is a bitwise OR and each cell of the confusion matrix
+    is a popcount.
+
+    columns -- a column-major dataset, a 2-D array with one row per field, the
+    label field last
+    """
+
+    def __init__(self, columns):
+
+        self.columns = np.asarray(columns)
+
+        self.row_count = self.columns.shape[1]
+
+        self.all_rows = (1 << self.row_count) - 1
+
+        self.positive_rows = to_bitset(self.columns[-1] != 0)
+
+        self.index = sds_ml.pima.threshold_index.ThresholdIndex(self.columns[:-1])
+
+        self.groups2rows = {}
+
+        # Maps id(hyp) to (hyp, set_type, rows).
+        self.id2rows = {}
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """
+        Returns an Evaluator for a dataset loaded by sds_ml.pima.load, or for
+        any sequence of rows with the label last.
+        """
+
+        try:
+
+            columns = dataset.columns
+
+        except AttributeError:
+
+            columns = np.asarray(dataset, dtype=float).T
+
+        return cls(columns)
+
+    def plane_rows(self, dimension, sign, threshold):
+        """
+        Returns the bitset of rows where row[dimension] > threshold if sign is
+        1, or row[dimension] < threshold if sign is -1.
+        """
+
+        return self.index.plane_rows(dimension, sign, threshold)
+
+    def hyp_rows(self, hyp, set_type="union"):
+        """
+        Returns the bitset of rows a hypothesis predicts to be in the class.
+        The hypothesis may take any form accepted by sds_ml.compiled.hyp_groups.
+        """
+
+        try:
+
+            cached_hyp, cached_set_type, rows = self.id2rows[id(hyp)]
+
+            if cached_hyp is hyp and cached_set_type == set_type:
+
+                return rows
+
+        except KeyError:
+
+            pass
+
+        groups = sds_ml.compiled.hyp_groups(hyp, set_type=set_type)
+
+        try:
+
+            rows = self.groups2rows[groups]
+
+        except KeyError:
+
+            rows = self.groups_rows(groups)
+
+        if len(self.id2rows) >= max_cached_hyps:
+
+            self.id2rows.clear()
+
+        self.id2rows[id(hyp)] = (hyp, set_type, rows)
+
+        return rows
+
+    def groups_rows(self, groups):
+
+        rows = 0
+
+        for group in groups:
+
+            intersection = self.all_rows
+
+            for plane in group:
+
+                intersection &= self.plane_rows(*plane)
+
+            rows |= intersection
+
+        if len(self.groups2rows) >= max_cached_hyps:
+
+            self.groups2rows.clear()
+
+        self.groups2rows[groups] = rows
+
+        return rows
+
+    def precision_and_recall(self, hyp, set_type="union"):
+
+        predicted = self.hyp_rows(hyp, set_type=set_type)
+
+        true_positive = (predicted & self.positive_rows).bit_count()
+
+        false_positive = predicted.bit_count() - true_positive
+
+        false_negative = self.positive_rows.bit_count() - true_positive
+
+        true_negative = self.row_count - true_positive - false_positive - false_negative
+
+        return dict(
+            true_positive=true_positive,
+            true_negative=true_negative,
+            false_positive=false_positive,
+            false_negative=false_negative,
+            precision=true_positive/max(1, true_positive + false_positive),
+            recall=true_positive/max(1, true_positive + false_negative),
+            accuracy=(true_positive + true_negative) / max(1, self.row_count),
+        )
+
+    def TM(self, rng, set_type="union"):
+        """
+        Returns a TM for sds.T_boolean where each microtest checks one random
+        row. The rows a hypothesis predicts are found once and shared by every
+        agent holding it, so a microtest is a single bit lookup.
+        """
+
+        labels = (self.columns[-1] != 0).tolist()
+
+        def microtest(hyp, row_num):
+
+            return ((self.hyp_rows(hyp, set_type=set_type) >> row_num) & 1) == labels[row_num]
+
+        def TM():
+
+            return functools.partial(microtest, row_num=rng.randrange(self.row_count))
+
+        return TM
+
+    def accuracy(self, hyp, set_type="union"):
+
+        predicted = self.hyp_rows(hyp, set_type=set_type)
+
+        incorrect = (predicted ^ self.positive_rows).bit_count()
+
+        return (self.row_count - incorrect) / max(1, self.row_count)
+
+# Maps id(dataset) to (dataset, evaluator), least recently used first.
+id2evaluator = collections.OrderedDict()
+
+def evaluator(dataset):
+    """
+    Returns the Evaluator for a dataset, building it on first use. Only the
+    max_cached_evaluators most recently used are kept, along with their
+    datasets.
+    """
+
+    cached = id2evaluator.get(id(dataset))
+
+    if cached is not None and cached[0] is dataset:
+
+        id2evaluator.move_to_end(id(dataset))
+
+        return cached[1]
+
+    new_evaluator = Evaluator.from_dataset(dataset)
+
+    id2evaluator[id(dataset)] = (dataset, new_evaluator)
+
+    id2evaluator.move_to_end(id(dataset))
+
+    if len(id2evaluator) > max_cached_evaluators:
+
+        id2evaluator.popitem(last=False)
+
+    return new_evaluator
@@ -8,9 +8,9 @@ log = logging.getLogger(__name__)
 
 Result = collections.namedtuple("Result", ("truth","correct"))
 
-def example_naive():
+def example_naive(seed=None):
 
-    rng = random.Random()
+    rng = random.Random(seed)
 
     dataset = sds_ml.pima.load()
 
@@ -46,7 +46,7 @@ def example_naive():
         Result(True, True):0,
     })
 
-    rng = random.Random()
+    rng = random.Random(seed)
 
     for row in dataset:
 
@@ -1,9 +1,13 @@
 import collections, datetime, functools, itertools
 import json, logging, pathlib, random, re
+import argparse
 import sds_ml
 import sds_ml.sds_ml
 import sds_ml.pima
+import sds_ml.pima.evaluation
+import sds_ml.seeding
 import sds_ml.variants
+import sds_ml.swarm
 import sds
 import sds.variants
 import operator
@@ -12,35 +16,18 @@ SILENT = 0
 
 log = logging.getLogger(__name__)
 
-def data_driven_precision_and_recall(hyp, dataset, microtest):
+def data_driven_precision_and_recall(hyp, dataset):
 
-    results = collections.Counter([
-        (
-            row[-1],
-            microtest(hyp, row)
-        )
-        for row
-        in dataset
-    ])
-
-    accuracy = (results[(1,1)] + results[(0,1)]) / sum(results.values())
-
-    return dict(
-        true_positive=results[(1,1)],
-        true_negative=results[(0,1)],
-        false_positive=results[(0,0)],
-        false_negative=results[(1,0)],
-        precision=results[(1,1)]/max(1, (results[(1,1)]+results[(0,0)])),
-        recall=results[(1,1)]/max(1, (results[(1,1)]+results[(1,0)])),
-        accuracy=accuracy,
-    )
+    return sds_ml.pima.evaluation.evaluator(dataset).precision_and_recall(hyp)
 
-def example_data_driven_pima():
+def example_data_driven_pima(seed=None):
 
-    rng = random.Random()
+    rng = random.Random(seed)
 
     dataset = sds_ml.pima.load()
 
+    evaluator = sds_ml.pima.evaluation.evaluator(dataset)
+
     fields = next(iter(dataset))._fields
 
     agent_count = 10000
@@ -49,33 +36,11 @@ def example_data_driven_pima():
 
     swarm = sds.Swarm(agent_count=agent_count)
 
-    DH = sds_ml.variants.DH_data_driven(dataset=dataset, swarm=swarm, rng=rng)
+    DH = sds_ml.variants.DH_data_driven(dataset=dataset, swarm=swarm, rng=rng, index=evaluator.index)
 
     D = sds.variants.D_context_sensitive(DH=DH, swarm=swarm, rng=rng)
 
-    def microtest(hyp, row):
-
-        return any(
-            all(
-                plane(row)
-                for plane
-                in intersection
-            )
-            for intersection
-            in hyp
-        ) == row[-1]
-
-    TM = sds.TM_uniform(
-        [
-            functools.partial(
-                microtest,
-                row=row,
-            )
-            for row
-            in dataset
-        ],
-        rng=rng,
-    )
+    TM = evaluator.TM(rng=rng)
 
     T = sds.T_boolean(TM=TM)
 
@@ -102,7 +67,7 @@ def example_data_driven_pima():
 
         top_clusters = ", ".join(
             [
-                f"({union_to_str(hyp)}, {size})"
+                f"({union_to_str(hyp)}, {size}, {evaluator.accuracy(hyp):.3f})"
                 for (
                     hyp,
                     size,
@@ -117,7 +82,7 @@ def example_data_driven_pima():
         )
 
     I = sds.I_sync(D=D, T=T, swarm=swarm)
-    I = sds.variants.I_report(
+    I = sds_ml.variants.I_report(
         I=I,
         report_num=1000,
         report_function=report,
@@ -136,7 +101,7 @@ def example_data_driven_pima():
 
     cluster = swarm.largest_cluster
 
-    X = data_driven_precision_and_recall(cluster.hyp, dataset, microtest)
+    X = data_driven_precision_and_recall(cluster.hyp, dataset)
 
     log.info(X)
 
@@ -171,27 +136,23 @@ def D_dimension_operator_sensitive(DH, swarm, rng):
 
     return D
 
-def example_plane_union_intersection_pima(set_type):
+def example_plane_union_intersection_pima(set_type, seed=None):
 
-    rng = random.Random()
+    rng = random.Random(seed)
 
     dataset = sds_ml.pima.load()
 
+    evaluator = sds_ml.pima.evaluation.evaluator(dataset)
+
     fields = next(iter(dataset))._fields
 
     agent_count = 10000
 
     max_iterations = 5000
 
-    DH = sds_ml.variants.DH_plane_union(dataset=dataset, rng=rng)
-
-    if set_type == "union":
+    DH = sds_ml.variants.DH_plane_union(dataset=dataset, rng=rng, index=evaluator.index)
 
-        TM, microtest = sds_ml.variants.TM_plane_union(dataset=dataset, rng=rng)
-
-    else:
-
-        TM, microtest = sds_ml.variants.TM_plane_intersection(dataset=dataset, rng=rng)
+    TM = evaluator.TM(rng=rng, set_type=set_type)
 
     swarm = sds.Swarm(agent_count=agent_count)
 
@@ -223,7 +184,7 @@ def example_plane_union_intersection_pima(set_type):
 
         top_clusters = ", ".join(
             [
-                f"({hyp_to_str(hyp)}, {size})"
+                f"({hyp_to_str(hyp)}, {size}, {evaluator.accuracy(hyp, set_type=set_type):.3f})"
                 for (
                     hyp,
                     size,
@@ -240,7 +201,7 @@ def example_plane_union_intersection_pima(set_type):
         )
 
     I = sds.I_sync(D=D, T=T, swarm=swarm)
-    I = sds.variants.I_report(
+    I = sds_ml.variants.I_report(
         I=I,
         report_num=200,
         report_function=report,
@@ -251,7 +212,7 @@ def example_plane_union_intersection_pima(set_type):
 
     cluster = swarm.largest_cluster
 
-    log.info("Hyp: %s, size: %0.3f, evaluate: %.2f%%", hyp_to_str(cluster.hyp), cluster.size, evaluate(cluster.hyp, microtest, dataset)*100)
+    log.info("Hyp: %s, size: %0.3f, evaluate: %.2f%%", hyp_to_str(cluster.hyp), cluster.size, evaluator.accuracy(cluster.hyp, set_type=set_type)*100)
 
     log.info("cluster %s", cluster)
 
@@ -266,105 +227,45 @@ def example_plane_union_intersection_pima(set_type):
     log.info("precision and recall: %s", p_and_r)
 
 
-def evaluate(hyp, microtest, dataset):
-
-    correct = sum(microtest(hyp, row) for row in dataset)
-
-    return correct/len(dataset)
-
 def plane_intersection_precision_and_recall(hyp, dataset):
 
-    results = collections.Counter([
-        (
-            row[-1],
-            all(
-                hyp_component.operator(row[hyp_component.dimension], hyp_component.threshold)
-                for hyp_component
-                in hyp
-            )
-        )
-        for row
-        in dataset
-    ])
-
-    return dict(
-        true_positive=results[(1,1)],
-        true_negative=results[(0,0)],
-        false_positive=results[(0,1)],
-        false_negative=results[(1,0)],
-        precision=results[(1,1)]/(results[(1,1)]+results[(0,1)]),
-        recall=results[(1,1)]/(results[(1,1)]+results[(1,0)]),
-    )
+    return sds_ml.pima.evaluation.evaluator(dataset).precision_and_recall(hyp, set_type="intersection")
 
 def plane_union_precision_and_recall(hyp, dataset):
 
-    results = collections.Counter([
-        (
-            row[-1],
-            any(
-                hyp_component.operator(row[hyp_component.dimension], hyp_component.threshold)
-                for hyp_component
-                in hyp
-            )
-        )
-        for row
-        in dataset
-    ])
-
-    return dict(
-        true_positive=results[(1,1)],
-        true_negative=results[(0,0)],
-        false_positive=results[(0,1)],
-        false_negative=results[(1,0)],
-        precision=results[(1,1)]/(results[(1,1)]+results[(0,1)]),
-        recall=results[(1,1)]/(results[(1,1)]+results[(1,0)]),
-    )
+    return sds_ml.pima.evaluation.evaluator(dataset).precision_and_recall(hyp, set_type="union")
 
 def plane_precision_and_recall(hyp, dataset):
 
-    results = collections.Counter([
-        (
-            row[-1],
-            hyp.operator(row[hyp.dimension], hyp.threshold),
-        )
-        for row
-        in dataset
-    ])
-
-    return dict(
-        true_positive=results[(1,1)],
-        true_negative=results[(0,0)],
-        false_positive=results[(0,1)],
-        false_negative=results[(1,0)],
-        precision=results[(1,1)]/(results[(1,1)]+results[(0,1)]),
-        recall=results[(1,1)]/(results[(1,1)]+results[(1,0)]),
-    )
+    return sds_ml.pima.evaluation.evaluator(dataset).precision_and_recall(hyp)
 
 
-def example_threshold_pima():
+def example_threshold_pima(seed=None):
     """ thresholding against a single dimension with the PIMA dataset"""
 
-    rng = random.Random()
+    rng = random.Random(seed)
 
     dataset = sds_ml.pima.load()
 
+    evaluator = sds_ml.pima.evaluation.evaluator(dataset)
+
     fields = next(iter(dataset))._fields
 
     agent_count = 1000
 
     max_iterations = 2000
 
-    DH = sds_ml.variants.DH_plane(dataset=dataset, rng=rng)
+    DH = sds_ml.variants.DH_plane(dataset=dataset, rng=rng, index=evaluator.index)
 
-    TM, microtest = sds_ml.variants.TM_plane(dataset=dataset, rng=rng)
+    TM = evaluator.TM(rng=rng)
 
-    swarm = sds.Swarm(agent_count=agent_count)
+    swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
 
-    D = sds.D_passive(DH=DH, swarm=swarm, rng=rng)
+    D = sds_ml.swarm.D_passive(DH=DH, swarm=swarm, rng=rng)
     #D = sds.variants.D_context_free(DH=DH, swarm=swarm, rng=rng)
     # D = context_sensitive_sds.D_context_sensitive(DH=DH, swarm=swarm, rng=rng)
 
-    T = sds.T_boolean(TM=TM)
+    T = sds_ml.swarm.T_boolean(TM=TM, swarm=swarm)
 
     def report(iterations):
 
@@ -372,7 +273,7 @@ def example_threshold_pima():
 
         top_clusters = ", ".join(
             [
-                f"({fields[hyp.dimension]} {sds_ml.sds_ml.operator2symbol[hyp.operator]} {hyp.threshold:.2f}, {size})"
+                f"({fields[hyp.dimension]} {sds_ml.sds_ml.operator2symbol[hyp.operator]} {hyp.threshold:.2f}, {size}, {evaluator.accuracy(hyp):.3f})"
                 for (
                     hyp,
                     size,
@@ -388,8 +289,8 @@ def example_threshold_pima():
             top_clusters,
         )
 
-    I = sds.I_sync(D=D, T=T, swarm=swarm)
-    I = sds.variants.I_report(
+    I = sds_ml.swarm.I_sync(D=D, T=T, swarm=swarm)
+    I = sds_ml.variants.I_report(
         I=I,
         report_num=100,
         report_function=report,
@@ -400,12 +301,30 @@ def example_threshold_pima():
 
     cluster = swarm.largest_cluster
 
-    log.info("cluster: %s, evaluate: %.2f%%", cluster, evaluate(cluster.hyp, microtest, dataset)*100)
+    log.info("cluster: %s, evaluate: %.2f%%", cluster, evaluator.accuracy(cluster.hyp)*100)
+
+    log.info("precision and recall: %s", plane_precision_and_recall(cluster.hyp, dataset))
 
 def main():
 
-    example_threshold_pima()
-    example_plane_union_pima()
+    parser = argparse.ArgumentParser(description="SDS classification examples with the PIMA dataset")
+
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the swarm")
+
+    parser.add_argument("--manifest", type=pathlib.Path, default=None, help="Write the seed of the run to this JSON file")
+
+    args = parser.parse_args()
+
+    seed = sds_ml.seeding.make_seed(args.seed)
+
+    log.info("seed %s", seed)
+
+    if args.manifest is not None:
+
+        sds_ml.seeding.write_manifest(args.manifest, seed)
+
+    example_threshold_pima(seed=seed)
+    example_plane_union_intersection_pima(set_type="union", seed=seed)
 
 
 if __name__ == "__main__":
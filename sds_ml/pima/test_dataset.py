@@ -0,0 +1,87 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import tempfile
+import unittest
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds_ml.pima as pima
+
+log = logging.getLogger(__name__)
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.csv_path = pathlib.Path(self.tmp_dir.name) / "pima.csv"
+
+        self.cache_dir = pathlib.Path(self.tmp_dir.name) / "cache"
+
+        self.csv_path.write_text(
+            "6,148,72,35,0,33.6,0.627,50,1\n"
+            "1,85,66,29,0,26.6,0.351,31,0\n"
+            "8,183,64,0,0,23.3,0.672,32,1\n"
+            "1,89,66,23,94,28.1,0.167,21,0\n"
+            "0,137,40,35,168,43.1,2.288,33,1\n"
+        )
+
+    def tearDown(self):
+
+        self.tmp_dir.cleanup()
+
+    def test_load(self):
+
+        dataset = pima.load(path=self.csv_path, cache_dir=self.cache_dir)
+
+        expected = tuple(pima.open_dataset(path=self.csv_path))
+
+        self.assertEqual(len(dataset), len(expected))
+
+        self.assertEqual(tuple(dataset), expected)
+
+        self.assertEqual(next(iter(dataset))._fields, pima.Pima._fields)
+
+        self.assertIn(self.rng.choice(dataset), expected)
+
+        self.assertEqual(dataset.columns.shape, (len(pima.Pima._fields), len(expected)))
+
+        self.assertEqual(list(dataset.labels), [True, False, True, False, True])
+
+        self.assertEqual(list(dataset.features[1]), [148, 85, 183, 89, 137])
+
+    def test_cache(self):
+
+        pima.load_columns(path=self.csv_path, cache_dir=self.cache_dir)
+
+        cached = pima.dataset.cache_path(self.csv_path, cache_dir=self.cache_dir)
+
+        self.assertTrue(cached.exists())
+
+        with self.csv_path.open("a") as f:
+
+            f.write("5,116,74,0,0,25.6,0.201,30,0\n")
+
+        columns = pima.load_columns(path=self.csv_path, cache_dir=self.cache_dir)
+
+        self.assertNotEqual(pima.dataset.cache_path(self.csv_path, cache_dir=self.cache_dir), cached)
+
+        # The cache of the earlier version is removed, that of another csv kept.
+        self.assertFalse(cached.exists())
+
+        other_path = pathlib.Path(self.tmp_dir.name) / "other" / "pima.csv"
+
+        other_path.parent.mkdir()
+
+        other_path.write_text(self.csv_path.read_text())
+
+        pima.load_columns(path=other_path, cache_dir=self.cache_dir)
+
+        self.assertEqual(len(list(self.cache_dir.glob("*.npy"))), 2)
+
+        self.assertEqual(columns.shape[1], 6)
@@ -0,0 +1,164 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import unittest
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds
+import sds_ml.pima.evaluation as evaluation
+import sds_ml.pima.threshold_index as threshold_index
+import sds_ml.variants as variants
+
+log = logging.getLogger(__name__)
+
+class TestEvaluation(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+        self.dataset = tuple(
+            tuple(self.rng.randint(0, 10) for dimension in range(4)) + (self.rng.random() < 0.4,)
+            for row_num in range(300)
+        )
+
+    def expected_precision_and_recall(self, predict):
+
+        results = collections.Counter((row[-1], predict(row)) for row in self.dataset)
+
+        return dict(
+            true_positive=results[(1,1)],
+            true_negative=results[(0,0)],
+            false_positive=results[(0,1)],
+            false_negative=results[(1,0)],
+            precision=results[(1,1)]/max(1, results[(1,1)]+results[(0,1)]),
+            recall=results[(1,1)]/max(1, results[(1,1)]+results[(1,0)]),
+            accuracy=(results[(1,1)] + results[(0,0)]) / len(self.dataset),
+        )
+
+    def test_evaluator_cache(self):
+
+        evaluator = evaluation.evaluator(self.dataset)
+
+        self.assertIs(evaluator, evaluation.evaluator(self.dataset))
+
+        datasets = [list(self.dataset) for dataset_num in range(evaluation.max_cached_evaluators + 1)]
+
+        for dataset in datasets:
+
+            evaluation.evaluator(dataset)
+
+        self.assertLessEqual(len(evaluation.id2evaluator), evaluation.max_cached_evaluators)
+
+        self.assertNotIn(id(datasets[0]), evaluation.id2evaluator)
+
+    def test_plane(self):
+
+        evaluator = evaluation.evaluator(self.dataset)
+
+        DH = variants.DH_plane(dataset=self.dataset, rng=self.rng)
+
+        for num in range(20):
+
+            hyp = DH()
+
+            self.assertEqual(
+                evaluator.precision_and_recall(hyp),
+                self.expected_precision_and_recall(
+                    lambda row: hyp.operator(row[hyp.dimension], hyp.threshold)
+                ),
+            )
+
+    def test_plane_sets(self):
+
+        evaluator = evaluation.evaluator(self.dataset)
+
+        DH = variants.DH_plane_union(dataset=self.dataset, rng=self.rng)
+
+        for num in range(20):
+
+            hyp = DH()
+
+            for set_type, combine in (("union", any), ("intersection", all)):
+
+                expected = self.expected_precision_and_recall(
+                    lambda row: combine(plane.operator(row[plane.dimension], plane.threshold) for plane in hyp)
+                )
+
+                self.assertEqual(evaluator.precision_and_recall(hyp, set_type=set_type), expected)
+
+                self.assertAlmostEqual(evaluator.accuracy(hyp, set_type=set_type), expected["accuracy"])
+
+    def test_data_driven(self):
+
+        evaluator = evaluation.evaluator(self.dataset)
+
+        DH = variants.DH_data_driven(dataset=self.dataset, swarm=sds.Swarm(agent_count=10), rng=self.rng)
+
+        for num in range(20):
+
+            hyp = DH()
+
+            self.assertEqual(
+                evaluator.precision_and_recall(hyp),
+                self.expected_precision_and_recall(
+                    lambda row: any(all(plane(row) for plane in intersection) for intersection in hyp)
+                ),
+            )
+
+    def test_threshold_index(self):
+
+        index = threshold_index.ThresholdIndex([[row[dimension] for row in self.dataset] for dimension in range(4)])
+
+        thresholds = [-1, 0, 2.5, 5, 10, 11]
+
+        for dimension, sign, threshold in itertools.product(range(4), (-1, 1), thresholds):
+
+            if sign > 0:
+
+                expected = [row[dimension] > threshold for row in self.dataset]
+
+            else:
+
+                expected = [row[dimension] < threshold for row in self.dataset]
+
+            rows = index.plane_rows(dimension, sign, threshold)
+
+            self.assertEqual([bool((rows >> row_num) & 1) for row_num in range(len(self.dataset))], expected)
+
+        self.assertIn(index.random_threshold(2, self.rng), [row[2] for row in self.dataset])
+
+        self.assertEqual(
+            [column.values for column in threshold_index.ThresholdIndex.from_dataset(self.dataset).columns],
+            [column.values for column in index.columns],
+        )
+
+        # The DHs draw their thresholds from the given index, or their own.
+        self.assertEqual(
+            variants.DH_plane(dataset=self.dataset, rng=random.Random(1), index=index)(),
+            variants.DH_plane(dataset=self.dataset, rng=random.Random(1))(),
+        )
+
+        DH = variants.DH_plane_union(dataset=self.dataset, rng=self.rng, index=index)
+
+        for hyp_num in range(50):
+
+            for plane in DH():
+
+                self.assertIn(plane.threshold, [row[plane.dimension] for row in self.dataset])
+
+    def test_TM(self):
+
+        evaluator = evaluation.evaluator(self.dataset)
+
+        hyp = variants.DH_plane(dataset=self.dataset, rng=self.rng)()
+
+        TM = evaluator.TM(rng=self.rng)
+
+        repeats = 5000
+
+        activity = sum(TM()(hyp) for num in range(repeats)) / repeats
+
+        self.assertAlmostEqual(activity, evaluator.accuracy(hyp), delta=0.05)
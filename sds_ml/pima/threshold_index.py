@@ -0,0 +1,143 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import bisect
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+class ColumnIndex:
+    """
+    A sorted index over a single column.
+
+    values -- the distinct values of the column in ascending order
+    value2rank -- maps each distinct value to its position in values
+    row_ranks -- the rank of the value in each row
+    below -- below[rank] is the bitset of rows whose value has a lower rank,
+    there are len(values) + 1 of them, the last holding every row
+    """
+
+    __slots__ = ("values", "value2rank", "row_ranks", "below")
+
+    def __init__(self, column):
+
+        column = np.asarray(column)
+
+        values, row_ranks = np.unique(column, return_inverse=True)
+
+        self.values = values.tolist()
+
+        self.value2rank = {value: rank for rank, value in enumerate(self.values)}
+
+        self.row_ranks = row_ranks
+
+        self.below = [0]
+
+        rows = 0
+
+        order = np.argsort(row_ranks, kind="stable").tolist()
+
+        ranks = row_ranks[order].tolist()
+
+        for row, rank in zip(order, ranks):
+
+            if rank == len(self.below):
+
+                self.below.append(rows)
+
+            rows |= 1 << row
+
+        self.below.append(rows)
+
+    def rank_below(self, threshold):
+        """
+        Returns the number of distinct values less than threshold.
+        """
+
+        try:
+
+            return self.value2rank[threshold]
+
+        except (KeyError, TypeError):
+
+            return bisect.bisect_left(self.values, threshold)
+
+    def rank_not_above(self, threshold):
+        """
+        Returns the number of distinct values less than or equal to threshold.
+        """
+
+        try:
+
+            return self.value2rank[threshold] + 1
+
+        except (KeyError, TypeError):
+
+            return bisect.bisect_right(self.values, threshold)
+
+class ThresholdIndex:
+    """
+    Per-column sorted indices over a dataset, answering whether rows fall one
+    side or the other of a threshold without comparing each row.
+
+    Thresholds are usually values from the dataset itself, so each plane is a
+    dictionary lookup to find the rank of its threshold followed by picking
+    the precomputed bitset of rows below that rank. Keeping a bitset per
+    distinct value costs rows * distinct values bits per column.
+
+    features -- a column-major array of feature columns, without the label
+    """
+
+    def __init__(self, features):
+
+        features = np.asarray(features)
+
+        self.row_count = features.shape[1]
+
+        self.all_rows = (1 << self.row_count) - 1
+
+        self.columns = [ColumnIndex(column) for column in features]
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """
+        Returns a ThresholdIndex over the features of a dataset loaded by
+        sds_ml.pima.load, or of any sequence of rows with the label last.
+        """
+
+        try:
+
+            columns = dataset.columns
+
+        except AttributeError:
+
+            columns = np.asarray(dataset, dtype=float).T
+
+        return cls(columns[:-1])
+
+    def plane_rows(self, dimension, sign, threshold):
+        """
+        Returns the bitset of rows where row[dimension] > threshold if sign is
+        1, or row[dimension] < threshold if sign is -1.
+        """
+
+        column = self.columns[dimension]
+
+        if sign > 0:
+
+            return self.all_rows & ~column.below[column.rank_not_above(threshold)]
+
+        else:
+
+            return column.below[column.rank_below(threshold)]
+
+    def random_threshold(self, dimension, rng):
+        """
+        Returns the value of a uniformly chosen row in a column, the same
+        distribution as rng.choice(dataset)[dimension].
+        """
+
+        column = self.columns[dimension]
+
+        return column.values[column.row_ranks[rng.randrange(self.row_count)]]
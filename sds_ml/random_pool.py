@@ -0,0 +1,80 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+
+class RandomPool(random.Random):
+    """
+    A random.Random whose normal draws are popped from a list, which a NumPy
+    Generator refills in bulk, so gauss and normalvariate cost a list pop
+    each rather than a Box-Muller transform in Python. Every other draw is
+    made by random.Random as usual.
+
+    This is only worth using where an rng makes many normal draws, such as
+    clustering.problem.make_a_problem_space. Elsewhere a plain random.Random
+    is as fast.
+
+    Under a given seed, and buffer size, it always makes the same sequence of
+    draws. They are not those of random.Random with that seed, as seeding
+    the Generator takes 128 bits from the Mersenne Twister first, so every
+    later draw is shifted too.
+
+    Keyword arguments:
+    seed -- anything random.Random accepts
+    buffer_size -- the number of normal draws made at once
+    """
+
+    def __init__(self, seed=None, buffer_size=2 ** 12):
+
+        self.buffer_size = buffer_size
+
+        super().__init__(seed)
+
+    def seed(self, a=None, version=2):
+
+        super().seed(a, version)
+
+        # The Generator is seeded from the Mersenne Twister, so both follow
+        # from the one seed.
+        self.generator = np.random.default_rng(super().getrandbits(128))
+
+        self.normals = []
+
+    def __reduce__(self):
+
+        return self.__class__, (None, self.buffer_size), self.getstate()
+
+    def getstate(self):
+
+        return super().getstate(), self.generator.bit_generator.state, list(self.normals)
+
+    def setstate(self, state):
+
+        random_state, bit_generator_state, normals = state
+
+        super().setstate(random_state)
+
+        self.generator.bit_generator.state = bit_generator_state
+
+        self.normals = list(normals)
+
+    def gauss(self, mu=0.0, sigma=1.0):
+
+        try:
+
+            normal = self.normals.pop()
+
+        except IndexError:
+
+            self.normals = self.generator.standard_normal(self.buffer_size).tolist()
+
+            normal = self.normals.pop()
+
+        return mu + sigma * normal
+
+    normalvariate = gauss
@@ -2,7 +2,7 @@ import collections, datetime, functools, itertools
 import json, logging, pathlib, random, re
 import sds
 import operator
-import sds_ml.examples.pima
+import sds_ml.pima.pima
 import sds
 import sds.variants
 from logging import DEBUG, INFO, WARNING, ERROR, FATAL
@@ -31,10 +31,10 @@ def plane_union_hyp_to_str(hyp):
 
 
 
-def example_xor():
+def example_xor(seed=None):
     """ xor dataset against the plane-union method of hypothesis selection """
 
-    rng = random.Random()
+    rng = random.Random(seed)
 
     xor_dataset = (
         (0,0),
@@ -55,9 +55,9 @@ def example_xor():
 
 def main():
 
-    sds_ml.examples.pima.example_data_driven_pima()
-    #sds_ml.examples.pima.example_plane_union_intersection_pima(set_type="intersection")
-    #sds_ml.examples.pima.example_threshold_pima()
+    sds_ml.pima.pima.example_data_driven_pima()
+    #sds_ml.pima.pima.example_plane_union_intersection_pima(set_type="intersection")
+    #sds_ml.pima.pima.example_threshold_pima()
 
 
 
@@ -0,0 +1,128 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import importlib.metadata
+import os
+import platform
+import secrets
+import subprocess
+import sys
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+
+def make_seed(seed=None):
+    """
+    Returns seed, or a fresh 64 bit seed from the operating system if seed is
+    None, so that a run which was not given a seed can still record the one
+    it used and be repeated.
+    """
+
+    if seed is None:
+
+        return secrets.randbits(64)
+
+    return seed
+
+
+def spawn_seeds(seed, count):
+    """
+    Returns count integer seeds derived from seed, one for each worker of a
+    parallel run. The seeds come from np.random.SeedSequence.spawn, so the
+    streams they seed are independent of each other and of the parent.
+    """
+
+    return [
+        int(child.generate_state(1, dtype=np.uint64)[0])
+        for child in np.random.SeedSequence(seed).spawn(count)
+    ]
+
+
+def package_version(name):
+
+    try:
+
+        return importlib.metadata.version(name)
+
+    except importlib.metadata.PackageNotFoundError:
+
+        return None
+
+
+def git_commit():
+    """
+    Returns the commit of the working tree, with a trailing "+" if it has
+    uncommitted changes, or None outside a git checkout.
+    """
+
+    cwd = pathlib.Path(__file__).resolve().parent
+
+    try:
+
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+
+        return None
+
+    return commit + ("+" if status else "")
+
+
+def machine_info():
+
+    return dict(
+        commit=git_commit(),
+        platform=platform.platform(),
+        machine=platform.machine(),
+        processor=platform.processor(),
+        cpu_count=os.cpu_count(),
+        python=sys.version,
+        implementation=platform.python_implementation(),
+        numpy=np.__version__,
+        sds=package_version("sds"),
+    )
+
+
+def manifest(seed, **fields):
+    """
+    Returns a record of a run: its seed, command line and the machine and
+    commit it ran on, along with any further fields such as its parameters
+    and results. Running the same command with the same seed, at the same
+    commit, repeats the run.
+    """
+
+    return dict(
+        created=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        seed=seed,
+        argv=sys.argv,
+        machine=machine_info(),
+        **fields,
+    )
+
+
+def write_manifest(path, seed, **fields):
+    """
+    Writes the manifest of a run to the JSON file path. Fields which JSON
+    cannot represent are written as strings.
+    """
+
+    path = pathlib.Path(path)
+
+    path.write_text(json.dumps(manifest(seed, **fields), indent=2, default=str))
+
+    log.info("wrote %s", path)
+
+    return path
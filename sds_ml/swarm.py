@@ -0,0 +1,713 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import collections.abc
+import heapq
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds
+import sds.standard
+
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+
+class AgentView:
+    """
+    A stand-in for sds.Agent which reads and writes the state of a single
+    agent in an ArraySwarm. This lets the standard per-agent modes of
+    diffusion and testing run against an ArraySwarm unchanged.
+    """
+
+    __slots__ = ("swarm", "num")
+
+    def __init__(self, swarm, num):
+
+        self.swarm = swarm
+        self.num = num
+
+    @property
+    def active(self):
+
+        return bool(self.swarm.active[self.num])
+
+    @active.setter
+    def active(self, active):
+
+        self.swarm.set_active(self.num, active)
+
+    @property
+    def inactive(self):
+
+        return not self.swarm.active[self.num]
+
+    @property
+    def hyp(self):
+
+        return self.swarm.hyps[self.swarm.hyp_nums[self.num]]
+
+    @hyp.setter
+    def hyp(self, hyp):
+
+        self.swarm.set_hyp_num(self.num, self.swarm.intern(hyp))
+
+    def __iter__(self):
+
+        yield ("active", self.active)
+        yield ("hyp", self.hyp)
+
+    def __str__(self):
+
+        if self.active:
+
+            return str(self.hyp)
+
+        else:
+
+            return "Inactive"
+
+    def __repr__(self):
+
+        return f"<AgentView #{self.num}>"
+
+
+class ClusterTracker:
+    """
+    The number of active agents holding each hypothesis, kept up to date as
+    agents change rather than recounted.
+
+    Equal hypotheses share a cluster, so each hypothesis is hashed once, when
+    it is first seen, and each change to an agent is an O(1) update of a
+    count. The largest clusters are kept in a lazy max-heap: every change
+    pushes the new count of its cluster, and entries whose count has since
+    changed are discarded when they reach the top, so finding the k largest
+    clusters costs O(k log n).
+
+    hyps -- the hypothesis of each cluster, indexed by cluster number
+    counts -- the number of active agents in each cluster
+
+    Keyword arguments:
+    representative -- a function from a cluster number to the hypothesis
+                      reported for that cluster, by default the first one
+                      seen (optional)
+    """
+
+    def __init__(self, representative=None):
+
+        if representative is None:
+
+            representative = lambda cluster_num: self.hyps[cluster_num]
+
+        self.representative = representative
+
+        self.hyps = []
+
+        self.hyp2cluster_num = {}
+
+        self.counts = []
+
+        self.heap = []
+
+        self.nonzero_count = 0
+
+    def cluster_num(self, hyp):
+        """
+        Returns the number of the cluster of a hypothesis, creating an empty
+        cluster if no equal hypothesis has been seen.
+        """
+
+        try:
+
+            return self.hyp2cluster_num[hyp]
+
+        except KeyError:
+
+            pass
+
+        cluster_num = len(self.hyps)
+
+        self.hyps.append(hyp)
+
+        self.hyp2cluster_num[hyp] = cluster_num
+
+        self.counts.append(0)
+
+        return cluster_num
+
+    def add(self, cluster_num, change):
+
+        count = self.counts[cluster_num]
+
+        new_count = count + change
+
+        self.counts[cluster_num] = new_count
+
+        if count == 0:
+
+            self.nonzero_count += 1
+
+        elif new_count == 0:
+
+            self.nonzero_count -= 1
+
+        if new_count > 0:
+
+            heapq.heappush(self.heap, (-new_count, cluster_num))
+
+            # Stale entries only accumulate until they outnumber live clusters.
+            if len(self.heap) > 4 * self.nonzero_count + 64:
+
+                self.rebuild_heap()
+
+    def update(self, removed, added):
+        """
+        Moves agents between clusters in bulk.
+
+        removed -- an array with the cluster number of each agent leaving a cluster
+        added -- an array with the cluster number of each agent joining a cluster
+        """
+
+        changes = (
+            np.bincount(added, minlength=len(self.counts))
+            - np.bincount(removed, minlength=len(self.counts))
+        )
+
+        for cluster_num in np.flatnonzero(changes).tolist():
+
+            self.add(cluster_num, int(changes[cluster_num]))
+
+    def rebuild_heap(self):
+
+        self.heap = [
+            (-count, cluster_num)
+            for cluster_num, count in enumerate(self.counts)
+            if count > 0
+        ]
+
+        heapq.heapify(self.heap)
+
+    def most_common(self, n=None):
+        """
+        Returns a list of (hyp, count) for the n largest clusters, or for
+        every cluster if n is None, largest first as Counter.most_common does.
+        """
+
+        if n is None:
+
+            return sorted(
+                (
+                    (self.representative(cluster_num), count)
+                    for cluster_num, count in enumerate(self.counts)
+                    if count > 0
+                ),
+                key=lambda cluster: -cluster[1],
+            )
+
+        heap = self.heap
+
+        counts = self.counts
+
+        found = []
+
+        found_cluster_nums = set()
+
+        while heap and len(found) < n:
+
+            entry = heapq.heappop(heap)
+
+            negative_count, cluster_num = entry
+
+            if -negative_count != counts[cluster_num] or cluster_num in found_cluster_nums:
+
+                continue
+
+            found.append(entry)
+
+            found_cluster_nums.add(cluster_num)
+
+        for entry in found:
+
+            heapq.heappush(heap, entry)
+
+        return [(self.representative(cluster_num), -negative_count) for negative_count, cluster_num in found]
+
+    def compact(self, cluster_nums):
+        """
+        Keeps only the given clusters, which must include every cluster with
+        active agents, returning an array mapping each old cluster number to
+        its new one.
+        """
+
+        keep = np.zeros(len(self.counts), dtype=bool)
+
+        keep[cluster_nums] = True
+
+        kept = np.flatnonzero(keep).tolist()
+
+        renumber = np.zeros(len(self.counts), dtype=np.int32)
+
+        renumber[kept] = np.arange(len(kept), dtype=np.int32)
+
+        self.hyps = [self.hyps[cluster_num] for cluster_num in kept]
+
+        self.counts = [self.counts[cluster_num] for cluster_num in kept]
+
+        self.hyp2cluster_num = {hyp: cluster_num for cluster_num, hyp in enumerate(self.hyps)}
+
+        self.rebuild_heap()
+
+        return renumber
+
+
+class Clusters(collections.abc.Mapping):
+    """
+    A live, read-only view of the clusters of an ArraySwarm, mapping each
+    hypothesis held by an active agent to the size of its cluster.
+
+    It stands in for the Counter returned by sds.Swarm.clusters, but building
+    it costs nothing and most_common(n) is answered from the tracker's heap.
+    """
+
+    __slots__ = ("tracker",)
+
+    def __init__(self, tracker):
+
+        self.tracker = tracker
+
+    def __getitem__(self, hyp):
+
+        cluster_num = self.tracker.hyp2cluster_num.get(hyp)
+
+        if cluster_num is None:
+
+            return 0
+
+        return self.tracker.counts[cluster_num]
+
+    def __contains__(self, hyp):
+
+        return self[hyp] > 0
+
+    def __iter__(self):
+
+        return (
+            self.tracker.representative(cluster_num)
+            for cluster_num, count in enumerate(self.tracker.counts)
+            if count > 0
+        )
+
+    def __len__(self):
+
+        return self.tracker.nonzero_count
+
+    def __repr__(self):
+
+        return f"Clusters({dict(self.most_common())!r})"
+
+    def most_common(self, n=None):
+
+        return self.tracker.most_common(n)
+
+    def total(self):
+
+        return sum(self.tracker.counts)
+
+
+class ArraySwarm:
+    """
+    A swarm which stores the activity of every agent in a boolean array and
+    every hypothesis as an integer index into a table of hypotheses.
+
+    Hypotheses are interned by identity, so an agent copying the hypothesis of
+    another agent is a single integer copy. The table is compacted once it
+    holds many more hypotheses than there are agents, dropping every
+    hypothesis no agent holds.
+
+    The size of every cluster is tracked as agents change, so the activity
+    and hypotheses of agents must only be changed through AgentView,
+    set_active, set_hyp_num or update, never by writing to the arrays.
+
+    Equal hypotheses need not be identical, so the number of active agents
+    holding each entry of the table is tracked too, and a cluster is always
+    reported with a hypothesis some active agent holds.
+    """
+
+    def __init__(self, agent_count, max_table_size=None):
+
+        self.active = np.zeros(agent_count, dtype=bool)
+
+        self.hyp_nums = np.zeros(agent_count, dtype=np.int32)
+
+        self.hyps = [None]
+
+        self.id2hyp_num = {id(None): 0}
+
+        self.tracker = ClusterTracker(representative=self.held_hyp)
+
+        # The cluster of each hypothesis in the table, and the number of
+        # active agents holding it, with room to grow.
+        self.table_clusters = np.zeros(16, dtype=np.int32)
+
+        self.table_counts = np.zeros(16, dtype=np.int32)
+
+        self.table_clusters[0] = self.tracker.cluster_num(None)
+
+        if max_table_size is None:
+
+            max_table_size = 2 * agent_count + 16
+
+        self.max_table_size = max_table_size
+
+    def __len__(self):
+
+        return len(self.active)
+
+    def __getitem__(self, num):
+
+        if isinstance(num, slice):
+
+            return [AgentView(self, agent_num) for agent_num in range(len(self))[num]]
+
+        if num < 0:
+
+            num += len(self)
+
+        if not 0 <= num < len(self):
+
+            raise IndexError("agent index out of range")
+
+        return AgentView(self, num)
+
+    def __iter__(self):
+
+        return (AgentView(self, num) for num in range(len(self)))
+
+    def __str__(self):
+
+        return ", ".join(
+            f"(Hyp:{hyp}, Agents:{cluster_size})"
+            for hyp, cluster_size in self.clusters.most_common()
+        )
+
+    def intern(self, hyp):
+        """
+        Returns the table index of the hypothesis, adding it to the table if
+        it is not already there. The returned index is only valid until the
+        next call to intern, so it must be assigned to an agent immediately.
+        """
+
+        try:
+
+            return self.id2hyp_num[id(hyp)]
+
+        except KeyError:
+
+            pass
+
+        if len(self.hyps) >= self.max_table_size:
+
+            self.compact()
+
+        hyp_num = len(self.hyps)
+
+        self.hyps.append(hyp)
+
+        self.id2hyp_num[id(hyp)] = hyp_num
+
+        self.reserve_table(hyp_num + 1)
+
+        self.table_clusters[hyp_num] = self.tracker.cluster_num(hyp)
+
+        return hyp_num
+
+    def intern_many(self, hyps):
+        """
+        Returns an array of table indices for the given hypotheses, compacting
+        the table at most once beforehand.
+        """
+
+        if len(self.hyps) + len(hyps) >= self.max_table_size:
+
+            self.compact()
+
+        hyps_table = self.hyps
+
+        id2hyp_num = self.id2hyp_num
+
+        self.reserve_table(len(hyps_table) + len(hyps))
+
+        table_clusters = self.table_clusters
+
+        cluster_num = self.tracker.cluster_num
+
+        hyp_nums = np.empty(len(hyps), dtype=np.int32)
+
+        for num, hyp in enumerate(hyps):
+
+            hyp_num = id2hyp_num.get(id(hyp))
+
+            if hyp_num is None:
+
+                hyp_num = len(hyps_table)
+
+                hyps_table.append(hyp)
+
+                id2hyp_num[id(hyp)] = hyp_num
+
+                table_clusters[hyp_num] = cluster_num(hyp)
+
+            hyp_nums[num] = hyp_num
+
+        return hyp_nums
+
+    def reserve_table(self, size):
+
+        if size > len(self.table_clusters):
+
+            table_clusters = np.zeros(max(size, 2 * len(self.table_clusters)), dtype=np.int32)
+
+            table_clusters[:len(self.table_clusters)] = self.table_clusters
+
+            table_counts = np.zeros(len(table_clusters), dtype=np.int32)
+
+            table_counts[:len(self.table_counts)] = self.table_counts
+
+            self.table_clusters = table_clusters
+
+            self.table_counts = table_counts
+
+    def held_hyp(self, cluster_num):
+        """
+        Returns a hypothesis of the cluster held by an active agent, keeping
+        the tracker's hypothesis for the cluster while an agent holds it and
+        replacing it otherwise.
+        """
+
+        hyp = self.tracker.hyps[cluster_num]
+
+        hyp_num = self.id2hyp_num.get(id(hyp))
+
+        if hyp_num is not None and self.table_counts[hyp_num] > 0:
+
+            return hyp
+
+        table_size = len(self.hyps)
+
+        held = np.flatnonzero(
+            (self.table_clusters[:table_size] == cluster_num) & (self.table_counts[:table_size] > 0)
+        )
+
+        if len(held):
+
+            hyp = self.hyps[int(held[0])]
+
+            self.tracker.hyps[cluster_num] = hyp
+
+        return hyp
+
+    def compact(self):
+        """
+        Removes every hypothesis not held by an agent from the table.
+        """
+
+        used = np.unique(self.hyp_nums)
+
+        renumber = np.zeros(len(self.hyps), dtype=np.int32)
+
+        renumber[used] = np.arange(len(used), dtype=np.int32)
+
+        self.hyp_nums[:] = renumber[self.hyp_nums]
+
+        self.hyps = [self.hyps[hyp_num] for hyp_num in used.tolist()]
+
+        self.id2hyp_num = {id(hyp): hyp_num for hyp_num, hyp in enumerate(self.hyps)}
+
+        table_clusters = self.table_clusters[used]
+
+        table_counts = self.table_counts[used]
+
+        renumber_clusters = self.tracker.compact(table_clusters)
+
+        self.table_clusters = np.zeros(max(16, len(self.table_clusters)), dtype=np.int32)
+
+        self.table_clusters[:len(used)] = renumber_clusters[table_clusters]
+
+        self.table_counts = np.zeros(len(self.table_clusters), dtype=np.int32)
+
+        self.table_counts[:len(used)] = table_counts
+
+        log.log(SILENT, "compacted hypothesis table to %s entries", len(self.hyps))
+
+    def set_active(self, num, active):
+
+        if bool(self.active[num]) != bool(active):
+
+            self.active[num] = active
+
+            hyp_num = self.hyp_nums[num]
+
+            change = 1 if active else -1
+
+            self.table_counts[hyp_num] += change
+
+            self.tracker.add(int(self.table_clusters[hyp_num]), change)
+
+    def set_hyp_num(self, num, hyp_num):
+
+        old_hyp_num = self.hyp_nums[num]
+
+        self.hyp_nums[num] = hyp_num
+
+        if self.active[num]:
+
+            self.table_counts[old_hyp_num] -= 1
+
+            self.table_counts[hyp_num] += 1
+
+            old_cluster_num = int(self.table_clusters[old_hyp_num])
+
+            cluster_num = int(self.table_clusters[hyp_num])
+
+            if old_cluster_num != cluster_num:
+
+                self.tracker.add(old_cluster_num, -1)
+
+                self.tracker.add(cluster_num, 1)
+
+    def update(self, agent_nums, hyp_nums=None, active=None):
+        """
+        Sets the hypotheses and/or activity of many agents at once.
+
+        Positional arguments:
+        agent_nums -- an index array or slice selecting distinct agents
+
+        Keyword arguments:
+        hyp_nums -- the new table index of each selected agent (optional)
+        active -- the new activity of each selected agent (optional)
+        """
+
+        def active_hyp_nums():
+
+            return self.hyp_nums[agent_nums][self.active[agent_nums]]
+
+        removed = active_hyp_nums()
+
+        if hyp_nums is not None:
+
+            self.hyp_nums[agent_nums] = hyp_nums
+
+        if active is not None:
+
+            self.active[agent_nums] = active
+
+        added = active_hyp_nums()
+
+        np.subtract.at(self.table_counts, removed, 1)
+
+        np.add.at(self.table_counts, added, 1)
+
+        self.tracker.update(self.table_clusters[removed], self.table_clusters[added])
+
+    @property
+    def activity(self):
+
+        if not len(self):
+
+            return 0
+
+        return np.count_nonzero(self.active) / len(self)
+
+    @property
+    def clusters(self):
+
+        return Clusters(self.tracker)
+
+    def recount(self):
+        """
+        Returns the clusters counted from scratch, as a Counter.
+        """
+
+        counts = np.bincount(self.hyp_nums[self.active], minlength=len(self.hyps))
+
+        clusters = collections.Counter()
+
+        for hyp_num in np.flatnonzero(counts).tolist():
+
+            clusters[self.hyps[hyp_num]] += int(counts[hyp_num])
+
+        return clusters
+
+    @property
+    def largest_cluster(self):
+
+        try:
+
+            hyp, agents = self.tracker.most_common(1)[0]
+
+        except IndexError:
+
+            hyp, agents = None, 0
+
+        return sds.standard.Cluster(hyp=hyp, agents=agents, size=agents / len(self))
+
+
+def D_passive(DH, swarm, rng):
+    """
+    Passive diffusion for the whole of an ArraySwarm at once. Every inactive
+    agent polls a random agent, copying its hypothesis if it is active and
+    selecting a new hypothesis with DH otherwise.
+
+    This matches sds.D_passive exactly, as only inactive agents change and they
+    only ever copy from active agents.
+    """
+
+    batch_rng = np.random.default_rng(rng.getrandbits(64))
+
+    def D():
+
+        inactive = np.flatnonzero(~swarm.active)
+
+        polled = batch_rng.integers(len(swarm), size=len(inactive))
+
+        copying = swarm.active[polled]
+
+        swarm.update(inactive[copying], hyp_nums=swarm.hyp_nums[polled[copying]])
+
+        selecting = inactive[~copying]
+
+        new_hyps = [DH() for num in range(len(selecting))]
+
+        swarm.update(selecting, hyp_nums=swarm.intern_many(new_hyps))
+
+    return D
+
+
+def T_boolean(TM, swarm):
+    """
+    Boolean testing for the whole of an ArraySwarm at once.
+    """
+
+    def T():
+
+        hyps = swarm.hyps
+
+        swarm.update(
+            slice(None),
+            active=[TM()(hyps[hyp_num]) for hyp_num in swarm.hyp_nums.tolist()],
+        )
+
+    return T
+
+
+def I_sync(D, T, swarm):
+    """
+    Synchronous iteration where both D and T act on the whole swarm.
+    """
+
+    def I():
+
+        D()
+
+        T()
+
+    return I
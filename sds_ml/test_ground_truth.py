@@ -0,0 +1,89 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import io
+import unittest
+import unittest.mock
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds_ml.ground_truth as ground_truth
+import sds_ml.tree_search as tree_search
+
+log = logging.getLogger(__name__)
+
+class TestGroundTruth(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    def test_table(self):
+
+        def subtree_score(leaf_list):
+
+            return sum(node.data for node in leaf_list)/len(leaf_list)
+
+        configurations = [
+            (tree_depth, branch_count, split_num)
+            for tree_depth, branch_count in itertools.product([1, 2, 3], [1, 2, 3, 4])
+            for split_num in range(1, branch_count + 1)
+        ]
+
+        seed = self.rng.random()
+
+        for processes in (1, 2):
+
+            rows = sorted(ground_truth.table(configurations, seed=seed, processes=processes))
+
+            self.assertEqual([row[:3] for row in rows], sorted(configurations))
+
+            for row in rows:
+
+                tree = ground_truth.build_tree(row.depth, row.branch_count, seed)
+
+                scores = [subtree_score(subtree) for subtree in tree_search.get_subtrees(tree, split_num=row.split)]
+
+                self.assertEqual(row.count, len(scores))
+
+                self.assertAlmostEqual(row.best_score, max(scores))
+
+                self.assertGreaterEqual(row.cpu_seconds, 0)
+
+                # Without a pool the tasks run one after another, so the wall
+                # time covers them all.
+                if processes == 1:
+
+                    self.assertGreaterEqual(row.seconds, row.cpu_seconds - 0.001)
+
+        output = io.StringIO()
+
+        ground_truth.write_table(rows, output, "json")
+
+        self.assertEqual(json.loads(output.getvalue())[-1]["count"], rows[-1].count)
+
+    def test_product_best(self):
+
+        stats = [
+            (self.rng.choices(range(10), k=size), self.rng.choices(range(1, 4), k=size))
+            for size in (3, 4, 5)
+        ]
+
+        stats = [(np.array(sums, dtype=float), np.array(counts)) for sums, counts in stats]
+
+        expected = max(
+            sum(stat[0][num] for stat, num in zip(stats, nums)) / sum(stat[1][num] for stat, num in zip(stats, nums))
+            for nums in itertools.product(range(3), range(4), range(5))
+        )
+
+        for chunk_size in (1, 5, 20, 1000):
+
+            with unittest.mock.patch.object(ground_truth, "chunk_size", chunk_size):
+
+                count, best = ground_truth.product_best(stats)
+
+            self.assertEqual(count, 60)
+
+            self.assertAlmostEqual(best, expected)
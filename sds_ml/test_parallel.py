@@ -0,0 +1,92 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import time
+import unittest
+import unittest.mock
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds
+import sds_ml.parallel as parallel
+import sds_ml.swarm
+
+log = logging.getLogger(__name__)
+
+def build_failing(data, swarm, polling, rng):
+
+    raise ValueError("failing builder")
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    def test_polling_swarm(self):
+
+        swarm = sds_ml.swarm.ArraySwarm(agent_count=10)
+
+        polling = parallel.PollingSwarm(swarm=swarm, cross_shard_rate=1, rng=self.rng)
+
+        self.assertEqual(len(polling), 10)
+
+        self.assertIsNone(polling[3].hyp)
+
+        polling.foreign = [sds.Agent(active=True, hyp="foreign")]
+
+        self.assertEqual(polling[3].hyp, "foreign")
+
+        polling.cross_shard_rate = 0
+
+        self.assertIsNone(polling[3].hyp)
+
+    def test_run(self):
+
+        reports = []
+
+        result = parallel.run(
+            "basic",
+            shard_count=2,
+            agent_count=201,
+            epochs=3,
+            iterations_per_epoch=5,
+            seed=1,
+            report=lambda epoch, clusters, shard_reports: reports.append(shard_reports),
+        )
+
+        self.assertEqual(len(reports), 3)
+
+        self.assertEqual(
+            [
+                shard_report.agent_iterations
+                for shard_report in reports[0]
+            ],
+            [101 * 5, 100 * 5],
+        )
+
+        self.assertEqual(len(result["agent_iterations_per_second"]), 2)
+
+        self.assertTrue(all(rate > 0 for rate in result["agent_iterations_per_second"]))
+
+        self.assertLessEqual(sum(result["clusters"].values()), 201)
+
+        self.assertEqual(result["seed"], 1)
+
+        # Each shard has its own stream from the seed, so a run repeats.
+        again = parallel.run("basic", shard_count=2, agent_count=201, epochs=3, iterations_per_epoch=5, seed=1)
+
+        self.assertEqual(again["clusters"], result["clusters"])
+
+    def test_failing_shard(self):
+
+        start = time.perf_counter()
+
+        with unittest.mock.patch.dict(parallel.name2builder, {"basic": build_failing}):
+
+            with self.assertRaisesRegex(RuntimeError, "shard 0 of basic"):
+
+                parallel.run("basic", shard_count=2, agent_count=20, epochs=2, iterations_per_epoch=1, seed=1)
+
+        self.assertLess(time.perf_counter() - start, 10)
@@ -0,0 +1,165 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import pickle
+import statistics
+import unittest
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds
+import sds_ml.clustering.clustering
+import sds_ml.random_pool as random_pool
+import sds_ml.variants as variants
+
+log = logging.getLogger(__name__)
+
+class TestRandomPool(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    def draws(self, rng):
+
+        return [
+            (
+                rng.random(),
+                rng.choice("abcdefg"),
+                rng.randrange(10),
+                rng.randrange(3, 9),
+                rng.randrange(0, 10, 3),
+                rng.randint(1, 6),
+                rng.uniform(-1, 1),
+                rng.gauss(5, 2),
+                rng.getrandbits(64),
+                tuple(rng.sample(range(20), 3)),
+            )
+            for draw_num in range(2000)
+        ]
+
+    def test_reproducible(self):
+
+        seed = self.rng.getrandbits(64)
+
+        pool = random_pool.RandomPool(seed, buffer_size=100)
+
+        self.assertEqual(self.draws(pool), self.draws(random_pool.RandomPool(seed, buffer_size=100)))
+
+        self.assertNotEqual(self.draws(pool), self.draws(random_pool.RandomPool(seed + 1, buffer_size=100)))
+
+        state = pool.getstate()
+
+        copy = pickle.loads(pickle.dumps(pool))
+
+        expected = self.draws(pool)
+
+        self.assertEqual(self.draws(copy), expected)
+
+        pool.setstate(state)
+
+        self.assertEqual(self.draws(pool), expected)
+
+        pool.seed(seed)
+
+        self.assertEqual(self.draws(pool), self.draws(random_pool.RandomPool(seed, buffer_size=100)))
+
+    def test_distributions(self):
+
+        pool = random_pool.RandomPool(self.rng.getrandbits(64))
+
+        counts = collections.Counter(pool.choice(range(5)) for draw_num in range(50000))
+
+        self.assertEqual(set(counts), set(range(5)))
+
+        self.assertTrue(all(abs(count / 50000 - 0.2) < 0.02 for count in counts.values()))
+
+        self.assertEqual({pool.randint(1, 3) for draw_num in range(1000)}, {1, 2, 3})
+
+        self.assertTrue(all(-2 <= pool.uniform(-2, 3) < 3 for draw_num in range(1000)))
+
+        normals = [pool.gauss(1, 2) for draw_num in range(50000)]
+
+        self.assertAlmostEqual(statistics.mean(normals), 1, delta=0.05)
+
+        self.assertAlmostEqual(statistics.stdev(normals), 2, delta=0.05)
+
+        self.assertTrue(0 <= pool.getrandbits(3) < 8)
+
+        self.assertEqual(sorted(pool.sample(range(10), 10)), list(range(10)))
+
+        with self.assertRaises(IndexError):
+
+            pool.choice([])
+
+        # Falls back on random.Random for empty ranges, so raises likewise.
+        with self.assertRaises(ValueError):
+
+            pool.randrange(3, 3)
+
+    def test_same_as_random(self):
+
+        seed = self.rng.getrandbits(64)
+
+        pool = random_pool.RandomPool(seed)
+
+        rng = random.Random(seed)
+
+        # Seeding the Generator takes 128 bits from the Mersenne Twister.
+        rng.getrandbits(128)
+
+        # Only normal draws come from the pool, the rest are random.Random's.
+        self.assertEqual(
+            [(pool.random(), pool.choice("abcdefg"), pool.randrange(3, 9)) for draw_num in range(100)],
+            [(rng.random(), rng.choice("abcdefg"), rng.randrange(3, 9)) for draw_num in range(100)],
+        )
+
+    def test_generators(self):
+
+        dataset = [
+            tuple(self.rng.randint(0, 10) for dimension in range(4)) + (self.rng.random() < 0.4,)
+            for row_num in range(200)
+        ]
+
+        seed = self.rng.getrandbits(64)
+
+        def hyps(rng):
+
+            swarm = sds.Swarm(agent_count=50)
+
+            DH = variants.DH_data_driven(dataset=dataset, swarm=swarm, rng=rng, hyp_table=variants.HypTable())
+
+            D = sds.D_passive(DH, swarm, rng)
+
+            for agent in swarm:
+
+                D(agent)
+
+                agent.active = rng.random() < 0.5
+
+            def describe(hyp):
+
+                return [[str(plane) for plane in intersection] for intersection in hyp]
+
+            return [describe(agent.hyp) for agent in swarm] + [describe(DH()) for hyp_num in range(50)]
+
+        self.assertEqual(hyps(random_pool.RandomPool(seed)), hyps(random_pool.RandomPool(seed)))
+
+        points = [tuple(self.rng.random() for dimension in range(3)) for point_num in range(20)]
+
+        # make_DH scales rng.random draws, but makes the same draws as it
+        # did with rng.uniform.
+        rng = random.Random(seed)
+
+        DH = sds_ml.clustering.clustering.make_DH(points=points, dimension_count=3, max_k=4, rng=random.Random(seed))
+
+        bounds = sds_ml.clustering.clustering.get_bounds(points)
+
+        for hyp_num in range(100):
+
+            k = rng.randint(1, 4)
+
+            expected = tuple(tuple(rng.uniform(*bound) for bound in bounds) for centroid_num in range(k))
+
+            self.assertEqual(DH(), expected)
@@ -0,0 +1,77 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import tempfile
+import unittest
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds_ml.clustering.problem as problem
+import sds_ml.seeding as seeding
+
+log = logging.getLogger(__name__)
+
+class TestSeeding(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    def test_seeds(self):
+
+        self.assertEqual(seeding.make_seed(7), 7)
+
+        self.assertEqual(seeding.make_seed(0), 0)
+
+        self.assertNotEqual(seeding.make_seed(), seeding.make_seed())
+
+        seed = self.rng.getrandbits(64)
+
+        seeds = seeding.spawn_seeds(seed, 8)
+
+        self.assertEqual(seeds, seeding.spawn_seeds(seed, 8))
+
+        self.assertEqual(len(set(seeds)), 8)
+
+        # Adding workers leaves the streams of the others unchanged.
+        self.assertEqual(seeding.spawn_seeds(seed, 10)[:8], seeds)
+
+        self.assertNotIn(seed, seeds)
+
+    def test_generators(self):
+
+        params = dict(lower=0, upper=1, sigma=0.05, dimensions=3, cluster_count=4)
+
+        self.assertEqual(
+            problem.make_a_problem_space(point_count=50, seed=3, **params),
+            problem.make_a_problem_space(point_count=50, seed=3, **params),
+        )
+
+        points, centroids = problem.make_a_stream(drift=0.01, seed=3, **params)
+
+        again, again_centroids = problem.make_a_stream(drift=0.01, seed=3, **params)
+
+        self.assertEqual(list(itertools.islice(points, 100)), list(itertools.islice(again, 100)))
+
+        self.assertEqual(centroids, again_centroids)
+
+    def test_manifest(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+
+            path = seeding.write_manifest(
+                pathlib.Path(directory) / "manifest.json", 5, parameters=dict(agents=10), result=dict(hyp=object())
+            )
+
+            manifest = json.loads(path.read_text())
+
+        self.assertEqual(manifest["seed"], 5)
+
+        self.assertEqual(manifest["parameters"], dict(agents=10))
+
+        self.assertIsInstance(manifest["result"]["hyp"], str)
+
+        self.assertIn("numpy", manifest["machine"])
+
+        self.assertIn("argv", manifest)
@@ -0,0 +1,189 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import unittest
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds
+import sds_ml.swarm as swarm
+
+log = logging.getLogger(__name__)
+
+class TestArraySwarm(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    def test_agent_view(self):
+
+        array_swarm = swarm.ArraySwarm(agent_count=10)
+
+        agent = array_swarm[3]
+
+        self.assertFalse(agent.active)
+
+        self.assertTrue(agent.inactive)
+
+        self.assertIsNone(agent.hyp)
+
+        agent.hyp = "hello"
+
+        agent.active = True
+
+        self.assertEqual(array_swarm[3].hyp, "hello")
+
+        self.assertTrue(array_swarm[-7].active)
+
+        self.assertEqual(sum(1 for agent in array_swarm if agent.active), 1)
+
+        with self.assertRaises(IndexError):
+
+            array_swarm[10]
+
+    def test_clusters(self):
+
+        array_swarm = swarm.ArraySwarm(agent_count=10)
+
+        for num, agent in enumerate(array_swarm):
+
+            agent.hyp = ("a", "b", "c")[num % 3]
+
+            agent.active = num < 8
+
+        self.assertEqual(array_swarm.clusters, collections.Counter(a=3, b=3, c=2))
+
+        cluster = array_swarm.largest_cluster
+
+        self.assertEqual(cluster.agents, 3)
+
+        self.assertAlmostEqual(cluster.size, 0.3)
+
+        self.assertAlmostEqual(array_swarm.activity, 0.8)
+
+    def test_compact(self):
+
+        array_swarm = swarm.ArraySwarm(agent_count=4, max_table_size=8)
+
+        for num in range(100):
+
+            array_swarm[num % 4].hyp = (num,)
+
+            self.assertLessEqual(len(array_swarm.hyps), 8)
+
+        self.assertEqual([agent.hyp for agent in array_swarm], [(96,), (97,), (98,), (99,)])
+
+    def test_standard_sds(self):
+
+        array_swarm = swarm.ArraySwarm(agent_count=1000)
+
+        DH = sds.DH_uniform(hypotheses=range(10), rng=self.rng)
+
+        def TM():
+
+            return lambda hyp: hyp == 7 or self.rng.random() < 0.1
+
+        for D, T, I_sync in (
+            (sds.D_passive(DH, array_swarm, self.rng), sds.T_boolean(TM), sds.I_sync),
+            (
+                swarm.D_passive(DH, array_swarm, self.rng),
+                swarm.T_boolean(TM, array_swarm),
+                swarm.I_sync,
+            ),
+        ):
+
+            I = I_sync(D=D, T=T, swarm=array_swarm)
+
+            sds.SDS(I=I, H=sds.H_fixed(50))
+
+            log.info("clusters: %s", array_swarm.clusters)
+
+            self.assertEqual(array_swarm.largest_cluster.hyp, 7)
+
+            self.assertLess(len(array_swarm.hyps), array_swarm.max_table_size)
+
+    def test_cluster_tracking(self):
+
+        array_swarm = swarm.ArraySwarm(agent_count=200, max_table_size=64)
+
+        DH = sds.DH_uniform(hypotheses=[(num % 7,) for num in range(20)], rng=self.rng)
+
+        def TM():
+
+            return lambda hyp: hyp[0] < 3 or self.rng.random() < 0.2
+
+        D = swarm.D_passive(DH, array_swarm, self.rng)
+
+        T = swarm.T_boolean(TM, array_swarm)
+
+        for iteration in range(30):
+
+            D()
+
+            T()
+
+            for agent_num in self.rng.sample(range(len(array_swarm)), 5):
+
+                array_swarm[agent_num].hyp = DH()
+
+                array_swarm[agent_num].active = self.rng.random() < 0.5
+
+            expected = array_swarm.recount()
+
+            self.assertEqual(array_swarm.clusters, expected)
+
+            self.assertEqual(len(array_swarm.clusters), len(expected))
+
+            self.assertEqual(
+                [count for hyp, count in array_swarm.clusters.most_common(3)],
+                [count for hyp, count in expected.most_common(3)],
+            )
+
+            self.assertEqual(array_swarm.largest_cluster.agents, expected.most_common(1)[0][1])
+
+            held = {id(agent.hyp) for agent in array_swarm if agent.active}
+
+            self.assertTrue(all(id(hyp) in held for hyp, count in array_swarm.clusters.most_common(3)))
+
+        self.assertEqual(array_swarm.clusters[("missing",)], 0)
+
+    def test_held_hyp(self):
+
+        class Hyp(collections.namedtuple("Hyp", "name threshold")):
+
+            # Equal whatever the threshold, as Plane is.
+            def __eq__(self, other):
+
+                return self.name == other.name
+
+            def __hash__(self):
+
+                return hash(self.name)
+
+        array_swarm = swarm.ArraySwarm(agent_count=4)
+
+        first, second = Hyp("a", 1), Hyp("a", 2)
+
+        for agent, hyp in zip(array_swarm, (first, second, second, Hyp("b", 3))):
+
+            agent.hyp = hyp
+
+            agent.active = True
+
+        self.assertIs(array_swarm.largest_cluster.hyp, first)
+
+        array_swarm[0].active = False
+
+        self.assertIs(array_swarm.largest_cluster.hyp, second)
+
+        array_swarm.update(slice(0, 3), hyp_nums=array_swarm.intern_many([first] * 3), active=[True, True, False])
+
+        self.assertIs(array_swarm.clusters.most_common(1)[0][0], first)
+
+        self.assertEqual(
+            array_swarm.table_counts[:len(array_swarm.hyps)].tolist(),
+            np.bincount(array_swarm.hyp_nums[array_swarm.active], minlength=len(array_swarm.hyps)).tolist(),
+        )
@@ -0,0 +1,76 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import unittest
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds_ml.trace as trace
+import sds_ml.tree_sds as tree_sds
+import sds_ml.tree_search as tree_search
+
+log = logging.getLogger(__name__)
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+    def test_tracing(self):
+
+        tree = tree_search.build_tree(depth=4, branch_count=3)
+
+        events = []
+
+        with trace.tracing(sink=lambda name, fields: events.append((name, fields))) as counts:
+
+            self.assertTrue(trace.enabled)
+
+            node_count = sum(1 for node in tree.bredth_first())
+
+            hyp = tree_sds.Hyp.first_split(rng=self.rng, tree=tree, split_num=2)
+
+            for split_count in range(3):
+
+                hyp = hyp.random_split(tree=tree, rng=self.rng, split_num=2)
+
+            for prune_count in range(4):
+
+                hyp = hyp.random_prune(rng=self.rng)
+
+        self.assertFalse(trace.enabled)
+
+        self.assertEqual(counts, collections.Counter(visit=node_count, split=3, prune=4))
+
+        self.assertEqual(len(events), node_count + 7)
+
+        self.assertEqual(hyp, tree_sds.Hyp(root_split=None))
+
+        # Nothing is counted once tracing is off again.
+        before = trace.counts.copy()
+
+        sum(1 for node in tree.depth_first())
+
+        tree_sds.Hyp.first_split(rng=self.rng, tree=tree, split_num=2).random_split(tree=tree, rng=self.rng, split_num=2)
+
+        self.assertEqual(trace.counts, before)
+
+    def test_nested_tracing(self):
+
+        tree = tree_search.build_tree(depth=2, branch_count=3)
+
+        with trace.tracing() as outer:
+
+            sum(1 for node in tree.depth_first())
+
+            with trace.tracing(sink=trace.log_sink()) as inner:
+
+                sum(1 for node in tree.bredth_first())
+
+            self.assertTrue(trace.enabled)
+
+        self.assertEqual(inner, collections.Counter(visit=4))
+
+        self.assertEqual(outer, collections.Counter(visit=8))
@@ -216,3 +216,252 @@ class TestTreeSds(unittest.TestCase):
         #log.info("%s", hyp3)
 
         #leaf_split_count = tree_sds.count_leaf_splits
+
+
+    def test_flat_tree_hyp(self):
+
+        tree = tree_search.build_flat_tree(depth=5, branch_count=10)
+
+        hyp = tree_sds.Hyp.first_split(rng=self.rng, tree=tree, split_num=4)
+
+        for split_count in range(10):
+
+            hyp = hyp.random_split(tree=tree, rng=self.rng, split_num=4)
+
+        self.assertEqual(hyp.count_leaf_splits(), hyp.root_split.deep_clone().count_leaf_splits())
+
+        log.info("flat tree hyp: %s", hyp)
+
+    def test_implicit_tree_hyp(self):
+
+        tree = tree_search.build_implicit_tree(depth=20, branch_count=10 ** 6, cache_size=64)
+
+        hyp = tree_sds.Hyp.first_split(rng=self.rng, tree=tree, split_num=4)
+
+        for split_count in range(30):
+
+            hyp = hyp.random_split(tree=tree, rng=self.rng, split_num=4)
+
+        self.assertEqual(hyp.count_splittable_leaf_nodes(), 4 + 30 * 3)
+
+        for prune_count in range(30):
+
+            hyp = hyp.random_prune(rng=self.rng)
+
+        self.assertEqual(hyp.count_splittable_leaf_nodes(), 4)
+
+        log.info("implicit tree hyp: %s", hyp)
+
+    def test_persistent_split(self):
+
+        hyp = tree_sds.Hyp.first_split(rng=self.rng, tree=self.tree, split_num=3)
+
+        for step in range(200):
+
+            if hyp.root_split is None or self.rng.random() < 0.6 and hyp.count_splittable_leaf_nodes():
+
+                new_hyp = hyp.random_split(tree=self.tree, rng=self.rng, split_num=3)
+
+            else:
+
+                new_hyp = hyp.random_prune(rng=self.rng)
+
+            if hyp.root_split is not None:
+
+                before = str(hyp)
+
+                split = hyp.root_split.to_split()
+
+                # The mutable form agrees on the cached counts, and the
+                # original is untouched by the change.
+                self.assertEqual(split.count_leaf_splits(), hyp.count_leaf_splits())
+
+                self.assertEqual(split.count_splittable_leaf_nodes(), hyp.count_splittable_leaf_nodes())
+
+                self.assertEqual(str(hyp), before)
+
+                self.assertEqual(str(tree_sds.PersistentSplit.from_split(split)), before)
+
+                if new_hyp.root_split is not None:
+
+                    shared = set(map(id, hyp.root_split.members)) & set(map(id, new_hyp.root_split.members))
+
+                    self.assertGreaterEqual(len(shared), len(hyp.root_split.members) - 1)
+
+            hyp = new_hyp
+
+    def test_split_too_few_children(self):
+
+        # The root's children have 1, 3 and 0 children, the grandchildren
+        # with children have 2 and 1.
+        tree = tree_search.FlatTree(child_count=[3, 1, 3, 0, 0, 2, 1, 0, 0, 0, 0]).root
+
+        hyp = tree_sds.Hyp.first_split(rng=self.rng, tree=tree, split_num=2)
+
+        for step in range(100):
+
+            if hyp.root_split is not None and hyp.count_splittable_leaf_nodes() and self.rng.random() < 0.6:
+
+                new_hyp = hyp.random_split(tree=tree, rng=self.rng, split_num=2)
+
+            elif hyp.root_split is not None:
+
+                new_hyp = hyp.random_prune(rng=self.rng)
+
+            else:
+
+                new_hyp = tree_sds.Hyp.first_split(rng=self.rng, tree=tree, split_num=2)
+
+            # Only nodes with at least split_num children are splittable.
+            self.assertEqual(
+                new_hyp.count_splittable_leaf_nodes(),
+                sum(1 for leaf in new_hyp.leaves(tree) if len(leaf.children) >= 2) if new_hyp.root_split else 0,
+            )
+
+            self.assertEqual(
+                new_hyp.root_split and new_hyp.root_split.to_split().count_splittable_leaf_nodes(),
+                new_hyp.root_split and new_hyp.count_splittable_leaf_nodes(),
+            )
+
+            hyp = new_hyp
+
+    def test_indexed_split(self):
+
+        persistent = tree_sds.Hyp.first_split(rng=self.rng, tree=self.tree, split_num=3).root_split
+
+        split = persistent.to_split()
+
+        for step in range(200):
+
+            if self.rng.random() < 0.6 and split.count_splittable_leaf_nodes():
+
+                node_num = self.rng.randrange(split.count_splittable_leaf_nodes())
+
+                seed = self.rng.random()
+
+                split.split_node(node_num=node_num, split_num=3, rng=random.Random(seed))
+
+                persistent = persistent.split_node(node_num=node_num, split_num=3, rng=random.Random(seed))
+
+            elif not split.is_leaf_split():
+
+                leaf_num = self.rng.randrange(split.count_leaf_splits())
+
+                split.prune_leaf(leaf_num=leaf_num)
+
+                persistent = persistent.prune_leaf(leaf_num=leaf_num)
+
+            self.assertEqual(str(split), str(persistent))
+
+            # The counts kept up to date agree with counting from scratch.
+            recounted = tree_sds.PersistentSplit.from_split(split.deep_clone())
+
+            self.assertEqual(
+                (split.count_leaf_splits(), split.count_splittable_leaf_nodes()),
+                (recounted.count_leaf_splits(), recounted.count_splittable_leaf_nodes()),
+            )
+
+        with self.assertRaises(IndexError):
+
+            split.split_node(node_num=split.count_splittable_leaf_nodes(), split_num=3, rng=self.rng)
+
+    def test_tree_search_sds(self):
+
+        values = {"r": 0.1, "r0": 0.0, "r1": 1.0, "r2": 1.0, "r3": 0.0}
+
+        tree = tree_search.build_tree(depth=2, branch_count=4, data_f=lambda node: values[node.name])
+
+        result = tree_sds.run(tree=tree, split_num=2, agent_count=200, rng=random.Random(1), max_iterations=1000)
+
+        self.assertEqual([node.name for node in result["optimum"].leaves], ["r1", "r2"])
+
+        self.assertEqual(str(result["hyp"]), "[r1, r2]")
+
+        self.assertAlmostEqual(result["score"], 1.0)
+
+        self.assertIsNotNone(result["optimum_iteration"])
+
+        self.assertGreater(result["agent_iterations_per_second"], 0)
+
+        tree = tree_search.build_tree(depth=4, branch_count=3, data_f=lambda node: self.rng.random())
+
+        result = tree_sds.run(tree=tree, split_num=2, agent_count=200, rng=self.rng, max_iterations=300)
+
+        self.assertLessEqual(result["iterations"], 300)
+
+        self.assertLessEqual(result["score"], result["optimum"].score + 1e-9)
+
+        tree = tree_search.build_tree(depth=2, branch_count=2)
+
+        with self.assertRaises(ValueError):
+
+            tree_sds.run(tree=tree, split_num=3, agent_count=10, rng=self.rng)
+
+        # A root with too few children is never split.
+        DD = tree_sds.DD_tree(tree=tree, split_num=3, rng=self.rng, split_rate=1.0)
+
+        hyp = tree_sds.Hyp(root_split=None)
+
+        self.assertIs(DD(hyp), hyp)
+
+    def test_game_tree_swarm(self):
+
+        tree = tree_search.build_tree(
+            depth=4, branch_count=4, data_f=lambda node: 1.0 if node.name.startswith("r21") else 0.2
+        )
+
+        swarm = tree_sds.GameTreeSwarm(root=tree, agent_count=500, rng=self.rng)
+
+        for iteration in range(50):
+
+            swarm()
+
+            self.assertEqual(len(swarm), 500)
+
+            # Agents only ever live at nodes with children.
+            self.assertTrue(all(len(node.children) for node in swarm.populations))
+
+        self.assertEqual([node.name for node in swarm.best_path()[:3]], ["r", "r2", "r21"])
+
+        # Backscattering moves every inactive agent up one level at once.
+        swarm = tree_sds.GameTreeSwarm(root=tree, agent_count=0, rng=self.rng)
+
+        child = tree.children[1]
+
+        grandchild = child.children[2]
+
+        swarm.population(child)[0] = 3
+
+        swarm.population(grandchild)[0] = 5
+
+        # Visit the deeper node first, which would carry its agents to the root.
+        swarm.populations = {node: swarm.populations[node] for node in [grandchild, child, tree]}
+
+        swarm.backscatter()
+
+        self.assertEqual(int(swarm.populations[tree].sum()), 12)
+
+        self.assertEqual(int(swarm.populations[child].sum()), 20)
+
+        self.assertFalse(swarm.populations[grandchild].any())
+
+        # Playouts are batched, but every agent is tested at a leaf.
+        best = tree.children[2].children[1]
+
+        self.assertEqual(best.name, "r21")
+
+        self.assertEqual(swarm.playouts(best, 1000), 1000)
+
+        self.assertEqual(swarm.playouts(best, 0), 0)
+
+        active = swarm.playouts(tree.children[0], 10000)
+
+        self.assertTrue(1700 < active < 2300, active)
+
+        tree = tree_search.ImplicitTree(depth=12, branch_count=10, seed=self.rng.random(), cache_size=1024)
+
+        result = tree_sds.run_game_tree(root=tree.root, agent_count=200, iterations=10, rng=self.rng)
+
+        self.assertLessEqual(result["max_populations"], 200)
+
+        self.assertEqual(result["path"][0], tree.root)
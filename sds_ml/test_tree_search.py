@@ -7,6 +7,7 @@ import sds_ml.tree_search as tree_search
 
 log = logging.getLogger(__name__)
 
+
 class TestTreeSearch(unittest.TestCase):
 
     def setUp(self):
@@ -184,6 +185,305 @@ class TestTreeSearch(unittest.TestCase):
 
         
 
+    def test_subtree_space(self):
+
+        for tree_depth, branch_count, split_num in itertools.product([1, 2, 3], [1, 2, 3, 4], [1, 2, 3]):
+
+            tree = tree_search.build_tree(depth=tree_depth, branch_count=branch_count)
+
+            space = tree_search.SubtreeSpace(split_num=split_num)
+
+            subtrees = [list(subtree) for subtree in tree_search.get_subtrees(tree, split_num=split_num)]
+
+            self.assertEqual(space.count(tree), len(subtrees))
+
+            for num, subtree in enumerate(subtrees):
+
+                self.assertEqual(space.unrank(tree, num), subtree)
+
+                self.assertEqual(space.rank(tree, subtree), num)
+
+        self.assertEqual(
+            tree_search.count_subtrees(tree_search.build_tree(depth=4, branch_count=4), split_num=3),
+            503006005,
+        )
+
+        with self.assertRaises(IndexError):
+
+            space.unrank(tree, space.count(tree))
+
+    def test_subtree_space_sample(self):
+
+        self.rng.seed(1)
+
+        tree = tree_search.build_tree(depth=3, branch_count=3)
+
+        space = tree_search.SubtreeSpace(split_num=2)
+
+        samples = collections.Counter(
+            space.rank(tree, space.sample(tree, rng=self.rng))
+            for sample_num in range(49 * 200)
+        )
+
+        self.assertEqual(set(samples), set(range(49)))
+
+        self.assertLess(max(samples.values()), 300)
+
+        self.assertGreater(min(samples.values()), 120)
+
+        big_tree = tree_search.build_tree(depth=5, branch_count=5)
+
+        big_space = tree_search.SubtreeSpace(split_num=3)
+
+        log.info("depth 5, branch count 5, split 3: %s subtrees", big_space.count(big_tree))
+
+        for sample_num in range(20):
+
+            subtree = big_space.sample(big_tree, rng=self.rng)
+
+            self.assertEqual(big_space.unrank(big_tree, big_space.rank(big_tree, subtree)), subtree)
+
+    def test_subtree_solver(self):
+
+        def node_num(node):
+
+            return self.rng.random()
+
+        def subtree_score(leaf_list):
+
+            return sum(node.data for node in leaf_list)/len(leaf_list)
+
+        for tree_depth, branch_count, split_num in itertools.product([1, 2, 3], [1, 2, 3, 4], [1, 2, 3]):
+
+            tree = tree_search.build_tree(depth=tree_depth, branch_count=branch_count, data_f=node_num)
+
+            best_tree = max(tree_search.get_subtrees(tree, split_num=split_num), key=subtree_score)
+
+            solution = tree_search.best_subtree(tree, split_num=split_num)
+
+            self.assertAlmostEqual(solution.score, subtree_score(best_tree))
+
+            self.assertAlmostEqual(subtree_score(solution.leaves), solution.score)
+
+            self.assertEqual(
+                tree_search.SubtreeSpace(split_num=split_num).unrank(
+                    tree,
+                    tree_search.SubtreeSpace(split_num=split_num).rank(tree, solution.leaves),
+                ),
+                solution.leaves,
+            )
+
+            penalised = tree_search.SubtreeSolver(tree, split_num=split_num).parametric(penalty=0.4)
+
+            self.assertAlmostEqual(
+                penalised.score,
+                max(
+                    sum(node.data - 0.4 for node in subtree)
+                    for subtree in tree_search.get_subtrees(tree, split_num=split_num)
+                ),
+            )
+
+    def test_subtree_solver_leaf_data(self):
+
+        for tree_depth, branch_count, split_num in itertools.product([2, 3], [2, 3, 4], [1, 2, 3]):
+
+            if split_num > branch_count:
+
+                continue
+
+            def leaf_num(node):
+
+                return self.rng.random() if len(node.index) == tree_depth else None
+
+            tree = tree_search.build_tree(depth=tree_depth, branch_count=branch_count, data_f=leaf_num)
+
+            # Only subtrees reaching the bottom of the tree have a score.
+            best_score = max(
+                sum(node.data for node in subtree) / len(subtree)
+                for subtree in tree_search.get_subtrees(tree, split_num=split_num)
+                if all(node.data is not None for node in subtree)
+            )
+
+            for root in (tree, tree_search.FlatTree.from_node(tree).root):
+
+                solution = tree_search.best_subtree(root, split_num=split_num)
+
+                self.assertAlmostEqual(solution.score, best_score)
+
+                self.assertTrue(all(leaf.data is not None for leaf in solution.leaves))
+
+        with self.assertRaises(ValueError):
+
+            tree_search.best_subtree(tree_search.build_tree(depth=2, branch_count=2), split_num=1)
+
+    def test_subtree_solver_missing_data(self):
+
+        def sparse_num(node):
+
+            return None if self.rng.random() < 0.4 else self.rng.random()
+
+        for tree_depth, branch_count, split_num in itertools.product([2, 3], [2, 3, 4], [1, 2, 3]):
+
+            if split_num > branch_count:
+
+                continue
+
+            for tree_num in range(5):
+
+                tree = tree_search.build_tree(depth=tree_depth, branch_count=branch_count, data_f=sparse_num)
+
+                tree.data = self.rng.random()
+
+                solution = tree_search.best_subtree(tree, split_num=split_num)
+
+                flat_solution = tree_search.best_subtree(tree_search.FlatTree.from_node(tree).root, split_num=split_num)
+
+                self.assertAlmostEqual(flat_solution.score, solution.score)
+
+                self.assertEqual(
+                    [node.name for node in flat_solution.leaves],
+                    [node.name for node in solution.leaves],
+                )
+
+                self.assertAlmostEqual(
+                    sum(node.data for node in flat_solution.leaves) / len(flat_solution.leaves),
+                    flat_solution.score,
+                )
+
+        # Too few feasible children to split the root three ways.
+        flat_tree = tree_search.FlatTree(child_count=[3, 0, 0, 0], values=[0.1, 0.9, float("nan"), 0.8])
+
+        solution = tree_search.best_subtree(flat_tree.root, split_num=3)
+
+        self.assertEqual([node.name for node in solution.leaves], ["r"])
+
+        self.assertAlmostEqual(solution.score, 0.1)
+
+    def test_flat_tree(self):
+
+        def node_num(node):
+
+            return self.rng.random()
+
+        for tree_depth, branch_count in itertools.product([1, 2, 3], [1, 2, 3, 4]):
+
+            tree = tree_search.build_tree(depth=tree_depth, branch_count=branch_count, data_f=node_num)
+
+            flat_tree = tree_search.FlatTree.from_node(tree).root
+
+            self.assertEqual(
+                [(node.name, node.index, node.data) for node in flat_tree.bredth_first()],
+                [(node.name, node.index, node.data) for node in tree.bredth_first()],
+            )
+
+            self.assertEqual(
+                [node.name for node in flat_tree.depth_first()],
+                [node.name for node in tree.depth_first()],
+            )
+
+            for split_num in range(1, branch_count + 1):
+
+                self.assertEqual(
+                    [[node.name for node in subtree] for subtree in tree_search.get_subtrees(flat_tree, split_num=split_num)],
+                    [[node.name for node in subtree] for subtree in tree_search.get_subtrees(tree, split_num=split_num)],
+                )
+
+                for penalty in (0, 0.4):
+
+                    solution = tree_search.SubtreeSolver(tree, split_num=split_num).parametric(penalty=penalty)
+
+                    flat_solution = tree_search.SubtreeSolver(flat_tree, split_num=split_num).parametric(penalty=penalty)
+
+                    self.assertAlmostEqual(flat_solution.score, solution.score)
+
+                    self.assertEqual(
+                        [node.name for node in flat_solution.leaves],
+                        [node.name for node in solution.leaves],
+                    )
+
+        built = tree_search.build_flat_tree(depth=3, branch_count=3, data_f=lambda node: len(node.name))
+
+        self.assertEqual(
+            [(node.name, node.data) for node in built.bredth_first()],
+            [(node.name, len(node.name)) for node in tree_search.build_tree(depth=3, branch_count=3).bredth_first()],
+        )
+
+    def test_implicit_tree(self):
+
+        for tree_depth, branch_count in itertools.product([1, 2, 3], [1, 2, 3, 4]):
+
+            tree = tree_search.build_tree(depth=tree_depth, branch_count=branch_count)
+
+            implicit_tree = tree_search.build_implicit_tree(depth=tree_depth, branch_count=branch_count, cache_size=4)
+
+            self.assertEqual(
+                [(node.name, node.index, node.child_num) for node in implicit_tree.bredth_first()],
+                [(node.name, node.index, node.child_num) for node in tree.bredth_first()],
+            )
+
+            self.assertEqual(
+                [node.name for node in implicit_tree.depth_first()],
+                [node.name for node in tree.depth_first()],
+            )
+
+            for split_num in range(1, branch_count + 1):
+
+                self.assertEqual(
+                    tree_search.count_subtrees(implicit_tree, split_num=split_num),
+                    len(list(tree_search.get_subtrees(tree, split_num=split_num))),
+                )
+
+        implicit_tree = tree_search.ImplicitTree(depth=30, branch_count=10 ** 9, seed=1, cache_size=16)
+
+        node = implicit_tree.root
+
+        path = []
+
+        for depth in range(29):
+
+            child_num = self.rng.randrange(len(node.children))
+
+            node = node.children[child_num]
+
+            path.append(child_num)
+
+        self.assertEqual(len(node.children), 0)
+
+        self.assertEqual(len(implicit_tree.path2node), 16)
+
+        # Forgotten nodes come back equal and with the same data.
+        self.assertEqual(implicit_tree.node(()), implicit_tree.root)
+
+        self.assertEqual(
+            implicit_tree.node(tuple(path[:3])).data,
+            tree_search.seeded_value(1, tuple(path[:3])),
+        )
+
+        self.assertEqual(node.parent.parent, implicit_tree.node(tuple(path[:-2])))
+
+        self.assertNotEqual(
+            tree_search.ImplicitTree(depth=3, branch_count=3, seed=2).node((1,)).data,
+            tree_search.ImplicitTree(depth=3, branch_count=3, seed=1).node((1,)).data,
+        )
+
+    def test_subtree_space_views(self):
+
+        tree = tree_search.build_tree(depth=3, branch_count=3)
+
+        # Nodes of these trees are views made afresh on every access.
+        for view_tree in (
+            tree_search.FlatTree.from_node(tree).root,
+            tree_search.build_implicit_tree(depth=3, branch_count=3, cache_size=4),
+        ):
+
+            space = tree_search.SubtreeSpace(split_num=2)
+
+            self.assertEqual(space.count(view_tree), 49)
+
+            for num in range(space.count(view_tree)):
+
+                self.assertEqual(space.rank(view_tree, space.unrank(view_tree, num)), num)
+
     def test_foo(self):
 
         six = 6
@@ -0,0 +1,179 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import unittest
+import operator
+import pickle
+import subprocess
+import sys
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import sds
+import sds_ml.compiled as compiled
+import sds_ml.variants as variants
+
+log = logging.getLogger(__name__)
+
+class TestVariants(unittest.TestCase):
+
+    def setUp(self):
+
+        logging.basicConfig(level=logging.DEBUG)
+
+        self.log = logging.getLogger(__file__)
+
+        self.rng = random.Random()
+
+        self.dataset = [
+            tuple(self.rng.randint(0, 10) for dimension in range(4)) + (self.rng.random() < 0.4,)
+            for row_num in range(200)
+        ]
+
+    def test_compile_plane_union(self):
+
+        DH = variants.DH_plane_union(dataset=self.dataset, rng=self.rng)
+
+        for num in range(50):
+
+            hyp = DH()
+
+            union = compiled.compile_hyp(hyp, set_type="union")
+
+            intersection = compiled.compile_hyp(hyp, set_type="intersection")
+
+            for row in self.dataset:
+
+                self.assertEqual(
+                    union(row),
+                    any(plane.operator(row[plane.dimension], plane.threshold) for plane in hyp),
+                )
+
+                self.assertEqual(
+                    intersection(row),
+                    all(plane.operator(row[plane.dimension], plane.threshold) for plane in hyp),
+                )
+
+            self.assertEqual(list(union.evaluate_rows(self.dataset)), [union(row) for row in self.dataset])
+
+            self.assertEqual(
+                list(intersection.evaluate_rows(self.dataset)),
+                [intersection(row) for row in self.dataset],
+            )
+
+    def test_compile_data_driven(self):
+
+        swarm = sds.Swarm(agent_count=10)
+
+        DH = variants.DH_data_driven(dataset=self.dataset, swarm=swarm, rng=self.rng)
+
+        for num in range(50):
+
+            hyp = DH()
+
+            compiled_hyp = compiled.compile_hyp(hyp)
+
+            log.info("%s", compiled_hyp)
+
+            expected = [
+                any(all(plane(row) for plane in intersection) for intersection in hyp)
+                for row in self.dataset
+            ]
+
+            self.assertEqual([compiled_hyp(row) for row in self.dataset], expected)
+
+            self.assertEqual(list(compiled_hyp.evaluate_rows(self.dataset)), expected)
+
+    def test_compile_memoised(self):
+
+        hyp = variants.DimensionThreshold(dimension=1, operator=operator.lt, threshold=5)
+
+        same_hyp = variants.DimensionThreshold(dimension=1, operator=operator.lt, threshold=5)
+
+        self.assertIs(compiled.compile_hyp(hyp), compiled.compile_hyp(hyp))
+
+        self.assertIs(compiled.compile_hyp(hyp), compiled.compile_hyp(same_hyp))
+
+        TM, microtest = variants.TM_plane(dataset=self.dataset, rng=self.rng)
+
+        for row in self.dataset:
+
+            self.assertEqual(microtest(hyp, row), (row[1] < 5) == row[-1])
+
+    def test_hyp_table(self):
+
+        hyp_table = variants.HypTable()
+
+        swarm = sds.Swarm(agent_count=10)
+
+        DH = variants.DH_data_driven(dataset=self.dataset, swarm=swarm, rng=self.rng, hyp_table=hyp_table)
+
+        hyps = [DH() for num in range(200)]
+
+        for hyp in hyps:
+
+            rebuilt = variants.IndexSet(
+                variants.IndexSet(
+                    variants.Plane(plane.dimension, plane.operator, plane.threshold)
+                    for plane in reversed(intersection)
+                )
+                for intersection in reversed(hyp)
+            )
+
+            self.assertIsNot(rebuilt, hyp)
+
+            self.assertIs(hyp_table.intern(rebuilt), hyp)
+
+            self.assertEqual(hash(rebuilt), hash(hyp))
+
+        plane = hyp_table.plane(1, operator.lt, 5)
+
+        self.assertIs(hyp_table.plane(1, operator.lt, 5), plane)
+
+        self.assertIsNot(hyp_table.plane(1, operator.lt, 6), plane)
+
+        self.assertEqual(hyp_table.plane(1, operator.lt, 6), plane)
+
+        hyp_table.clear()
+
+        self.assertIsNot(hyp_table.plane(1, operator.lt, 5), plane)
+
+        self.assertEqual(len(hyp_table), 1)
+
+    def test_pickled_hyp_hash(self):
+
+        plane = variants.Plane(1, operator.lt, 0.5)
+
+        hyp = variants.IndexSet([variants.IndexSet([plane, variants.Plane(2, operator.gt, 3)])])
+
+        # Unpickled in another interpreter, where the operator has another
+        # address, equal hypotheses must still hash alike.
+        script = (
+            "import operator, pickle, sys\n"
+            "import sds_ml.variants as variants\n"
+            "plane, hyp = pickle.loads(sys.stdin.buffer.read())\n"
+            "same = variants.IndexSet([variants.IndexSet([variants.Plane(1, operator.lt, 0.5), variants.Plane(2, operator.gt, 3)])])\n"
+            "print(plane in {variants.Plane(1, operator.lt, 0.5): 1}, hyp in {same: 1})\n"
+        )
+
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            input=pickle.dumps((plane, hyp)),
+            capture_output=True,
+            check=True,
+        ).stdout
+
+        self.assertEqual(output.split(), [b"True", b"True"])
+
+    def test_I_report(self):
+
+        calls = []
+
+        reports = []
+
+        I = variants.I_report(I=lambda: calls.append(None), report_num=3, report_function=reports.append)
+
+        for iteration in range(10):
+
+            I()
+
+        self.assertEqual(len(calls), 10)
+
+        self.assertEqual(reports, [3, 6, 9])
@@ -0,0 +1,92 @@
+import collections, datetime, functools, itertools
+import json, logging, pathlib, random, re
+import contextlib
+from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+SILENT = 0
+
+log = logging.getLogger(__name__)
+
+# Opt in instrumentation for the hot paths of tree search. Instrumented code
+# checks enabled before doing anything else, so with tracing off an event
+# costs one attribute lookup and nothing is formatted.
+enabled = False
+
+counts = collections.Counter()
+
+sinks = []
+
+
+def event(name, **fields):
+    """
+    Counts an event by name and passes it, with its fields, to each sink.
+    Callers check enabled first:
+
+        if trace.enabled:
+
+            trace.event("split", node=member)
+    """
+
+    counts[name] += 1
+
+    for sink in sinks:
+
+        sink(name, fields)
+
+
+def log_sink(level=DEBUG):
+    """
+    Returns a sink which logs each event at level.
+    """
+
+    def sink(name, fields):
+
+        log.log(level, "%s %s", name, fields)
+
+    return sink
+
+
+@contextlib.contextmanager
+def tracing(sink=None):
+    """
+    Enables tracing within a with block, yielding a Counter of the events
+    raised within it. Tracing is restored to its previous state afterwards,
+    so blocks may be nested.
+
+    Keyword arguments:
+    sink -- called with (name, fields) for each event (optional)
+    """
+
+    global enabled
+
+    previous = enabled
+
+    start = counts.copy()
+
+    block_counts = collections.Counter()
+
+    enabled = True
+
+    if sink is not None:
+
+        sinks.append(sink)
+
+    try:
+
+        yield block_counts
+
+    finally:
+
+        if sink is not None:
+
+            sinks.remove(sink)
+
+        enabled = previous
+
+        block_counts.update(counts)
+
+        block_counts.subtract(start)
+
+        # Counter.subtract keeps zero counts, the block only reports events.
+        for name in [name for name, count in block_counts.items() if count <= 0]:
+
+            del block_counts[name]
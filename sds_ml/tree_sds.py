@@ -1,80 +1,62 @@
 import collections, datetime, functools, itertools
 import json, logging, pathlib, random, re
+import argparse
+import time
 from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds_ml.seeding
+import sds_ml.swarm
+import sds_ml.trace as trace
 import sds_ml.tree_search as tree_search
 import sds
 SILENT = 0
 
 log = logging.getLogger(__name__)
 
-def DH_tree(tree, rng):
-
-    def DH(hyp):
-
-        if hyp:
-
-            return frozenset(rng.sample(hyp, len(hyp)-1))
-
-        else:
-
-            return frozenset()
-
-def DD_tree(tree, split_num, rng):
-
-    def DD(hyp):
-
-        if hyp:
-
-            mutable_hyp = list(hyp)
-
-            random_index = rng.randrange(len(mutable_hyp))
+class Hyp:
 
-            leaf_split = mutable_hyp.pop(random_index)
+    def __init__(self, root_split):
 
+        self.root_split = root_split
 
+    def __str__(self):
 
-        else:
+        if self.root_split is None:
 
-            leaf_split = tree
+            return "[root]"
 
+        return str(self.root_split)
 
-def count_leaf_splits(hyp):
+    def __eq__(self, other):
 
-    leaf_split_count = 0
+        return isinstance(other, Hyp) and self.root_split == other.root_split
 
-    if all(isinstance(item, tree_search.Node) for item in hyp):
+    def __hash__(self):
 
-        return 1
+        return hash(self.root_split)
 
-    return sum(
-        count_leaf_splits(item)
-        for item
-        in hyp
-        if not isinstance(item, tree_search.Node)
-    )
-
-def prune(hyp, rng):
+    def leaves(self, tree):
+        """
+        Returns the leaf nodes of the hypothesised subtree of tree, depth
+        first.
+        """
 
-    leaf_split_count = count_leaf_splits(hyp)
+        if self.root_split:
 
-    prune_index = rng.randrange(leaf_split_count)
+            return self.root_split.leaves()
 
+        return (tree,)
 
-    
-class Hyp:
+    def score(self, tree):
 
-    def __init__(self, root_split):
+        leaves = self.leaves(tree)
 
-        self.root_split = root_split
-
-    def __str__(self):
-
-        return str(self.root_split)
+        return sum(leaf.data for leaf in leaves) / len(leaves)
 
     def first_split(rng, tree, split_num):
 
         return Hyp(
-            root_split=Split(
+            root_split=PersistentSplit(
                 members=sorted(
                     rng.sample(tree.children, split_num),
                     key=lambda node: node.index,
@@ -86,15 +68,11 @@ class Hyp:
 
         if self.root_split:
 
-            leaf_node_count = self.count_splittable_leaf_nodes()
+            root_split = PersistentSplit.from_split(self.root_split)
 
-            node_index = rng.randrange(leaf_node_count)
+            node_index = rng.randrange(root_split.count_splittable_leaf_nodes())
 
-            clone_split = self.root_split.deep_clone()
-
-            clone_split.split_node(node_num=node_index, split_num=split_num, rng=rng)
-
-            return Hyp(root_split=clone_split)
+            return Hyp(root_split=root_split.split_node(node_num=node_index, split_num=split_num, rng=rng))
 
         else:
 
@@ -102,17 +80,11 @@ class Hyp:
             
     def random_prune(self, rng):
 
-        leaf_split_count = self.count_leaf_splits()
-
-        prune_split = rng.randrange(leaf_split_count)
+        root_split = PersistentSplit.from_split(self.root_split)
 
-        clone_split = self.root_split.deep_clone()
+        leaf_split_count = root_split.count_leaf_splits()
 
-        log.debug("leaf_split_count: %s", leaf_split_count)
-
-        clone_split.prune_leaf(leaf_num=prune_split)
-
-        return Hyp(root_split=clone_split)
+        return Hyp(root_split=root_split.prune_leaf(leaf_num=rng.randrange(leaf_split_count)))
 
     def iter_split(self):
 
@@ -139,12 +111,57 @@ class Hyp:
             return 0
 
 
+def member_counts(members):
+    """
+    Returns (leaf split count, splittable leaf node count) for a split of
+    members, from the counts already stored on any member splits.
+
+    Every split of a hypothesis takes split_num children, so a leaf node is
+    splittable if it has at least as many children as the split has members.
+    """
+
+    split_num = len(members)
+
+    leaf_split_count = 0
+
+    splittable_leaf_node_count = 0
+
+    for member in members:
+
+        if isinstance(member, (Split, PersistentSplit)):
+
+            leaf_split_count += member.leaf_split_count
+
+            splittable_leaf_node_count += member.splittable_leaf_node_count
+
+        elif len(member.children) >= split_num:
+
+            splittable_leaf_node_count += 1
+
+    return max(leaf_split_count, 1), splittable_leaf_node_count
+
+
 class Split:
+    """
+    A split of a node into some of its children, each of which may be split
+    in turn.
+
+    Each split keeps the number of leaf splits and splittable leaf nodes
+    beneath it, so the node_num-th leaf node or leaf_num-th leaf split is
+    found by descending one path. split_node and prune_leaf keep the counts
+    up to date, call recount after changing members any other way.
+    """
 
     def __init__(self, members):
 
         self.members = members
 
+        self.recount()
+
+    def recount(self):
+
+        self.leaf_split_count, self.splittable_leaf_node_count = member_counts(self.members)
+
     def is_leaf_split(self):
 
         return not any(isinstance(member,Split) for member in self.members)
@@ -154,32 +171,46 @@ class Split:
         return self.members[0].parent
 
     def split_node(self, node_num, split_num, rng):
+        """
+        Splits the node_num-th splittable leaf node, counting depth first.
+        """
 
-        node_count = 0
-
-        for parent, member_num, member in self.bredth_first():
+        for member_num, member in enumerate(self.members):
 
             if isinstance(member, Split):
-                continue
 
-            #log.info("parent %s, member_num: %s, member: %s, node_count: %s", parent, member_num, repr(member), node_count)
+                if node_num < member.splittable_leaf_node_count:
+
+                    member.split_node(node_num=node_num, split_num=split_num, rng=rng)
+
+                    break
+
+                node_num -= member.splittable_leaf_node_count
 
-            if node_num == node_count:
+            elif len(member.children) >= len(self.members):
 
-                log.info("splitting node %s", member)
+                if node_num == 0:
 
-                parent.members[member_num] = Split(
-                    members=sorted(
-                        rng.sample(member.children, split_num),
-                        key=lambda node: node.index,
+                    if trace.enabled:
+
+                        trace.event("split", node=member)
+
+                    self.members[member_num] = Split(
+                        members=sorted(
+                            rng.sample(member.children, split_num),
+                            key=lambda node: node.index,
+                        )
                     )
-                )
 
-                return
+                    break
 
-            node_count += 1
+                node_num -= 1
 
-            
+        else:
+
+            raise IndexError(f"no splittable leaf node {node_num} in {self}")
+
+        self.recount()
 
     def bredth_first(self):
 
@@ -209,52 +240,45 @@ class Split:
         
 
     def prune_leaf(self, leaf_num):
+        """
+        Replaces the leaf_num-th leaf split, counting depth first, with the
+        node it split. Returns None without changing anything if this split
+        is itself the only leaf split.
+        """
 
         if self.is_leaf_split() and leaf_num == 0:
 
             return None
 
-        parent_num_member_queue = collections.deque([(self, member_num, member) for member_num, member in enumerate(self.members)])
+        for member_num, member in enumerate(self.members):
 
-        leaf_counter = 0
+            if not isinstance(member, Split):
 
-        while parent_num_member_queue:
+                continue
 
-            parent, num, member = parent_num_member_queue.popleft()
+            if leaf_num < member.leaf_split_count:
 
-            if isinstance(member, Split):
-
-                log.debug("found split: %s", member)
-                
                 if member.is_leaf_split():
 
-                    log.debug("found leaf split #%s", leaf_counter)
+                    if trace.enabled:
 
-                    if(leaf_counter == leaf_num):
+                        trace.event("prune", node=member.members[0].parent)
 
-                        log.debug("setting member %s of parent split to node %s. Current parent %s", num, member.members[0].parent.name, parent)
+                    self.members[member_num] = member.members[0].parent
 
-                        parent.members[num] = member.members[0].parent 
+                else:
 
-                        return
-                    
-                    else:
+                    member.prune_leaf(leaf_num)
 
-                        leaf_counter += 1
+                break
 
-                        log.debug("leaf counter now %s", leaf_counter)
+            leaf_num -= member.leaf_split_count
 
-                log.debug("enqueueing members: %s", member.members)
+        else:
 
-                for child_num, child in enumerate(member.members):
+            raise IndexError(f"no leaf split {leaf_num} in {self}")
 
-                    parent_num_member_queue.append(
-                        (
-                            member,
-                            child_num, 
-                            child,
-                        )
-                    )
+        self.recount()
 
     def __repr__(self):
 
@@ -262,59 +286,230 @@ class Split:
 
     def count_splittable_leaf_nodes(self):
 
-        leaf_node_count = 0
+        return self.splittable_leaf_node_count
+
+    def count_leaf_splits(self):
+
+        return self.leaf_split_count
+
+    def deep_clone(self):
+
+        clone_members = []
 
         for member in self.members:
 
             if isinstance(member, Split):
 
-                leaf_node_count += member.count_splittable_leaf_nodes()
+                clone_members.append(member.deep_clone())
 
             else:
 
-                if len(member.children) > 0:
+                clone_members.append(member)
 
-                    log.info("node %s is a splittable leaf node", member)
+        clone = Split.__new__(Split)
 
-                    leaf_node_count += 1
+        clone.members = clone_members
 
-                else:
+        clone.leaf_split_count = self.leaf_split_count
 
-                    log.info("node %s is a leaf node, but it is not splittable, no children.", member)
+        clone.splittable_leaf_node_count = self.splittable_leaf_node_count
 
-        return leaf_node_count
-                
+        return clone
 
-    def count_leaf_splits(self):
+    def __str__(self):
+
+        parts = []
+
+        for member in self.members:
+
+            if not isinstance(member, Split):
+
+                part = member.name
+
+            else:
+
+                part = str(member)
 
-        leaf_split_count = 0
+            parts.append(part)
+
+        return f"[{', '.join(parts)}]"
+
+class PersistentSplit:
+    """
+    An immutable Split. Splitting or pruning returns a new PersistentSplit
+    which copies only the splits on the path from the root to the change and
+    shares every other member with the original, so hypotheses can be
+    changed without cloning them first.
+
+    Each split stores the number of leaf splits and splittable leaf nodes
+    beneath it, so counting is a lookup and finding the node_num-th leaf
+    node or leaf_num-th leaf split descends one path.
+    """
+
+    __slots__ = ("members", "leaf_split_count", "splittable_leaf_node_count", "hash", "leaf_nodes")
+
+    def __init__(self, members):
+
+        self.members = tuple(members)
+
+        self.leaf_split_count, self.splittable_leaf_node_count = member_counts(self.members)
+
+        self.hash = hash(self.members)
+
+        self.leaf_nodes = None
+
+    def __eq__(self, other):
 
-        if all(isinstance(member, tree_search.Node) for member in self.members):
+        return isinstance(other, PersistentSplit) and self.hash == other.hash and self.members == other.members
 
-            return 1
+    def __hash__(self):
+
+        return self.hash
+
+    def leaves(self):
+        """
+        Returns the leaf nodes, depth first, working them out on first use.
+        """
+
+        if self.leaf_nodes is None:
+
+            self.leaf_nodes = tuple(
+                itertools.chain.from_iterable(
+                    member.leaves() if isinstance(member, PersistentSplit) else (member,)
+                    for member
+                    in self.members
+                )
+            )
+
+        return self.leaf_nodes
+
+    @classmethod
+    def from_split(cls, split):
+
+        if isinstance(split, PersistentSplit):
+
+            return split
+
+        return cls(
+            members=[
+                cls.from_split(member) if isinstance(member, Split) else member
+                for member
+                in split.members
+            ]
+        )
 
-        return sum(
-            member.count_leaf_splits()
-            for member
-            in self.members
-            if isinstance(member, Split)
+    def to_split(self):
+        """
+        Returns a mutable Split of the same hypothesis.
+        """
+
+        return Split(
+            members=[
+                member.to_split() if isinstance(member, PersistentSplit) else member
+                for member
+                in self.members
+            ]
         )
 
+    def is_leaf_split(self):
+
+        return not any(isinstance(member, PersistentSplit) for member in self.members)
+
+    def count_leaf_splits(self):
+
+        return self.leaf_split_count
+
+    def count_splittable_leaf_nodes(self):
+
+        return self.splittable_leaf_node_count
+
     def deep_clone(self):
 
-        clone_members = []
+        return self
 
-        for member in self.members:
+    def replace(self, member_num, member):
 
-            if isinstance(member, Split):
+        members = list(self.members)
 
-                clone_members.append(member.deep_clone())
+        members[member_num] = member
 
-            else:
+        return PersistentSplit(members=members)
 
-                clone_members.append(member)
+    def split_node(self, node_num, split_num, rng):
+        """
+        Returns a copy with the node_num-th splittable leaf node, counting
+        depth first, replaced by a split of split_num of its children.
+        """
+
+        for member_num, member in enumerate(self.members):
+
+            if isinstance(member, PersistentSplit):
+
+                if node_num < member.splittable_leaf_node_count:
+
+                    return self.replace(member_num, member.split_node(node_num=node_num, split_num=split_num, rng=rng))
+
+                node_num -= member.splittable_leaf_node_count
+
+            elif len(member.children) >= len(self.members):
+
+                if node_num == 0:
+
+                    if trace.enabled:
+
+                        trace.event("split", node=member)
 
-        return Split(members=clone_members)
+                    return self.replace(
+                        member_num,
+                        PersistentSplit(
+                            members=sorted(
+                                rng.sample(member.children, split_num),
+                                key=lambda node: node.index,
+                            )
+                        ),
+                    )
+
+                node_num -= 1
+
+        raise IndexError(f"no splittable leaf node {node_num} in {self}")
+
+    def prune_leaf(self, leaf_num):
+        """
+        Returns a copy with the leaf_num-th leaf split, counting depth first,
+        replaced by the node it split, or None if this is that leaf split.
+        """
+
+        if self.is_leaf_split():
+
+            if leaf_num == 0:
+
+                if trace.enabled:
+
+                    trace.event("prune", node=self.members[0].parent)
+
+                return None
+
+            raise IndexError(f"no leaf split {leaf_num} in {self}")
+
+        for member_num, member in enumerate(self.members):
+
+            if not isinstance(member, PersistentSplit):
+
+                continue
+
+            if leaf_num < member.leaf_split_count:
+
+                pruned = member.prune_leaf(leaf_num)
+
+                return self.replace(member_num, member.members[0].parent if pruned is None else pruned)
+
+            leaf_num -= member.leaf_split_count
+
+        raise IndexError(f"no leaf split {leaf_num} in {self}")
+
+    def __repr__(self):
+
+        return f"<PersistentSplit: {len(self.members)}>"
 
     def __str__(self):
 
@@ -322,7 +517,7 @@ class Split:
 
         for member in self.members:
 
-            if isinstance(member, tree_search.Node):
+            if not isinstance(member, PersistentSplit):
 
                 part = member.name
 
@@ -334,88 +529,645 @@ class Split:
 
         return f"[{', '.join(parts)}]"
 
-def clone_split(split, split_skip_delay=0):
+def DH_tree(rng):
+    """
+    Returns the hypothesis an agent moves to when it polls an inactive agent,
+    its own hypothesis with a random leaf split pruned.
+    """
 
-    #if all(isinstance(item, tree_search.Node) for item in split):
-    if all(isinstance(item, str) for item in split):
+    def DH(hyp):
 
-        if split_skip_delay == 0:
+        if hyp.root_split:
 
-            return split[0][:-1]
+            return hyp.random_prune(rng=rng)
 
-        else:
+        return hyp
 
-            return split
+    return DH
+
+
+def DD_tree(tree, split_num, rng, split_rate=0.2):
+    """
+    Returns the hypothesis an agent moves to when it polls an active agent,
+    the polled hypothesis with, split_rate of the time, a random leaf node
+    split. The root is only split if it has at least split_num children.
+    """
+
+    root_splittable = len(tree.children) >= split_num
+
+    def DD(hyp):
+
+        if rng.random() < split_rate and (root_splittable if hyp.root_split is None else hyp.count_splittable_leaf_nodes()):
+
+            return hyp.random_split(tree=tree, rng=rng, split_num=split_num)
+
+        return hyp
+
+    return DD
 
-    return [
-        clone_split(item)
-        for item
-        in split
-    ]
-        
-            
 
 def D_tree_search(DH, DD, swarm, rng):
+    """
+    Diffusion for the whole of an ArraySwarm at once. Every inactive agent
+    polls a random agent, moving to DD of the polled hypothesis if it is
+    active and to DH of its own otherwise. Agents keeping their hypothesis
+    are left alone, so only agents which change are interned.
+    """
 
-    def D(agent):
+    batch_rng = np.random.default_rng(rng.getrandbits(64))
 
-        if agent.inactive:
+    def D():
 
-            polled = rng.choice(swarm)
+        inactive = np.flatnonzero(~swarm.active)
 
-            if polled.active:
+        polled = batch_rng.integers(len(swarm), size=len(inactive))
 
-                agent.hyp = DD(polled.hyp)
+        copying = swarm.active[polled]
 
-            else:
+        hyps = swarm.hyps
 
-                agent.hyp = DH(agent.hyp)
+        sources = np.where(copying, swarm.hyp_nums[polled], swarm.hyp_nums[inactive])
 
-            
+        new_hyps = [
+            DD(hyps[hyp_num]) if copied else DH(hyps[hyp_num])
+            for hyp_num, copied in zip(sources.tolist(), copying.tolist())
+        ]
+
+        changed = [num for num, hyp in enumerate(new_hyps) if hyp is not hyps[sources[num]]]
+
+        swarm.update(inactive[copying], hyp_nums=sources[copying])
+
+        swarm.update(inactive[changed], hyp_nums=swarm.intern_many([new_hyps[num] for num in changed]))
 
     return D
 
-def T_tree_search():
 
-    def T(agent):
+def T_tree_search(tree, swarm, rng, threshold=None):
+    """
+    Testing for the whole of an ArraySwarm at once. Each agent samples a leaf
+    of its hypothesised subtree uniformly and becomes active if the leaf's
+    data exceeds the threshold. Without a threshold a fresh uniform one is
+    drawn for each test, so an agent is active with probability equal to the
+    mean leaf value, the quantity being maximised.
+    """
 
-        pass
+    batch_rng = np.random.default_rng(rng.getrandbits(64))
+
+    def T():
+
+        hyps = swarm.hyps
+
+        leaf_draws = batch_rng.random(len(swarm)).tolist()
+
+        if threshold is None:
+
+            thresholds = batch_rng.random(len(swarm)).tolist()
+
+        else:
+
+            thresholds = itertools.repeat(threshold)
+
+        active = []
+
+        for hyp_num, leaf_draw, leaf_threshold in zip(swarm.hyp_nums.tolist(), leaf_draws, thresholds):
+
+            leaves = hyps[hyp_num].leaves(tree)
+
+            active.append(leaves[int(leaf_draw * len(leaves))].data > leaf_threshold)
+
+        swarm.update(slice(None), active=active)
 
     return T
 
+
 def I_tree(D, T, swarm):
 
     def I():
 
-        for agent in swarm:
+        D()
 
-            backscatter(agent)
+        T()
 
-        for agent in swarm:
+    return I
 
-            T(agent)
 
-    return I
+def H_stable(swarm, stable_iterations=200, tolerance=0.05, max_iterations=10000):
+    """
+    Returns a function for halting once the largest cluster has kept the same
+    hypothesis, with its size changing by no more than tolerance of the swarm
+    per iteration, for stable_iterations iterations in a row, or after
+    max_iterations.
+    """
 
-            
+    iteration_count = 0
 
-        
+    stable_count = 0
+
+    previous = sds.standard.Cluster(hyp=None, agents=0, size=0)
+
+    def H():
+
+        nonlocal iteration_count, stable_count, previous
+
+        iteration_count += 1
+
+        cluster = swarm.largest_cluster
+
+        if cluster.agents and cluster.hyp == previous.hyp and abs(cluster.size - previous.size) <= tolerance:
+
+            stable_count += 1
+
+        else:
+
+            stable_count = 0
+
+        previous = cluster
+
+        if stable_count >= stable_iterations or iteration_count >= max_iterations:
+
+            if trace.enabled:
+
+                trace.event("halt", iterations=iteration_count, cluster=cluster)
+
+            return True
+
+        return False
+
+    return H
+
+
+def example(tree, swarm, split_num, rng, split_rate=0.2, threshold=None):
+    """
+    Returns an iteration of subtree search SDS over an ArraySwarm, with every
+    agent starting at the root node.
+    """
+
+    root_hyp = Hyp(root_split=None)
+
+    swarm.update(slice(None), hyp_nums=np.full(len(swarm), swarm.intern(root_hyp)), active=False)
+
+    D = D_tree_search(
+        DH=DH_tree(rng=rng),
+        DD=DD_tree(tree=tree, split_num=split_num, rng=rng, split_rate=split_rate),
+        swarm=swarm,
+        rng=rng,
+    )
+
+    T = T_tree_search(tree=tree, swarm=swarm, rng=rng, threshold=threshold)
+
+    return I_tree(D=D, T=T, swarm=swarm)
+
+
+def run(tree, split_num, agent_count, rng, split_rate=0.2, threshold=None, stable_iterations=200, tolerance=0.05, max_iterations=10000):
+    """
+    Runs subtree search SDS until the largest cluster is stable and compares
+    it with the optimum found by tree_search.best_subtree.
+
+    Returns a dict of the run's throughput, the hypothesis and mean leaf
+    value of the largest cluster, the optimum and how long solving for it
+    took, and the iteration and time at which the largest cluster first held
+    the optimum, None if it never did.
+
+    Positional arguments:
+    tree -- the root node of the tree to search
+    split_num -- the number of children in each split
+    agent_count -- the number of agents
+    rng -- an instance of random.Random
+
+    Keyword arguments:
+    split_rate -- the probability that copying a hypothesis also splits it
+    threshold -- the fixed test threshold, drawn afresh for each test if None
+    stable_iterations -- see H_stable
+    tolerance -- see H_stable
+    max_iterations -- see H_stable
+    """
+
+    if not 0 < split_num <= len(tree.children):
+
+        raise ValueError(f"split_num {split_num} is not between 1 and the {len(tree.children)} children of the root")
+
+    start = time.perf_counter()
+
+    optimum = tree_search.best_subtree(tree, split_num=split_num)
+
+    optimum_seconds = time.perf_counter() - start
+
+    optimum_leaves = frozenset(optimum.leaves)
+
+    swarm = sds_ml.swarm.ArraySwarm(agent_count=agent_count)
+
+    I = example(tree=tree, swarm=swarm, split_num=split_num, rng=rng, split_rate=split_rate, threshold=threshold)
+
+    H = H_stable(swarm=swarm, stable_iterations=stable_iterations, tolerance=tolerance, max_iterations=max_iterations)
+
+    iterations = 0
+
+    optimum_iteration = None
+
+    optimum_found_seconds = None
+
+    start = time.perf_counter()
+
+    while True:
+
+        I()
+
+        iterations += 1
+
+        if optimum_iteration is None:
+
+            hyp = swarm.largest_cluster.hyp
+
+            if hyp is not None and frozenset(hyp.leaves(tree)) == optimum_leaves:
+
+                optimum_iteration = iterations
+
+                optimum_found_seconds = time.perf_counter() - start
+
+        if H():
+
+            break
+
+    seconds = time.perf_counter() - start
+
+    cluster = swarm.largest_cluster
+
+    return dict(
+        iterations=iterations,
+        seconds=seconds,
+        agent_iterations_per_second=iterations * agent_count / max(seconds, 1e-9),
+        hyp=cluster.hyp,
+        cluster_size=cluster.size,
+        score=None if cluster.hyp is None else cluster.hyp.score(tree),
+        optimum=optimum,
+        optimum_seconds=optimum_seconds,
+        optimum_iteration=optimum_iteration,
+        optimum_found_seconds=optimum_found_seconds,
+    )
+
+
+class GameTreeSwarm:
+    """
+    Game tree SDS, as described by Bishop and Tanay, with the agents held as
+    counts rather than objects.
+
+    Agents live in populations at the nodes of a tree, and an agent's
+    hypothesis is one child of the node it is at. A node's population is a
+    (2, child count) array of the number of inactive (row 0) and active
+    (row 1) agents hypothesising each child. Only nodes currently holding
+    agents have a population, so the tree may be far larger than the swarm,
+    an ImplicitTree for instance.
+
+    Each iteration:
+    * **Backscattering** inactive agents away from the root return to the
+      parent population.
+    * **Scattering** every active agent contacts a random agent of its
+      population, an inactive agent contacted is sent on to the child the
+      active agent hypothesises.
+    * **Internal diffusion** inactive agents poll a random agent of their
+      population, copying its hypothesis if it is active and picking a
+      random child otherwise.
+    * **Testing** every agent plays out from its hypothesised child to a leaf,
+      taking random children, and is active with probability equal to the
+      leaf's data.
+
+    Every step moves counts between populations with binomial,
+    multinomial and hypergeometric draws, so its cost depends on the number
+    of nodes populated or played through rather than agents.
+    """
+
+    def __init__(self, root, agent_count, rng):
+
+        self.root = root
+        self.rng = rng
+        self.np_rng = np.random.default_rng(rng.getrandbits(64))
+        self.populations = {}
+
+        population = self.population(root)
+
+        population[0] = self.np_rng.multinomial(agent_count, self.uniform(len(root.children)))
+
+    def __len__(self):
+
+        return int(sum(population.sum() for population in self.populations.values()))
+
+    @staticmethod
+    def uniform(count):
+
+        return np.full(count, 1 / count)
+
+    def population(self, node):
+
+        population = self.populations.get(node)
+
+        if population is None:
+
+            population = np.zeros((2, len(node.children)), dtype=np.int64)
+
+            self.populations[node] = population
+
+        return population
+
+    def playouts(self, node, count):
+        """
+        Plays count agents out from node to the leaves, taking random
+        children, and returns how many are active. Agents taking the same
+        path are moved together, so the cost depends on the number of
+        distinct nodes visited rather than agents.
+        """
+
+        active = 0
+
+        pending = [(node, count)]
+
+        while pending:
+
+            node, count = pending.pop()
+
+            children = node.children
+
+            if not len(children):
+
+                active += int(self.np_rng.binomial(count, node.data))
+
+                continue
+
+            counts = self.np_rng.multinomial(count, self.uniform(len(children)))
+
+            pending.extend(
+                (children[child_num], int(counts[child_num]))
+                for child_num in np.flatnonzero(counts).tolist()
+            )
+
+        return active
+
+    def backscatter(self):
+
+        # Every population returns what it held before any arrive, so agents
+        # move at most one level whatever order the nodes are visited in.
+        returning = [
+            (node, int(population[0].sum()))
+            for node, population in self.populations.items()
+            if node != self.root and population[0].any()
+        ]
 
-def example(tree, swarm):
+        for node, count in returning:
 
-    D = None
+            self.populations[node][0] = 0
 
-    T = None
+        for node, count in returning:
+
+            self.population(node.parent)[0] += self.np_rng.multinomial(
+                count, self.uniform(len(node.parent.children))
+            )
+
+    def scatter(self):
+
+        arrivals = []
+
+        for node, population in self.populations.items():
+
+            inactive = int(population[0].sum())
+
+            total = inactive + int(population[1].sum())
+
+            if not inactive or total == inactive:
+
+                continue
+
+            children = node.children
+
+            sends = self.np_rng.binomial(population[1], inactive / total)
+
+            for child_num in np.flatnonzero(sends).tolist():
+
+                if not len(children[child_num].children):
+
+                    sends[child_num] = 0
+
+            # Active agents contacting the same inactive agent send it once.
+            if sends.sum() > inactive:
+
+                sends = self.np_rng.multivariate_hypergeometric(sends, inactive)
+
+            population[0] -= self.np_rng.multivariate_hypergeometric(population[0], int(sends.sum()))
+
+            arrivals.extend(
+                (children[child_num], int(sends[child_num]))
+                for child_num in np.flatnonzero(sends).tolist()
+            )
+
+        for child, count in arrivals:
+
+            self.population(child)[0] += self.np_rng.multinomial(count, self.uniform(len(child.children)))
+
+    def diffuse(self):
+
+        for population in self.populations.values():
+
+            inactive = int(population[0].sum())
+
+            active = int(population[1].sum())
+
+            if not inactive:
+
+                continue
+
+            copying = self.np_rng.binomial(inactive, active / (inactive + active))
+
+            population[0] = self.np_rng.multinomial(inactive - copying, self.uniform(population.shape[1]))
+
+            if copying:
+
+                population[0] += self.np_rng.multinomial(copying, population[1] / active)
+
+    def test(self):
+
+        for node, population in self.populations.items():
+
+            totals = population.sum(axis=0)
+
+            children = node.children
+
+            for child_num in np.flatnonzero(totals).tolist():
+
+                child = children[child_num]
+
+                active = self.playouts(child, int(totals[child_num]))
+
+                population[1, child_num] = active
+
+                population[0, child_num] = totals[child_num] - active
+
+    def __call__(self):
+
+        self.backscatter()
+
+        self.scatter()
+
+        self.diffuse()
+
+        # Populations emptied by backscattering are forgotten.
+        self.populations = {
+            node: population for node, population in self.populations.items() if population.any()
+        }
+
+        self.test()
+
+    def subtree_counts(self):
+        """
+        Returns the number of agents at or below each node that has any.
+        """
+
+        counts = collections.Counter()
+
+        for node, population in self.populations.items():
+
+            total = int(population.sum())
+
+            while node is not None:
+
+                counts[node] += total
+
+                node = node.parent
+
+        return counts
+
+    def best_path(self):
+        """
+        Returns the nodes from the root taken by following, at each node, the
+        child with the most agents hypothesising it or at or below it.
+        """
+
+        counts = self.subtree_counts()
+
+        path = [self.root]
+
+        while len(path[-1].children):
+
+            node = path[-1]
+
+            population = self.populations.get(node)
+
+            hypothesising = population.sum(axis=0) if population is not None else np.zeros(len(node.children))
+
+            scores = [
+                hypothesising[child_num] + counts[child]
+                for child_num, child in enumerate(node.children)
+            ]
+
+            child_num = int(np.argmax(scores))
+
+            if not scores[child_num]:
+
+                break
+
+            path.append(node.children[child_num])
+
+        return path
+
+
+def run_game_tree(root, agent_count, iterations, rng):
+    """
+    Runs game tree SDS for a number of iterations, returning the best path,
+    the largest number of populations held at once and the agent-iterations
+    per second.
+    """
+
+    swarm = GameTreeSwarm(root=root, agent_count=agent_count, rng=rng)
+
+    max_populations = 0
+
+    start = time.perf_counter()
+
+    for iteration in range(iterations):
+
+        swarm()
+
+        max_populations = max(max_populations, len(swarm.populations))
+
+    seconds = time.perf_counter() - start
+
+    return dict(
+        path=swarm.best_path(),
+        max_populations=max_populations,
+        agent_iterations_per_second=iterations * agent_count / max(seconds, 1e-9),
+    )
 
-    I = sds.I_sync(D=D, T=T, swarm=swarm)
 
 def main():
 
-    tree = tree_search.build_tree(tree_depth=3, branch_count=3, split_num=2)
+    parser = argparse.ArgumentParser(description="Search for the subtree with the greatest mean leaf value using SDS")
+
+    parser.add_argument("--depth", type=int, default=4, help="Number of levels in the tree")
+
+    parser.add_argument("--branch-count", type=int, default=4, help="Number of children of each node")
+
+    parser.add_argument("--split-num", type=int, default=2, help="Number of children in each split")
+
+    parser.add_argument("--agents", type=int, default=1000, help="Number of agents")
+
+    parser.add_argument("--split-rate", type=float, default=0.2, help="Probability that copying a hypothesis also splits it")
+
+    parser.add_argument("--max-iterations", type=int, default=10000, help="Iterations before giving up on stability")
+
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the tree and the swarm")
+
+    parser.add_argument("--manifest", type=pathlib.Path, default=None, help="Write the seed, parameters and result of the run to this JSON file")
+
+    args = parser.parse_args()
+
+    if not 0 < args.split_num <= args.branch_count:
 
-    swarm = sds.Swarm(agent_count=100)
+        parser.error("--split-num must be between 1 and --branch-count")
 
-    example(tree=tree, swarm=swarm)
+    seed = sds_ml.seeding.make_seed(args.seed)
+
+    log.info("seed %s", seed)
+
+    rng = random.Random(seed)
+
+    tree = tree_search.build_tree(depth=args.depth, branch_count=args.branch_count, data_f=lambda node: rng.random())
+
+    result = run(
+        tree=tree,
+        split_num=args.split_num,
+        agent_count=args.agents,
+        rng=rng,
+        split_rate=args.split_rate,
+        max_iterations=args.max_iterations,
+    )
+
+    log.info("largest cluster %.2f of agents: %s, mean %s", result["cluster_size"], result["hyp"], result["score"])
+
+    log.info(
+        "optimum: [%s], mean %s, solved in %.3gs",
+        ", ".join(node.name for node in result["optimum"].leaves),
+        result["optimum"].score,
+        result["optimum_seconds"],
+    )
+
+    log.info(
+        "%s iterations in %.3gs, %.0f agent-iterations/s, optimum first held after %s iterations (%ss)",
+        result["iterations"],
+        result["seconds"],
+        result["agent_iterations_per_second"],
+        result["optimum_iteration"],
+        result["optimum_found_seconds"] and f"{result['optimum_found_seconds']:.3g}",
+    )
+
+    if args.manifest is not None:
+
+        sds_ml.seeding.write_manifest(
+            args.manifest,
+            seed,
+            parameters=vars(args),
+            result=dict(
+                result,
+                hyp=str(result["hyp"]),
+                optimum=[node.name for node in result["optimum"].leaves],
+            ),
+        )
 
 
 if __name__ == "__main__":
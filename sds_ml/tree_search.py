@@ -1,7 +1,13 @@
 import collections, datetime, functools, itertools
 import json, logging, pathlib, random, re
+import argparse
+import collections.abc
+import hashlib
 import sds
 from logging import DEBUG, INFO, WARNING, ERROR, FATAL
+import numpy as np
+import sds_ml.seeding
+import sds_ml.trace as trace
 SILENT = 0
 
 log = logging.getLogger(__name__)
@@ -40,7 +46,9 @@ class Node:
 
             self.children.append(child)
 
-            log.log(0, "recursing to depth %s for child#%s '%s'", depth-1, child_num, child_name)
+            if trace.enabled:
+
+                trace.event("make_node", node=child, depth=depth-1)
 
             child.make_children(depth=depth-1, branch_count=branch_count, data_f=data_f)
 
@@ -56,13 +64,15 @@ class Node:
 
         queue = collections.deque([self])
 
-        log.log(0, "bredth first search from %s", self.name)
+        traced = trace.enabled
 
         while queue:
 
             node = queue.popleft()
 
-            log.log(0, "yielding %s. Data: %s", node.name, node.data)
+            if traced:
+
+                trace.event("visit", node=node)
 
             yield node
 
@@ -72,7 +82,9 @@ class Node:
 
     def depth_first(self):
 
-        log.log(0, "yielding %s. Data: %s", self.name, self.data)
+        if trace.enabled:
+
+            trace.event("visit", node=self)
 
         yield self
 
@@ -101,23 +113,488 @@ def build_tree(depth, branch_count, data_f=None):
 
     return root
 
-def make_search_space(depth, branch_count, rng):
+class FlatTree:
+    """
+    A tree held in contiguous arrays, with nodes numbered in breadth first
+    order from the root at 0. The children of a node are numbered
+    consecutively, as are the descendants of a node at any one depth, so
+    walking a tree is a matter of slicing ranges of node numbers.
+
+    child_count -- the number of children of each node
+    parent -- the number of each node's parent, -1 for the root
+    first_child -- the number the first child of each node has, or would have
+    depth -- the depth of each node, 0 for the root
+    values -- the value held by each node, NaN if there is none
+
+    Nodes are handed out as FlatNode views which behave like Node, with names
+    and index tuples worked out when asked for.
+    """
+
+    def __init__(self, child_count, values=None):
+
+        node_count = len(child_count)
+
+        index_type = np.int32 if node_count < 2 ** 31 else np.int64
+
+        self.child_count = np.asarray(child_count, dtype=np.int32)
+
+        self.parent = np.empty(node_count, dtype=index_type)
+
+        self.parent[0] = -1
+
+        self.parent[1:] = np.repeat(np.arange(node_count, dtype=index_type), self.child_count)
+
+        self.first_child = np.empty(node_count, dtype=index_type)
+
+        self.first_child[0] = 1
+
+        np.cumsum(self.child_count[:-1], out=self.first_child[1:])
+
+        self.first_child[1:] += 1
+
+        self.depth = np.zeros(node_count, dtype=np.int16)
+
+        for level, level_range in enumerate(self.bredth_first_ranges(0)):
+
+            self.depth[level_range.start:level_range.stop] = level
+
+        if values is None:
+
+            values = np.full(node_count, np.nan)
+
+        self.values = np.asarray(values, dtype=float)
+
+    def __len__(self):
+
+        return len(self.child_count)
+
+    @classmethod
+    def build(cls, depth, branch_count, values=None):
+        """
+        Returns a tree of the given depth where every node above the deepest
+        level has branch_count children, the same shape as build_tree.
+
+        values -- an array with a value per node in breadth first order, or a
+        function taking a FlatNode and returning its value (optional)
+        """
+
+        level_sizes = [branch_count ** level for level in range(depth)]
+
+        node_count = sum(level_sizes)
+
+        child_count = np.zeros(node_count, dtype=np.int32)
+
+        child_count[:node_count - level_sizes[-1]] = branch_count
+
+        if callable(values):
+
+            tree = cls(child_count=child_count)
+
+            tree.values[:] = [values(tree.node(node_num)) for node_num in range(node_count)]
+
+            return tree
+
+        return cls(child_count=child_count, values=values)
+
+    @classmethod
+    def from_node(cls, root):
+        """
+        Returns a FlatTree with the shape and data of a tree of Node.
+        """
+
+        nodes = [root]
+
+        for node in nodes:
+
+            nodes.extend(node.children)
+
+        return cls(
+            child_count=[len(node.children) for node in nodes],
+            values=[np.nan if node.data is None else node.data for node in nodes],
+        )
+
+    @property
+    def root(self):
+
+        return FlatNode(self, 0)
+
+    def node(self, num):
+
+        return FlatNode(self, num)
+
+    def children_range(self, num):
+
+        first_child = int(self.first_child[num])
+
+        return range(first_child, first_child + int(self.child_count[num]))
+
+    def child_num(self, num):
+
+        return num - int(self.first_child[self.parent[num]])
+
+    def path(self, num):
+        """
+        Returns the child number taken at each level to reach a node from the
+        root.
+        """
+
+        path = []
+
+        while num > 0:
+
+            path.append(self.child_num(num))
+
+            num = int(self.parent[num])
+
+        path.reverse()
+
+        return tuple(path)
+
+    def bredth_first_ranges(self, num):
+        """
+        Yields one range of node numbers per level of the subtree rooted at a
+        node, top level first.
+        """
+
+        start, end = num, num + 1
+
+        while start < end:
+
+            yield range(start, end)
+
+            start, end = int(self.first_child[start]), int(self.first_child[end - 1] + self.child_count[end - 1])
+
+    def depth_first_nums(self, num):
+
+        stack = [num]
+
+        while stack:
+
+            num = stack.pop()
+
+            yield num
+
+            stack.extend(reversed(self.children_range(num)))
+
+
+class FlatNode:
+    """
+    A view of a single node of a FlatTree with the interface of Node. Views
+    of the same node are equal, so they may be made as often as needed.
+    """
+
+    __slots__ = ("tree", "num")
+
+    def __init__(self, tree, num):
+
+        self.tree = tree
+        self.num = num
+
+    def __eq__(self, other):
+
+        return isinstance(other, FlatNode) and self.num == other.num and self.tree is other.tree
+
+    def __hash__(self):
+
+        return hash((id(self.tree), self.num))
+
+    @property
+    def name(self):
+
+        return "r" + "".join(str(child_num) for child_num in self.tree.path(self.num))
+
+    @property
+    def index(self):
+
+        return ("root",) + self.tree.path(self.num)
+
+    @property
+    def parent(self):
+
+        if self.num == 0:
+
+            return None
+
+        return FlatNode(self.tree, int(self.tree.parent[self.num]))
+
+    @property
+    def children(self):
+
+        return [FlatNode(self.tree, num) for num in self.tree.children_range(self.num)]
+
+    @property
+    def child_num(self):
+
+        if self.num == 0:
+
+            return 0
+
+        return self.tree.child_num(self.num)
+
+    @property
+    def data(self):
+
+        value = float(self.tree.values[self.num])
+
+        return None if value != value else value
+
+    def __str__(self):
+
+        return f"{self.name}: {self.data}"
+
+    def __repr__(self):
+
+        return f"<Node {self.name}>"
+
+    def report(self):
+
+        return f"Node '{self.name}' has this parent '{self.parent and self.parent.name or None}' and these {len(self.children)} children [{', '.join(child.name for child in self.children)}]"
+
+    def iter_children(self):
+
+        return (FlatNode(self.tree, num) for num in self.tree.children_range(self.num))
+
+    def bredth_first(self):
+
+        for level in self.tree.bredth_first_ranges(self.num):
+
+            for num in level:
+
+                yield FlatNode(self.tree, num)
+
+    def depth_first(self):
+
+        for num in self.tree.depth_first_nums(self.num):
+
+            yield FlatNode(self.tree, num)
+
+    def shape_report(self):
+
+        indices = [node.name for node in self.bredth_first()]
+
+        return f"[{' '.join(indices)}]"
+
+
+def build_flat_tree(depth, branch_count, data_f=None):
+
+    return FlatTree.build(depth=depth, branch_count=branch_count, values=data_f).root
+
+
+def seeded_value(seed, path):
+    """
+    Returns a value in [0, 1) which depends only on seed and path, the same
+    in every process and on every run.
+    """
+
+    digest = hashlib.blake2b(f"{seed}:{path}".encode(), digest_size=8).digest()
+
+    return int.from_bytes(digest, "little") / 2 ** 64
+
+
+class ImplicitTree:
+    """
+    A tree of the given depth where every node above the deepest level has
+    branch_count children, none of which exist until they are asked for.
+
+    A node is identified by its path, the child number taken at each level
+    from the root, and its data is data_f(seed, path), so a node made again
+    after being forgotten is the same as before. Only the cache_size most
+    recently used nodes are kept, which lets SDS explore trees far too large
+    to build while touching only a small part of them.
+
+    Keyword arguments:
+    seed -- passed to data_f with each path
+    data_f -- a function taking (seed, path) and returning a node's data (optional)
+    cache_size -- the number of nodes to keep
+    """
+
+    def __init__(self, depth, branch_count, seed=0, data_f=seeded_value, cache_size=2**16):
+
+        self.depth = depth
+        self.branch_count = branch_count
+        self.seed = seed
+        self.data_f = data_f
+        self.cache_size = cache_size
+        self.path2node = collections.OrderedDict()
+
+    def __len__(self):
+
+        return sum(self.branch_count ** level for level in range(self.depth))
+
+    @property
+    def root(self):
+
+        return self.node(())
+
+    def node(self, path):
+
+        node = self.path2node.get(path)
+
+        if node is None:
+
+            node = ImplicitNode(self, path)
+
+            self.path2node[path] = node
+
+            if len(self.path2node) > self.cache_size:
+
+                self.path2node.popitem(last=False)
+
+        else:
+
+            self.path2node.move_to_end(path)
+
+        return node
+
+    def child_count(self, path):
+
+        return self.branch_count if len(path) < self.depth - 1 else 0
+
+
+class ImplicitChildren(collections.abc.Sequence):
+    """
+    The children of an ImplicitNode, each made when it is indexed, so picking
+    a few children of a node with many costs no more than a node with few.
+    """
+
+    __slots__ = ("tree", "path", "count")
+
+    def __init__(self, tree, path):
+
+        self.tree = tree
+        self.path = path
+        self.count = tree.child_count(path)
+
+    def __len__(self):
+
+        return self.count
+
+    def __getitem__(self, num):
+
+        if isinstance(num, slice):
+
+            return [self[child_num] for child_num in range(*num.indices(self.count))]
+
+        if num < 0:
+
+            num += self.count
+
+        if not 0 <= num < self.count:
+
+            raise IndexError(num)
+
+        return self.tree.node(self.path + (num,))
+
+
+class ImplicitNode:
+    """
+    A node of an ImplicitTree with the interface of Node. Nodes are equal
+    when they have the same tree and path, whether or not they are the same
+    object.
+    """
+
+    __slots__ = ("tree", "path", "data")
+
+    def __init__(self, tree, path):
+
+        self.tree = tree
+        self.path = path
+        self.data = tree.data_f(tree.seed, path)
+
+    def __eq__(self, other):
+
+        return isinstance(other, ImplicitNode) and self.path == other.path and self.tree is other.tree
+
+    def __hash__(self):
+
+        return hash((id(self.tree), self.path))
+
+    @property
+    def name(self):
+
+        return "r" + "".join(str(child_num) for child_num in self.path)
+
+    @property
+    def index(self):
+
+        return ("root",) + self.path
+
+    @property
+    def parent(self):
+
+        if not self.path:
+
+            return None
+
+        return self.tree.node(self.path[:-1])
+
+    @property
+    def children(self):
+
+        return ImplicitChildren(self.tree, self.path)
+
+    @property
+    def child_num(self):
+
+        return self.path[-1] if self.path else 0
+
+    def __str__(self):
+
+        return f"{self.name}: {self.data}"
+
+    def __repr__(self):
+
+        return f"<Node {self.name}>"
+
+    def report(self):
+
+        return f"Node '{self.name}' has this parent '{self.parent and self.parent.name or None}' and these {len(self.children)} children [{', '.join(child.name for child in self.children)}]"
+
+    def iter_children(self):
+
+        yield from self.children
+
+    def bredth_first(self):
+
+        queue = collections.deque([self])
+
+        while queue:
+
+            node = queue.popleft()
+
+            yield node
+
+            queue.extend(node.iter_children())
+
+    def depth_first(self):
+
+        yield self
+
+        for child in self.iter_children():
+
+            yield from child.depth_first()
+
+    def shape_report(self):
 
-    def random_data(node):
+        indices = [node.name for node in self.bredth_first()]
+
+        return f"[{' '.join(indices)}]"
 
-        return rng.random()
 
-    root = build_tree(depth=depth, branch_count=branch_count, data_f=random_data)
+def build_implicit_tree(depth, branch_count, seed=0, data_f=seeded_value, cache_size=2**16):
 
-    name2node = {
-        node.index: node
-        for node
-        in root.bredth_first()
-    }
+    return ImplicitTree(
+        depth=depth, branch_count=branch_count, seed=seed, data_f=data_f, cache_size=cache_size
+    ).root
 
-    for name, node in name2node.items():
 
-        log.info("%s: %s", name, node.data)
+def make_search_space(depth, branch_count, rng):
+    """
+    Returns the root of a search space with random data, made as it is
+    explored rather than up front.
+    """
+
+    return build_implicit_tree(depth=depth, branch_count=branch_count, seed=rng.getrandbits(64))
 
 #def get_binary_subtrees(node):
 #
@@ -127,8 +604,6 @@ def get_binary_subtrees(node):
 
     yield (node,)
 
-    log.log(0, "yielding the number of ways to pick two from the node")
-
     child_pairs = itertools.combinations(node.children, 2)
 
     for a, b in child_pairs:
@@ -162,11 +637,494 @@ def get_subtrees(node, split_num):
             yield list(itertools.chain.from_iterable(subtree_combinations))
 
 
+class SubtreeSpace:
+    """
+    Counts, ranks, unranks and samples the subtrees of a tree without
+    enumerating them. Subtrees are numbered in the order get_subtrees yields
+    them, so unrank(node, num) is the num'th subtree yielded by
+    get_subtrees(node, split_num).
+
+    The number of subtrees rooted at a node is one, for the node alone, plus
+    the sum over every combination of split_num children of the product of
+    the number of subtrees rooted at each child. That sum is the elementary
+    symmetric polynomial of degree split_num of the children's counts, which
+    is built up over suffixes of the children, so that finding which
+    combination of children holds the num'th subtree takes one pass over them.
+
+    Counts and suffix tables are memoised per node.
+    """
+
+    def __init__(self, split_num):
+
+        self.split_num = split_num
+
+        self.node2count = {}
+
+        # suffixes[child_num][r] is the sum over combinations of r children
+        # from child_num onwards of the product of their counts.
+        self.node2suffixes = {}
+
+    def count(self, node):
+        """
+        Returns the number of subtrees rooted at node.
+        """
+
+        try:
+
+            return self.node2count[node]
+
+        except KeyError:
+
+            pass
+
+        counts = [self.count(child) for child in node.children]
+
+        suffixes = [[1] + [0] * self.split_num]
+
+        for count in reversed(counts):
+
+            previous = suffixes[-1]
+
+            suffixes.append(
+                [1] + [previous[r] + count * previous[r - 1] for r in range(1, self.split_num + 1)]
+            )
+
+        suffixes.reverse()
+
+        self.node2suffixes[node] = suffixes
+
+        count = 1 + suffixes[0][self.split_num]
+
+        self.node2count[node] = count
+
+        return count
+
+    def unrank(self, node, num):
+        """
+        Returns the leaf nodes of the num'th subtree rooted at node as a list.
+        """
+
+        count = self.count(node)
+
+        if not 0 <= num < count:
+
+            raise IndexError(f"subtree {num} out of range for {count} subtrees")
+
+        if num == 0:
+
+            return [node]
+
+        num -= 1
+
+        suffixes = self.node2suffixes[node]
+
+        child_count = len(node.children)
+
+        # The subtrees are grouped by combination of children, in
+        # lexicographic order, each group holding the product of the counts
+        # of its children.
+        combination = []
+
+        multiplier = 1
+
+        start = 0
+
+        for remaining in range(self.split_num, 0, -1):
+
+            for child_num in range(start, child_count - remaining + 1):
+
+                child_count_product = multiplier * self.node2count[node.children[child_num]]
+
+                block = child_count_product * suffixes[child_num + 1][remaining - 1]
+
+                if num < block:
+
+                    break
+
+                num -= block
+
+            combination.append(child_num)
+
+            multiplier = child_count_product
+
+            start = child_num + 1
+
+        # Within a combination the subtrees of the first child vary slowest.
+        leaves = []
+
+        for child_num in combination:
+
+            child = node.children[child_num]
+
+            multiplier //= self.node2count[child]
+
+            child_subtree_num, num = divmod(num, multiplier)
+
+            leaves.extend(self.unrank(child, child_subtree_num))
+
+        return leaves
+
+    def rank(self, node, leaves):
+        """
+        Returns the number of the subtree rooted at node with the given leaf
+        nodes, the inverse of unrank.
+        """
+
+        self.count(node)
+
+        leaves = list(leaves)
+
+        if len(leaves) == 1 and leaves[0] == node:
+
+            return 0
+
+        depth = len(node.index)
+
+        child_num2leaves = collections.defaultdict(list)
+
+        for leaf in leaves:
+
+            if len(leaf.index) <= depth or leaf.index[:depth] != node.index:
+
+                raise ValueError(f"{leaf!r} is not below {node!r}")
+
+            child_num2leaves[leaf.index[depth]].append(leaf)
+
+        if len(child_num2leaves) != self.split_num:
+
+            raise ValueError(f"{node!r} is split {len(child_num2leaves)} ways, not {self.split_num}")
+
+        suffixes = self.node2suffixes[node]
+
+        num = 0
+
+        multiplier = 1
+
+        start = 0
+
+        remaining = self.split_num
+
+        combination = sorted(child_num2leaves)
+
+        for child_num in combination:
+
+            for skipped_num in range(start, child_num):
+
+                num += multiplier * self.node2count[node.children[skipped_num]] * suffixes[skipped_num + 1][remaining - 1]
+
+            multiplier *= self.node2count[node.children[child_num]]
+
+            start = child_num + 1
+
+            remaining -= 1
+
+        for child_num in combination:
+
+            child = node.children[child_num]
+
+            multiplier //= self.node2count[child]
+
+            num += multiplier * self.rank(child, child_num2leaves[child_num])
+
+        return 1 + num
+
+    def sample(self, node, rng):
+        """
+        Returns the leaf nodes of a subtree rooted at node chosen uniformly at
+        random.
+        """
+
+        return self.unrank(node, rng.randrange(self.count(node)))
+
+
+def count_subtrees(node, split_num):
+
+    return SubtreeSpace(split_num=split_num).count(node)
+
+
+
+Solution = collections.namedtuple("Solution", ("leaves", "score"))
+
+
+class SubtreeSolver:
+    """
+    Finds optimal subtrees by dynamic programming over a tree, without
+    enumerating its subtrees. Each node holds a numeric value in node.data,
+    or None, in which case it cannot be a leaf of a subtree.
+
+    For a penalty p, parametric finds the subtree maximising the sum of
+    (leaf value - p) over its leaves. The best subtree rooted at a node is
+    either the node alone or the best subtrees of its split_num children with
+    the largest such sums, so one bottom-up pass picking the top split_num
+    children at each node finds it.
+
+    best_mean maximises the mean leaf value, the score used by the tree_search
+    README, with Dinkelbach's method: the penalty is set to the mean of the
+    best subtree so far until no subtree scores above zero, which takes a
+    handful of passes.
+
+    The nodes are flattened once in breadth first order, so children of a
+    node are contiguous and every pass is a loop over lists. The whole of a
+    FlatTree is already flat, so it is solved a level at a time with NumPy.
+    """
+
+    def __init__(self, root, split_num):
+
+        self.root = root
+
+        self.split_num = split_num
+
+        self.tree = None
+
+        if isinstance(root, FlatNode) and root.num == 0:
+
+            self.tree = root.tree
+
+            self.values = np.where(np.isnan(root.tree.values), -np.inf, root.tree.values)
+
+            return
+
+        nodes = [root]
+
+        for node in nodes:
+
+            nodes.extend(node.children)
+
+        self.node = nodes.__getitem__
+
+        self.values = [-np.inf if node.data is None else node.data for node in nodes]
+
+        self.child_starts = []
+
+        child_start = 1
+
+        for node in nodes:
+
+            self.child_starts.append(child_start)
+
+            child_start += len(node.children)
+
+        self.child_counts = [len(node.children) for node in nodes]
+
+    def parametric(self, penalty=0):
+        """
+        Returns the Solution maximising the sum of (leaf value - penalty), with
+        that sum as its score.
+        """
+
+        if self.tree is not None:
+
+            return self.parametric_levels(penalty=penalty)
+
+        split_num = self.split_num
+
+        values = self.values
+
+        child_starts = self.child_starts
+
+        child_counts = self.child_counts
+
+        node_count = len(values)
+
+        best = [0.0] * node_count
+
+        splits = [None] * node_count
+
+        for num in range(node_count - 1, -1, -1):
+
+            alone = values[num] - penalty
+
+            child_count = child_counts[num]
+
+            if child_count >= split_num:
+
+                child_start = child_starts[num]
+
+                children = sorted(
+                    range(child_start, child_start + child_count),
+                    key=best.__getitem__,
+                    reverse=True,
+                )[:split_num]
+
+                split = sum(best[child] for child in children)
+
+                if split > alone:
+
+                    best[num] = split
+
+                    splits[num] = sorted(children)
+
+                    continue
+
+            best[num] = alone
+
+        leaves = []
+
+        stack = [0]
+
+        while stack:
+
+            num = stack.pop()
+
+            if splits[num] is None:
+
+                leaves.append(self.node(num))
+
+            else:
+
+                stack.extend(reversed(splits[num]))
+
+        return Solution(leaves=leaves, score=best[0])
+
+    def parametric_levels(self, penalty=0):
+        """
+        parametric for a whole FlatTree, working up a level at a time. The
+        children of each level are sorted by parent and then best sum, so the
+        top split_num children of every parent are those ranked below
+        split_num within their parent's run.
+        """
+
+        tree = self.tree
+
+        split_num = self.split_num
+
+        best = self.values - penalty
+
+        splits = np.zeros(len(tree), dtype=bool)
+
+        chosen = np.zeros(len(tree), dtype=bool)
+
+        levels = list(tree.bredth_first_ranges(0))
+
+        for level, children in zip(reversed(levels[:-1]), reversed(levels[1:])):
+
+            parents = tree.parent[children.start:children.stop]
+
+            child_best = best[children.start:children.stop]
+
+            child_counts = tree.child_count[level.start:level.stop]
+
+            child_count = int(child_counts[0])
+
+            if split_num <= child_count == child_counts.min() == child_counts.max():
+
+                # Every parent has the same number of children, so take the
+                # split_num best children of each row. A row with fewer than
+                # split_num feasible children sums to -inf, so never splits.
+                grid = child_best.reshape(len(level), child_count)
+
+                top_columns = np.argsort(-grid, axis=1, kind="stable")[:, :split_num]
+
+                top = (np.arange(len(level))[:, None] * child_count + top_columns).ravel()
+
+            else:
+
+                order = np.lexsort((-child_best, parents))
+
+                rank = np.arange(len(order)) - (tree.first_child[parents[order]] - children.start)
+
+                top = order[rank < split_num]
+
+            split = np.bincount(
+                parents[top] - level.start, weights=child_best[top], minlength=len(level)
+            )
+
+            splitting = (tree.child_count[level.start:level.stop] >= split_num) & (
+                split > best[level.start:level.stop]
+            )
+
+            best[level.start:level.stop][splitting] = split[splitting]
+
+            splits[level.start:level.stop] = splitting
+
+            chosen[children.start + top] = True
+
+        reached = np.zeros(len(tree), dtype=bool)
+
+        reached[0] = True
+
+        for level, children in zip(levels[:-1], levels[1:]):
+
+            parents = tree.parent[children.start:children.stop]
+
+            reached[children.start:children.stop] = (
+                reached[parents] & splits[parents] & chosen[children.start:children.stop]
+            )
+
+        leaf_nums = np.flatnonzero(reached & ~splits).tolist()
+
+        leaf_nums.sort(key=tree.path)
+
+        return Solution(leaves=[tree.node(num) for num in leaf_nums], score=float(best[0]))
+
+    def best_mean(self, tolerance=1e-12, max_iterations=100):
+        """
+        Returns the Solution with the greatest mean leaf value, with that mean
+        as its score.
+        """
+
+        values = np.asarray(self.values)
+
+        values = values[values > -np.inf]
+
+        if not len(values):
+
+            raise ValueError("no node of the tree holds a value")
+
+        # Every subtree's mean is at least the lowest value, so the best
+        # subtree under that penalty is a feasible start.
+        leaves = self.parametric(penalty=float(values.min())).leaves
+
+        mean = sum(leaf.data for leaf in leaves) / len(leaves)
+
+        for iteration in range(max_iterations):
+
+            solution = self.parametric(penalty=mean)
+
+            if trace.enabled:
+
+                trace.event("solver_iteration", iteration=iteration, mean=mean, excess=solution.score)
+
+            if solution.score <= tolerance * max(1, len(solution.leaves)):
+
+                break
+
+            leaves = solution.leaves
+
+            mean = sum(leaf.data for leaf in leaves) / len(leaves)
+
+        return Solution(leaves=leaves, score=mean)
+
+
+def best_subtree(root, split_num):
+    """
+    Returns the Solution with the greatest mean leaf value among the subtrees
+    of root with split_num children at each split.
+    """
+
+    return SubtreeSolver(root=root, split_num=split_num).best_mean()
+
+
+
 def main():
 
-    rng = random.Random()
+    parser = argparse.ArgumentParser(description="Build and log a random search space")
+
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the search space")
+
+    args = parser.parse_args()
+
+    seed = sds_ml.seeding.make_seed(args.seed)
+
+    log.info("seed %s", seed)
+
+    rng = random.Random(seed)
+
+    root = make_search_space(3, 3, rng=rng)
+
+    for node in root.bredth_first():
 
-    make_search_space(3, 3, rng=rng)
+        log.info("%s: %s", node.index, node.data)
 
 
 if __name__ == "__main__":
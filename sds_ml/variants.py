@@ -3,6 +3,8 @@ import json, logging, pathlib, random, re
 from logging import DEBUG, INFO, WARNING, ERROR, FATAL
 import sds_ml
 import sds_ml.sds_ml
+import sds_ml.compiled
+import sds_ml.pima.threshold_index
 import operator
 SILENT = 0
 
@@ -10,7 +12,7 @@ log = logging.getLogger(__name__)
 
 DimensionThreshold = collections.namedtuple("DimensionThreshold", ("dimension", "operator", "threshold"))
 
-def DH_plane(dataset, rng):
+def DH_plane(dataset, rng, index=None):
     """ 
     Takes a "choice"able dataset where each row is expected to be of the same
     length.
@@ -19,17 +21,25 @@ def DH_plane(dataset, rng):
     respect to all other values in the same column.
 
     Returns a single (feature_index, threshold, operator) tuple
+
+    Thresholds are drawn from a ThresholdIndex of the dataset, with the
+    distribution of rng.choice(dataset)[feature_index]. Pass the index of the
+    dataset's Evaluator to share it, otherwise one is built.
     """
 
-    def DH():
+    if index is None:
+
+        index = sds_ml.pima.threshold_index.ThresholdIndex.from_dataset(dataset)
 
-        random_row = rng.choice(dataset)
+    dimension_count = len(index.columns)
+
+    def DH():
 
-        feature_num = rng.randrange(len(random_row)-1)
+        feature_num = rng.randrange(dimension_count)
 
-        threshold = random_row[feature_num]
+        threshold = index.random_threshold(feature_num, rng)
 
-        operator = random.choice(sds_ml.sds_ml.operators)
+        operator = rng.choice(sds_ml.sds_ml.operators)
 
         return DimensionThreshold(feature_num, operator, threshold)
 
@@ -44,9 +54,7 @@ def TM_plane(dataset, rng):
 
     def microtest(hyp, row):
 
-        feature = row[hyp.dimension]
-
-        comparison = hyp.operator(feature, hyp.threshold)
+        comparison = sds_ml.compiled.compile_hyp(hyp)(row)
 
         return comparison == row[-1]
 
@@ -58,7 +66,7 @@ def TM_plane(dataset, rng):
 
     return TM, microtest
 
-def DH_plane_union(dataset, rng):
+def DH_plane_union(dataset, rng, index=None):
     """
     Takes a "choice"able dataset where each row is expected to be of the same
     length.
@@ -69,10 +77,16 @@ def DH_plane_union(dataset, rng):
     Returns between one dimension threshold, or one dimension threshold per dimension, with no repeated dimensions.
 
     Returns an unordered set of (feature_index, threshold, operator) tuples
+
+    Thresholds are drawn as by DH_plane, from index if one is given.
     """
 
     dimension_count = max(len(row)-1 for row in dataset)
 
+    if index is None:
+
+        index = sds_ml.pima.threshold_index.ThresholdIndex.from_dataset(dataset)
+
     def DH():
 
         hyp_dim_count = rng.randint(2, dimension_count)
@@ -83,7 +97,7 @@ def DH_plane_union(dataset, rng):
             DimensionThreshold(
                 dimension=dimension,
                 operator=rng.choice(sds_ml.sds_ml.operators),
-                threshold=rng.choice(dataset)[dimension],
+                threshold=index.random_threshold(dimension, rng),
             )
             for dimension
             in sorted(hyp_dims)
@@ -97,11 +111,7 @@ def TM_plane_intersection(dataset, rng):
 
     def microtest(hyp, row):
 
-        comparison = all(
-            plane.operator(row[plane.dimension], plane.threshold)
-            for plane
-            in hyp
-        )
+        comparison = sds_ml.compiled.compile_hyp(hyp, set_type="intersection")(row)
 
         return comparison == row[-1]
 
@@ -117,11 +127,7 @@ def TM_plane_union(dataset, rng):
 
     def microtest(hyp, row):
 
-        comparison = any(
-            plane.operator(row[plane.dimension], plane.threshold)
-            for plane
-            in hyp
-        )
+        comparison = sds_ml.compiled.compile_hyp(hyp, set_type="union")(row)
 
         return comparison == row[-1]
 
@@ -135,7 +141,7 @@ def TM_plane_union(dataset, rng):
 
 class Plane:
 
-    __slots__ = ("dimension", "operator", "threshold")
+    __slots__ = ("dimension", "operator", "threshold", "hash")
 
     operator2symbol = {
         operator.lt:"<",
@@ -149,6 +155,13 @@ class Plane:
         self.dimension = dimension
         self.operator = operator
         self.threshold = threshold
+        self.hash = hash((dimension, operator))
+
+    def __reduce__(self):
+
+        # The cached hash depends on the address of the operator, so it is
+        # recomputed on unpickling rather than carried to another process.
+        return Plane, (self.dimension, self.operator, self.threshold)
 
     def __eq__(self, other):
 
@@ -160,7 +173,7 @@ class Plane:
 
     def __hash__(self):
 
-        return hash((self.dimension, self.operator))
+        return self.hash
 
     def __str__(self):
 
@@ -168,13 +181,19 @@ class Plane:
 
 class IndexSet(collections.UserList):
 
-    __slots__ = ("data","signature")
+    __slots__ = ("data","signature","hash")
 
     def __init__(self, elements):
 
         self.data = tuple(elements)
 
-        self.signature = frozenset(elements)
+        self.signature = frozenset(self.data)
+
+        self.hash = hash(self.signature)
+
+    def __reduce__(self):
+
+        return IndexSet, (self.data,)
 
     def __eq__(self, other):
 
@@ -190,16 +209,111 @@ class IndexSet(collections.UserList):
 
     def __hash__(self):
 
-        return hash(self.signature)
+        return self.hash
+
+class HypTable:
+    """
+    Interns union of intersection hypotheses, so that structurally equal
+    hypotheses are the same object.
+
+    Planes are keyed by (dimension, operator, threshold), and an IndexSet by
+    the identities of its interned members, in sorted order, so looking one
+    up never hashes or compares the members themselves. An IndexSet holds
+    its members, so while it is in the table their identities cannot be
+    reused. Like the other hypothesis caches the table is emptied once it
+    holds max_cached_hyps entries, after which equal hypotheses are only
+    shared again from then on.
+
+    This is stricter than the equality of IndexSet and Plane, which ignore
+    thresholds, so hypotheses which are equal but not structurally equal
+    remain distinct objects.
+    """
+
+    def __init__(self, max_size=sds_ml.compiled.max_cached_hyps):
+
+        self.max_size = max_size
+
+        self.planes = {}
+
+        self.index_sets = {}
+
+    def __len__(self):
+
+        return len(self.planes) + len(self.index_sets)
+
+    def plane(self, dimension, operator, threshold):
+
+        key = (dimension, operator, threshold)
+
+        plane = self.planes.get(key)
+
+        if plane is None:
+
+            plane = Plane(dimension=dimension, operator=operator, threshold=threshold)
+
+            if len(self.planes) >= self.max_size:
+
+                self.clear()
+
+            self.planes[key] = plane
 
+        return plane
 
-def DH_data_driven(dataset, swarm, rng):
+    def index_set(self, elements):
+        """
+        Returns the IndexSet of elements, which must themselves be interned.
+        """
+
+        elements = tuple(elements)
+
+        key = tuple(sorted(map(id, elements)))
+
+        index_set = self.index_sets.get(key)
+
+        if index_set is None:
+
+            index_set = IndexSet(elements)
+
+            if len(self.index_sets) >= self.max_size:
+
+                self.clear()
+
+            self.index_sets[key] = index_set
+
+        return index_set
+
+    def clear(self):
+
+        self.planes.clear()
+
+        self.index_sets.clear()
+
+    def intern(self, hyp):
+        """
+        Returns the interned form of a Plane, or of an IndexSet of interned
+        forms, which may be hyp itself.
+        """
+
+        if isinstance(hyp, Plane):
+
+            return self.plane(hyp.dimension, hyp.operator, hyp.threshold)
+
+        return self.index_set(self.intern(member) for member in hyp)
+
+hyp_table = HypTable()
+
+
+def DH_data_driven(dataset, swarm, rng, hyp_table=hyp_table, index=None):
 
     dimension_count = max(len(row)-1 for row in dataset)
 
+    if index is None:
+
+        index = sds_ml.pima.threshold_index.ThresholdIndex.from_dataset(dataset)
+
     def select_intersection_dim_count():
 
-        polled = random.choice(swarm)
+        polled = rng.choice(swarm)
 
         if polled.active:
 
@@ -213,7 +327,7 @@ def DH_data_driven(dataset, swarm, rng):
 
     def select_intersection_count():
 
-        polled = random.choice(swarm)
+        polled = rng.choice(swarm)
 
         if polled.active:
 
@@ -225,7 +339,7 @@ def DH_data_driven(dataset, swarm, rng):
 
     def select_dimension():
 
-        polled = random.choice(swarm)
+        polled = rng.choice(swarm)
 
         if polled.active:
 
@@ -241,7 +355,7 @@ def DH_data_driven(dataset, swarm, rng):
 
     def select_operator():
 
-        polled = random.choice(swarm)
+        polled = rng.choice(swarm)
 
         if polled.active:
 
@@ -257,7 +371,7 @@ def DH_data_driven(dataset, swarm, rng):
 
     def select_threshold(dimension):
 
-        polled = random.choice(swarm)
+        polled = rng.choice(swarm)
 
         if polled.active:
 
@@ -269,7 +383,7 @@ def DH_data_driven(dataset, swarm, rng):
 
                 return plane.threshold
 
-        return rng.choice(dataset)[dimension]
+        return index.random_threshold(dimension, rng)
             
 
     def select_plane():
@@ -280,7 +394,7 @@ def DH_data_driven(dataset, swarm, rng):
 
         threshold = select_threshold(dimension)
 
-        return Plane(
+        return hyp_table.plane(
             dimension=dimension,
             operator=operator,
             threshold=threshold,
@@ -292,23 +406,44 @@ def DH_data_driven(dataset, swarm, rng):
 
         for intersection_num in range(select_intersection_count()):
 
-            intersection = IndexSet(
-                tuple(
-                    select_plane()
-                    for dim_num
-                    in range(select_intersection_dim_count())
-                )
+            intersection = hyp_table.index_set(
+                select_plane()
+                for dim_num
+                in range(select_intersection_dim_count())
             )
 
             intersections.append(intersection)
 
-        union = IndexSet(intersections)
+        union = hyp_table.index_set(intersections)
 
         return union
 
     return DH
 
 
+def I_report(I, report_num, report_function):
+    """
+    Returns a mode of iteration which runs I and, after every report_num
+    iterations, calls report_function with the number of iterations so far.
+    """
+
+    iterations = 0
+
+    def I_prime():
+
+        nonlocal iterations
+
+        I()
+
+        iterations += 1
+
+        if iterations % report_num == 0:
+
+            report_function(iterations)
+
+    return I_prime
+
+
 def main():
 
     pass